@@ -11,11 +11,24 @@ import shutil
 import logging
 import sys
 import copy
+import queue
+import threading
+import contextvars
+import tempfile
+import multiprocessing
 from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 
 import folder_paths
 from comfy.utils import common_upscale, ProgressBar
 from comfy_api.latest import IO
+from ..utils.frame_index import get_frame_index
+from ..utils.frame_timing import frame_schedule, keyframe_at_or_before, plan_segments, skip_position
+from ..utils import decode_worker, process_workers
+from ..utils.frame_cache import frame_cache_name, load_cached_frames, store_frames
+from ..utils.frame_buffers import (OUTPUT_DTYPES, STAGING_BYTES, count_yieldable_frames,
+                                   frame_budget, store_uint8, store_float, collect_frames)
 
 
 def get_file_path(path):
@@ -237,8 +250,30 @@ def lazy_get_audio(file, start_time=0, duration=0, **kwargs):
     return LazyAudioMap(file, start_time, duration)
 
 # ==================== Frame Generators ====================
+def cv_video_info(video):
+    video_cap = cv2.VideoCapture(video)
+    try:
+        if not video_cap.isOpened():
+            raise ValueError(f"{video} could not be loaded with cv.")
+        fps = video_cap.get(cv2.CAP_PROP_FPS)
+        width = int(video_cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(video_cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        total_frames = int(video_cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if width <= 0 or height <= 0 or fps <= 0:
+            raise ValueError(f"{video} has no readable video stream.")
+    finally:
+        video_cap.release()
+    return width, height, fps, total_frames
+
+def seek_frame(video_cap, video, frame_number, fps):
+    """Leave video_cap holding frame_number (frame 0 grabbed on entry), jumping
+    to the closest preceding keyframe from the cached frame index."""
+    index = get_frame_index(video) if frame_number > 0 else None
+    keyframe = keyframe_at_or_before(index, frame_number) if index else None
+    return decode_worker.seek_to(video_cap, video, frame_number, keyframe, fps)
+
 def cv_frame_generator(video, force_rate, frame_load_cap, skip_first_frames,
-                       select_every_nth):
+                       select_every_nth, convert=True):
     video_cap = cv2.VideoCapture(video)
     if not video_cap.isOpened() or not video_cap.grab():
         raise ValueError(f"{video} could not be loaded with cv.")
@@ -264,20 +299,20 @@ def cv_frame_generator(video, force_rate, frame_load_cap, skip_first_frames,
     else:
         target_frame_time = 1/force_rate
 
-    if total_frames > 0:
-        if force_rate != 0:
-            yieldable_frames = int(total_frames / fps * force_rate)
-        else:
-            yieldable_frames = total_frames
-        if select_every_nth:
-            yieldable_frames //= select_every_nth
-        if frame_load_cap != 0:
-            yieldable_frames =  min(frame_load_cap, yieldable_frames)
-    else:
-        yieldable_frames = 0
+    yieldable_frames = count_yieldable_frames(total_frames, fps, force_rate, frame_load_cap,
+                                              select_every_nth, skip_first_frames)
     yield (width, height, fps, duration, total_frames, target_frame_time, yieldable_frames)
     pbar = ProgressBar(yieldable_frames)
     time_offset=target_frame_time
+    if skip_first_frames > 0:
+        # replay the skipped frames arithmetically, then seek to the source
+        # frame the loop would be holding instead of grabbing up to it
+        time_offset, source_frame = skip_position(skip_first_frames, base_frame_time,
+                                                  target_frame_time)
+        total_frame_count = skip_first_frames
+        if not seek_frame(video_cap, video, source_frame, fps):
+            video_cap.release()
+            return
     while video_cap.isOpened():
         if time_offset < target_frame_time:
             is_returned = video_cap.grab()
@@ -297,9 +332,9 @@ def cv_frame_generator(video, force_rate, frame_load_cap, skip_first_frames,
             continue
 
         unused, frame = video_cap.retrieve()
-        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        frame = np.array(frame, dtype=np.float32)
-        torch.from_numpy(frame).div_(255)
+        # frames stay uint8 here; load_video normalizes them in blocks
+        if convert:
+            frame = bgr_to_rgb(frame)
         if prev_frame is not None:
             inp  = yield prev_frame
             if inp is not None:
@@ -335,58 +370,490 @@ def target_size(width, height, custom_width, custom_height, downscale_ratio=8) -
     height = int(height/downscale_ratio + 0.5) * downscale_ratio
     return (width, height)
 
-def resized_cv_frame_gen(custom_width, custom_height, downscale_ratio, **kwargs):
-    gen = cv_frame_generator(**kwargs)
+def upscale_frames(s, new_width, new_height):
+    """uint8 NHWC batch -> float32 NHWC batch at the new size"""
+    s = s.movedim(-1,1).float().div_(255)
+    s = common_upscale(s, new_width, new_height, "lanczos", "center")
+    return s.movedim(1,-1)
+
+def bgr_to_rgb(frame):
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+PIPELINE_DEPTH = 8
+_PIPELINE_END = object()
+
+def threaded(it, maxsize, name, fn=None, upstream=None):
+    """Iterate it (applying fn) in a worker thread, handing items over through
+    a bounded queue so the producer runs ahead by at most maxsize items.
+
+    cv2 decoding/conversion and torch resizing release the GIL, so chained
+    stages overlap on separate cores. Errors are re-raised in the consumer.
+    Closing the consumer stops the worker and closes it and upstream, which
+    shuts down earlier stages in turn. The worker runs in a copy of the
+    current context so ProgressBar still reports against the executing node."""
+    items = queue.Queue(maxsize)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def run():
+        try:
+            for item in it:
+                if not put(item if fn is None else fn(item)):
+                    break
+            else:
+                put(_PIPELINE_END)
+        except BaseException as e:
+            put((_PIPELINE_END, e))
+        finally:
+            for source in (it, upstream):
+                if hasattr(source, "close"):
+                    source.close()
+
+    worker = threading.Thread(target=contextvars.copy_context().run, args=(run,),
+                              name=f"pm-video-{name}", daemon=True)
+    worker.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _PIPELINE_END:
+                return
+            if type(item) is tuple and len(item) == 2 and item[0] is _PIPELINE_END:
+                raise item[1]
+            yield item
+    finally:
+        stop.set()
+        worker.join()
+
+# ==================== Resizing ====================
+# lanczos keeps the original float common_upscale path; the others resize the
+# uint8 frames with cv2 as they are decoded (or with ffmpeg's scale filter)
+RESIZE_METHODS = ["lanczos", "auto", "area", "bilinear", "bicubic", "nearest"]
+CV_INTERPOLATIONS = {
+    "area": cv2.INTER_AREA,
+    "bilinear": cv2.INTER_LINEAR,
+    "bicubic": cv2.INTER_CUBIC,
+    "nearest": cv2.INTER_NEAREST,
+}
+FFMPEG_SCALE_FLAGS = {
+    "lanczos": "lanczos",
+    "area": "area",
+    "bilinear": "bilinear",
+    "bicubic": "bicubic",
+    "nearest": "neighbor",
+}
+
+def resolve_resize_method(resize_method, width, height, new_width, new_height):
+    """auto: area averaging when shrinking, lanczos otherwise."""
+    if resize_method == "auto":
+        if new_width <= width and new_height <= height:
+            return "area"
+        return "lanczos"
+    return resize_method
+
+def center_crop_box(width, height, new_width, new_height):
+    """(x, y, w, h) that common_upscale(..., "center") crops before scaling."""
+    old_aspect = width / height
+    new_aspect = new_width / new_height
+    x = 0
+    y = 0
+    if old_aspect > new_aspect:
+        x = round((width - width * (new_aspect / old_aspect)) / 2)
+    elif old_aspect < new_aspect:
+        y = round((height - height * (old_aspect / new_aspect)) / 2)
+    return x, y, width - x * 2, height - y * 2
+
+def decode_resize_spec(resize_method, width, height, new_width, new_height):
+    """Argument for decode_worker.crop_resize, or None when the method is the
+    float lanczos path or no resize is needed."""
+    if new_width == width and new_height == height:
+        return None
+    method = resolve_resize_method(resize_method, width, height, new_width, new_height)
+    if method not in CV_INTERPOLATIONS:
+        return None
+    return (*center_crop_box(width, height, new_width, new_height),
+            new_width, new_height, CV_INTERPOLATIONS[method])
+
+def resized_cv_frame_gen(custom_width, custom_height, downscale_ratio, pipeline=True,
+                         resize_method="lanczos", **kwargs):
+    """OpenCV decoding with optional resize. With pipeline, decode, color
+    conversion and resize batches run as threaded stages joined by bounded
+    queues; the frames produced are the same either way. Methods other than
+    lanczos resize the uint8 frames in the conversion stage."""
+    gen = cv_frame_generator(convert=False, **kwargs)
     info =  next(gen)
     width, height = info[0], info[1]
     frames_per_batch = (1920 * 1080 * 16) // (width * height) or 1
+    new_size = (width, height)
     if custom_width != 0 or custom_height != 0 or downscale_ratio is not None:
         new_size = target_size(width, height, custom_width, custom_height, downscale_ratio)
+    resize = decode_resize_spec(resize_method, width, height, *new_size)
+    if resize is None:
+        convert = bgr_to_rgb
+    else:
+        # resizing before the channel swap touches fewer pixels; both are per pixel
+        convert = lambda frame: bgr_to_rgb(decode_worker.crop_resize(frame, resize))
+    if pipeline:
+        gen = threaded(gen, PIPELINE_DEPTH, "decode")
+        gen = threaded(gen, PIPELINE_DEPTH, "convert", fn=convert)
+    else:
+        gen = map(convert, gen)
+    if resize is not None:
+        yield (*info, new_size[0], new_size[1], False)
+        yield from gen
+        return
+    if custom_width != 0 or custom_height != 0 or downscale_ratio is not None:
         yield (*info, new_size[0], new_size[1], False)
         if new_size[0] != width or new_size[1] != height:
             def rescale(frame):
-                s = torch.from_numpy(np.fromiter(frame, np.dtype((np.float32, (height, width, 3)))))
-                s = s.movedim(-1,1)
-                s = common_upscale(s, new_size[0], new_size[1], "lanczos", "center")
-                return s.movedim(1,-1).numpy()
-            yield from itertools.chain.from_iterable(map(rescale, batched(gen, frames_per_batch)))
+                s = torch.from_numpy(np.stack(frame))
+                return upscale_frames(s, new_size[0], new_size[1]).numpy()
+            if pipeline:
+                batches = threaded(batched(gen, frames_per_batch), 2, "resize",
+                                   fn=rescale, upstream=gen)
+            else:
+                batches = map(rescale, batched(gen, frames_per_batch))
+            yield from itertools.chain.from_iterable(batches)
             return
     else:
         yield (*info, info[0], info[1], False)
     yield from gen
 
+def ffmpeg_video_filters(width, height, new_width, new_height, force_rate,
+                         select_every_nth, resize_method="lanczos"):
+    """Build the -vf chain; resizing center-crops to the target aspect ratio first, like common_upscale."""
+    filters = []
+    if force_rate != 0:
+        filters.append(f"fps={force_rate}")
+    if select_every_nth > 1:
+        filters.append(f"select='not(mod(n,{select_every_nth}))'")
+    if new_width != width or new_height != height:
+        x, y, w, h = center_crop_box(width, height, new_width, new_height)
+        if (w, h) != (width, height):
+            filters.append(f"crop={w}:{h}:{x}:{y}")
+        method = resolve_resize_method(resize_method, width, height, new_width, new_height)
+        filters.append(f"scale={new_width}:{new_height}:flags={FFMPEG_SCALE_FLAGS[method]}")
+    return filters
+
+
+def ffmpeg_frame_gen(video, force_rate, frame_load_cap, skip_first_frames,
+                     select_every_nth, custom_width, custom_height, downscale_ratio,
+                     resize_method="lanczos"):
+    """Decode with an ffmpeg subprocess writing rgb24 rawvideo to a pipe.
+
+    Seeking, frame rate conversion, frame selection and scaling all happen
+    inside ffmpeg, so only the requested frames at the requested size cross
+    the pipe. Yields the same info tuple as resized_cv_frame_gen. Frames are
+    read into one reused buffer and are only valid until the next frame is
+    requested."""
+    if ffmpeg_path is None:
+        raise RuntimeError("ffmpeg is required for the ffmpeg decoder")
+    width, height, fps, total_frames = cv_video_info(video)
+    duration = total_frames / fps
+    target_frame_time = 1 / fps if force_rate == 0 else 1 / force_rate
+    yieldable_frames = count_yieldable_frames(total_frames, fps, force_rate, frame_load_cap,
+                                              select_every_nth, skip_first_frames)
+    new_width, new_height = width, height
+    if custom_width != 0 or custom_height != 0 or downscale_ratio is not None:
+        new_width, new_height = target_size(width, height, custom_width,
+                                            custom_height, downscale_ratio)
+    yield (width, height, fps, duration, total_frames, target_frame_time,
+           yieldable_frames, new_width, new_height, False)
+
+    args = [ffmpeg_path, "-v", "error", "-nostdin"]
+    if skip_first_frames > 0:
+        # input seek: ffmpeg jumps to the preceding keyframe and decodes forward
+        args += ["-ss", f"{skip_first_frames * target_frame_time:.6f}"]
+    args += ["-i", video, "-map", "0:v:0", "-an", "-sn"]
+    filters = ffmpeg_video_filters(width, height, new_width, new_height, force_rate,
+                                   select_every_nth, resize_method)
+    if filters:
+        args += ["-vf", ",".join(filters)]
+    if frame_load_cap > 0:
+        args += ["-frames:v", str(frame_load_cap)]
+    args += ["-pix_fmt", "rgb24", "-f", "rawvideo", "-"]
+
+    frame = np.empty((new_height, new_width, 3), dtype=np.uint8)
+    buffer = memoryview(frame).cast("B")
+    frame_bytes = len(buffer)
+    pbar = ProgressBar(yieldable_frames)
+    frames_added = 0
+    proc = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            bufsize=frame_bytes)
+    try:
+        while True:
+            read = 0
+            while read < frame_bytes:
+                n = proc.stdout.readinto(buffer[read:])
+                if not n:
+                    break
+                read += n
+            if read < frame_bytes:
+                break
+            frames_added += 1
+            pbar.update_absolute(frames_added, yieldable_frames)
+            yield frame
+        proc.stdout.close()
+        if proc.wait() != 0 and frames_added == 0:
+            raise RuntimeError(f"ffmpeg failed to decode {video}:\n"
+                               + proc.stderr.read().decode(*ENCODE_ARGS))
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        proc.stderr.close()
+
+FRAME_DECODERS = ["opencv", "ffmpeg", "auto"]
+
+def select_frame_generator(decoder="opencv", custom_width=0, custom_height=0, skip_first_frames=0):
+    """opencv is the default. ffmpeg and auto are opt-in: auto prefers ffmpeg
+    when it saves work (scaling inside the decoder, input seeking past skipped
+    frames), but ffmpeg's color conversion, uint8 scaling and fps/seek frame
+    selection do not match the OpenCV path bit for bit."""
+    if decoder == "ffmpeg":
+        return ffmpeg_frame_gen
+    if decoder == "auto" and ffmpeg_path is not None:
+        if custom_width != 0 or custom_height != 0 or skip_first_frames > 0:
+            return ffmpeg_frame_gen
+    return resized_cv_frame_gen
+
+# ==================== Frame Collection ====================
+OUTPUT_MODES = ["memory", "memmap"]
+# IMAGE consumers expect float in [0, 1]; uint8 frames (0-255) go out on their own socket type
+UINT8_FRAMES = IO.Custom("PM_FRAMES_UINT8")
+# numpy has no bfloat16; memmap it as 16-bit integers and view the tensor
+MEMMAP_DTYPES = {
+    torch.float32: np.float32,
+    torch.float16: np.float16,
+    torch.bfloat16: np.uint16,
+    torch.uint8: np.uint8,
+}
+
+def memmap_tensor(shape, dtype=torch.float32):
+    """Tensor backed by a file in the ComfyUI temp directory, so the page
+    cache can write frames out instead of the process running out of RAM."""
+    temp_dir = folder_paths.get_temp_directory()
+    os.makedirs(temp_dir, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix="pm_frames_", suffix=".raw", dir=temp_dir)
+    os.close(fd)
+    array = np.memmap(path, dtype=MEMMAP_DTYPES[dtype], mode="w+", shape=shape)
+    try:
+        # the mapping outlives the name on POSIX; elsewhere the temp dir is
+        # cleared when ComfyUI starts
+        os.remove(path)
+    except OSError:
+        pass
+    return torch.from_numpy(array).view(dtype)
+
+def frame_allocator(output_mode, dtype=torch.float32):
+    if output_mode == "memmap":
+        return lambda shape: memmap_tensor(shape, dtype)
+    return lambda shape: torch.empty(shape, dtype=dtype)
+
+# ==================== Parallel Decode ====================
+_decode_pool = None
+_decode_pool_workers = 0
+_decode_pool_lock = threading.Lock()
+
+def get_decode_pool(workers):
+    global _decode_pool, _decode_pool_workers
+    with _decode_pool_lock:
+        if _decode_pool is not None and _decode_pool_workers != workers:
+            _decode_pool.shutdown(wait=False)
+            _decode_pool = None
+        if _decode_pool is None:
+            code = process_workers.register(decode_worker)
+            _decode_pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                initializer=exec, initargs=(code,))
+            _decode_pool_workers = workers
+        return _decode_pool
+
+def discard_decode_pool(pool):
+    """Drop a pool whose worker died so the next load starts a fresh one."""
+    global _decode_pool
+    with _decode_pool_lock:
+        if _decode_pool is pool:
+            _decode_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def load_video_parallel(video, force_rate, frame_load_cap, skip_first_frames, select_every_nth,
+                        custom_width, custom_height, downscale_ratio, decode_workers,
+                        memory_limit, dtype=torch.float32, resize_method="lanczos", **kwargs):
+    """Decode keyframe-aligned segments in worker processes straight into a
+    shared-memory tensor. Returns (images, target_frame_time), or None when
+    the serial path should be used instead."""
+    index = get_frame_index(video)
+    if index is None or not index["keyframes"]:
+        return None
+    width, height, fps, _ = cv_video_info(video)
+    base_frame_time = 1 / fps
+    target_frame_time = base_frame_time if force_rate == 0 else 1 / force_rate
+    schedule = frame_schedule(index["frames"], base_frame_time, target_frame_time,
+                              skip_first_frames, select_every_nth, frame_load_cap)
+    if len(schedule) == 0:
+        return None
+    new_width, new_height = target_size(width, height, custom_width, custom_height, downscale_ratio)
+    max_loadable_frames = frame_budget(memory_limit, (new_height, new_width, 3), dtype)
+    if len(schedule) > max_loadable_frames:
+        raise RuntimeError(f"Memory limit hit: {len(schedule)} frames requested, "
+                           f"{max_loadable_frames} fit. Stopping execution.")
+    decode_resize = decode_resize_spec(resize_method, width, height, new_width, new_height)
+    # lanczos resizing runs in this process on uint8 frames, as in resized_cv_frame_gen;
+    # other methods resize in the workers straight into the output size
+    resize = decode_resize is None and (new_width != width or new_height != height)
+    try:
+        if resize:
+            out = torch.empty((len(schedule), height, width, 3), dtype=torch.uint8)
+        else:
+            out = torch.empty((len(schedule), new_height, new_width, 3), dtype=dtype)
+        out.share_memory_()
+    except RuntimeError as e:
+        logger.warn(f"Shared memory unavailable ({e}), decoding serially")
+        return None
+
+    segments = plan_segments(schedule, index, decode_workers * 2)
+    pool = get_decode_pool(decode_workers)
+    worker = sys.modules[decode_worker.MODULE_NAME].decode_segment
+    futures = {}
+    for start, end in segments:
+        keyframe = keyframe_at_or_before(index, schedule[start])
+        future = pool.submit(worker, video, out, start, schedule[start:end], keyframe, fps,
+                             decode_resize)
+        futures[future] = (start, end)
+    pbar = ProgressBar(len(schedule))
+    decoded = 0
+    written = {}
+    for future in as_completed(futures):
+        start, end = futures[future]
+        try:
+            written[start] = future.result()
+        except Exception as e:
+            for pending in futures:
+                pending.cancel()
+            if isinstance(e, BrokenProcessPool):
+                discard_decode_pool(pool)
+            logger.warn(f"Parallel decode failed ({e}), decoding serially")
+            return None
+        decoded += end - start
+        pbar.update_absolute(decoded, len(schedule))
+
+    # a short segment means the stream ended early; the serial path stops there too
+    count = 0
+    for start, end in segments:
+        count += written[start]
+        if written[start] < end - start:
+            break
+    out = out[:count]
+    if resize:
+        frames_per_batch = (1920 * 1080 * 16) // (width * height) or 1
+        images = torch.empty((count, new_height, new_width, 3), dtype=dtype)
+        for i in range(0, count, frames_per_batch):
+            store_float(images[i:i + frames_per_batch],
+                        upscale_frames(out[i:i + frames_per_batch], new_width, new_height))
+        out = images
+    return out, target_frame_time
+
+# ==================== Frame Cache ====================
+def frames_from_uint8(frames, allocate):
+    """Normalize a (possibly memory-mapped) uint8 frame array block by block."""
+    images = allocate(frames.shape)
+    block = max(1, STAGING_BYTES // int(np.prod(frames.shape[1:])))
+    for i in range(0, len(frames), block):
+        store_uint8(images[i:i + block], torch.from_numpy(np.array(frames[i:i + block])))
+    return images
+
+def store_frame_cache(name, images, target_frame_time):
+    # loaded frames are k/255 (lanczos in common_upscale also rounds through
+    # uint8), and every output dtype keeps them within half a step of k, so
+    # rounding back to uint8 is lossless
+    block = max(1, STAGING_BYTES // int(np.prod(images.shape[1:])))
+    def fill(array):
+        for i in range(0, len(images), block):
+            chunk = images[i:i + block]
+            if chunk.dtype != torch.uint8:
+                chunk = chunk.float().mul(255).round_().to(torch.uint8)
+            array[i:i + block] = chunk.numpy()
+    try:
+        store_frames(name, tuple(images.shape), fill, {'target_frame_time': target_frame_time})
+    except Exception as e:
+        logger.warn(f"Failed to write frame cache: {e}")
+
 # ==================== Main Load Video Function ====================
 def load_video(unique_id=None, memory_limit_mb=None,
-               generator=resized_cv_frame_gen, **kwargs):
+               generator=resized_cv_frame_gen, decode_workers=0, use_frame_cache=False,
+               output_mode="memory", output_dtype="float32", **kwargs):
     if 'force_size' in kwargs:
         kwargs.pop('force_size')
         logger.warn("force_size has been removed. Did you reload the webpage after updating?")
     kwargs['video'] = strip_path(kwargs['video'])
     downscale_ratio = 8
-    gen = generator(downscale_ratio=downscale_ratio, **kwargs)
-    (width, height, fps, duration, total_frames, target_frame_time, yieldable_frames, new_width, new_height, alpha) = next(gen)
 
-    memory_limit = None
-    if memory_limit_mb is not None:
-        memory_limit *= 2 ** 20
+    dtype = OUTPUT_DTYPES[output_dtype]
+    allocate = frame_allocator(output_mode, dtype)
+    if memory_limit_mb:
+        memory_limit = memory_limit_mb * 2 ** 20
+    elif output_mode == "memmap":
+        # memmap output is bounded by temp disk space rather than RAM
+        try:
+            memory_limit = shutil.disk_usage(folder_paths.get_temp_directory()).free - 2 ** 30
+        except OSError:
+            memory_limit = BIGMAX
     else:
         try:
             memory_limit = (psutil.virtual_memory().available + psutil.swap_memory().free) - 2 ** 27
         except:
             logger.warn("Failed to calculate available memory. Memory load limit has been disabled")
             memory_limit = BIGMAX
-    max_loadable_frames = int(memory_limit//(width*height*3*(.1)))
-    original_gen = gen
-    gen = itertools.islice(gen, max_loadable_frames)
-    images = torch.from_numpy(np.fromiter(gen, np.dtype((np.float32, (new_height, new_width, 4 if alpha else 3)))))
-    if memory_limit is not None:
+
+    loaded = None
+    cache_name = None
+    if use_frame_cache:
+        cache_name = frame_cache_name(calculate_file_hash(kwargs['video']), {
+            'decoder': generator.__name__,
+            'downscale_ratio': downscale_ratio,
+            **{k: v for k, v in kwargs.items() if k != 'video'},
+        })
+        cached = load_cached_frames(cache_name)
+        if cached is not None:
+            cached, meta = cached
+            if len(cached) > frame_budget(memory_limit, cached.shape[1:], dtype):
+                raise RuntimeError(f"Memory limit hit: cached clip has {len(cached)} frames. Stopping execution.")
+            loaded = (frames_from_uint8(cached, allocate), meta['target_frame_time'])
+            cache_name = None
+    # shared-memory tensors can't be file-backed, so memmap output decodes serially
+    if loaded is None and decode_workers > 1 and generator is resized_cv_frame_gen \
+            and output_mode == "memory":
+        loaded = load_video_parallel(downscale_ratio=downscale_ratio, decode_workers=decode_workers,
+                                     memory_limit=memory_limit, dtype=dtype, **kwargs)
+    if loaded is not None:
+        images, target_frame_time = loaded
+    else:
+        gen = generator(downscale_ratio=downscale_ratio, **kwargs)
+        (width, height, fps, duration, total_frames, target_frame_time, yieldable_frames, new_width, new_height, alpha) = next(gen)
+
+        frame_shape = (new_height, new_width, 4 if alpha else 3)
+        max_loadable_frames = frame_budget(memory_limit, frame_shape, dtype)
+        # closing the generator stops the pipeline threads and releases the capture
         try:
-            next(original_gen)
+            images = collect_frames(itertools.islice(gen, max_loadable_frames), frame_shape,
+                                    yieldable_frames, max_loadable_frames, allocate)
+            exhausted = next(gen, None) is None
+        finally:
+            gen.close()
+        if not exhausted:
             raise RuntimeError(f"Memory limit hit after loading {len(images)} frames. Stopping execution.")
-        except StopIteration:
-            pass
     if len(images) == 0:
         raise RuntimeError("No frames generated")
+    if cache_name is not None:
+        store_frame_cache(cache_name, images, target_frame_time)
     if 'start_time' in kwargs:
         start_time = kwargs['start_time']
     else:
@@ -395,6 +862,30 @@ def load_video(unique_id=None, memory_limit_mb=None,
     audio = lazy_get_audio(kwargs['video'], start_time, kwargs['frame_load_cap']*target_frame_time)
     return (images, audio, len(images), None)
 
+# ==================== Windowed Loading ====================
+def count_output_frames(video, force_rate, frame_load_cap, skip_first_frames, select_every_nth):
+    """Exact number of frames a full load would produce, from the cached frame
+    index (no decoding); falls back to the container's frame count."""
+    width, height, fps, total_frames = cv_video_info(video)
+    index = get_frame_index(video)
+    if index is not None:
+        total_frames = index["frames"]
+    target_frame_time = 1 / fps if force_rate == 0 else 1 / force_rate
+    return len(frame_schedule(total_frames, 1 / fps, target_frame_time, skip_first_frames,
+                              select_every_nth, frame_load_cap))
+
+def window_range(skip_first_frames, frame_load_cap, select_every_nth, window_size, window_index):
+    """Translate a window of the selected frames into skip/cap parameters.
+
+    Output frame j sits skip_first_frames + j * select_every_nth frames in
+    (after force_rate), so a window is just a larger skip and a smaller cap,
+    and loading it seeks instead of decoding the frames before it."""
+    start = window_index * window_size
+    cap = window_size
+    if frame_load_cap > 0:
+        cap = min(cap, frame_load_cap - start)
+    return skip_first_frames + start * select_every_nth, cap
+
 # ==================== Main Node Class ====================
 class PMLoadVideo(IO.ComfyNode):
     @classmethod
@@ -429,20 +920,55 @@ class PMLoadVideo(IO.ComfyNode):
                 IO.Int.Input("frame_load_cap", default=0, min=0, max=BIGMAX, step=1, extra_dict={"reset": 0}),
                 IO.Int.Input("skip_first_frames", default=0, min=0, max=BIGMAX, step=1, extra_dict={"reset": 0}),
                 IO.Int.Input("select_every_nth", default=1, min=1, max=BIGMAX, step=1, extra_dict={"reset": 1}),
+                IO.Combo.Input("decoder", options=FRAME_DECODERS, default="opencv", optional=True,
+                               tooltip="ffmpeg decodes, seeks and scales in one subprocess (faster, but colors, scaling and frame selection can differ slightly from OpenCV); auto uses ffmpeg only when resizing or skipping frames"),
+                IO.Combo.Input("resize_method", options=RESIZE_METHODS, default="lanczos", optional=True,
+                               tooltip="lanczos resizes float frames after decoding; the others resize uint8 frames while decoding (auto: area when shrinking)"),
+                IO.Int.Input("decode_workers", default=0, min=0, max=64, step=1, optional=True,
+                             tooltip="Decode keyframe-aligned segments in this many processes (OpenCV decoder). 0 or 1 decodes serially"),
+                IO.Boolean.Input("use_frame_cache", default=False, optional=True,
+                                 tooltip="Keep decoded frames on disk and memory-map them on later runs with the same file and settings"),
+                IO.Combo.Input("output_mode", options=OUTPUT_MODES, default="memory", optional=True,
+                               tooltip="memmap backs the image tensor with a file in the temp directory so clips larger than RAM can load"),
+                IO.Combo.Input("output_dtype", options=list(OUTPUT_DTYPES), default="float32", optional=True,
+                               tooltip="Image precision: float16/bfloat16 halve memory. uint8 (0-255, a quarter of float32) goes to the uint8_frames output instead, and images is left empty"),
+                IO.Int.Input("memory_limit_mb", default=0, min=0, max=BIGMAX, step=64, optional=True,
+                             tooltip="Output size budget in MB; 0 uses available RAM (free temp disk space in memmap mode)"),
+                IO.Int.Input("window_size", default=0, min=0, max=BIGMAX, step=1, optional=True,
+                             tooltip="Load only window_size frames of the selection, seeking to the window; 0 loads everything"),
+                IO.Int.Input("window_index", default=0, min=0, max=BIGMAX, step=1, optional=True,
+                             tooltip="Which window to load when window_size is set"),
             ],
             outputs=[
                 IO.Image.Output("images"),
                 IO.Audio.Output("audio"),
                 IO.Int.Output("frame_count"),
                 IO.Video.Output("video"),
+                IO.Int.Output("window_count"),
+                UINT8_FRAMES.Output("uint8_frames",
+                                    tooltip="NHWC uint8 tensor (0-255), only set when output_dtype is uint8"),
             ],
         )
 
     @classmethod
     def execute(cls, video, force_rate, custom_width, custom_height, frame_load_cap,
-                skip_first_frames, select_every_nth, **kwargs) -> IO.NodeOutput:
+                skip_first_frames, select_every_nth, decoder="opencv", decode_workers=0,
+                use_frame_cache=False, output_mode="memory", output_dtype="float32",
+                memory_limit_mb=0, window_size=0, window_index=0, resize_method="lanczos",
+                **kwargs) -> IO.NodeOutput:
         video_path = get_file_path(video)
 
+        window_count = 1
+        if window_size > 0:
+            total = count_output_frames(video_path, force_rate, frame_load_cap,
+                                        skip_first_frames, select_every_nth)
+            window_count = max(1, -(-total // window_size))
+            if window_index >= window_count:
+                raise ValueError(f"window_index {window_index} is out of range: "
+                                 f"{total} frames make {window_count} windows of {window_size}")
+            skip_first_frames, frame_load_cap = window_range(
+                skip_first_frames, frame_load_cap, select_every_nth, window_size, window_index)
+
         kwargs_exec = {
             'video': video_path,
             'force_rate': force_rate,
@@ -451,10 +977,21 @@ class PMLoadVideo(IO.ComfyNode):
             'frame_load_cap': frame_load_cap,
             'skip_first_frames': skip_first_frames,
             'select_every_nth': select_every_nth,
+            'resize_method': resize_method,
             'unique_id': kwargs.get('unique_id'),
+            'generator': select_frame_generator(decoder, custom_width, custom_height,
+                                                skip_first_frames),
+            'decode_workers': decode_workers,
+            'use_frame_cache': use_frame_cache,
+            'output_mode': output_mode,
+            'output_dtype': output_dtype,
+            'memory_limit_mb': memory_limit_mb,
         }
 
         images, audio, frame_count, _ = load_video(**kwargs_exec)
+        uint8_frames = None
+        if output_dtype == "uint8":
+            uint8_frames, images = images, None
 
         video_obj = None
         if HAS_COMFY_API:
@@ -463,7 +1000,7 @@ class PMLoadVideo(IO.ComfyNode):
             except Exception as e:
                 logger.warn(f"Failed to create VideoFromFile object: {e}")
 
-        return IO.NodeOutput(images, audio, frame_count, video_obj)
+        return IO.NodeOutput(images, audio, frame_count, video_obj, window_count, uint8_frames)
 
     @classmethod
     def fingerprint_inputs(cls, video, **kwargs):
@@ -101,7 +101,25 @@ def setup_routes():
         get_pm_output_metadata,
         upload_pm_output,
         get_pm_file_by_absolute_path,
+        # Media library (index-backed)
+        search_pm_output,
+        reindex_pm_output,
+        get_pm_input_thumbnail,
+        get_pm_output_thumbnail,
+        star_pm_output,
+        get_pm_output_retention,
+        save_pm_output_retention,
+        run_pm_output_retention,
+        get_pm_similar_media,
+        get_pm_duplicate_report,
+        get_pm_media_probe,
+        run_pm_media_probe,
+        install_output_hook,
     )
+    from .api.media import get_pm_output_dir
+    from .api.media_library import get_media_roots
+    from .utils.media_probe import schedule_probe
+    from .utils.retention import get_retention_worker
 
     # Workflow routes
     @PromptServer.instance.routes.get("/pm_workflow/list")
@@ -239,6 +257,62 @@ def setup_routes():
     async def upload_output_route(request):
         return await upload_pm_output(request)
 
+    @PromptServer.instance.routes.get("/pm_output/search")
+    async def search_output_route(request):
+        return await search_pm_output(request)
+
+    @PromptServer.instance.routes.post("/pm_output/search/reindex")
+    async def reindex_output_route(request):
+        return await reindex_pm_output(request)
+
+    @PromptServer.instance.routes.get("/pm_input/thumbnail/{path:.*}")
+    async def get_input_thumbnail_route(request):
+        return await get_pm_input_thumbnail(request)
+
+    @PromptServer.instance.routes.get("/pm_output/thumbnail/{path:.*}")
+    async def get_output_thumbnail_route(request):
+        return await get_pm_output_thumbnail(request)
+
+    @PromptServer.instance.routes.post("/pm_output/star")
+    async def star_output_route(request):
+        return await star_pm_output(request)
+
+    @PromptServer.instance.routes.get("/pm_output/retention")
+    async def get_output_retention_route(request):
+        return await get_pm_output_retention(request)
+
+    @PromptServer.instance.routes.post("/pm_output/retention")
+    async def save_output_retention_route(request):
+        return await save_pm_output_retention(request)
+
+    @PromptServer.instance.routes.post("/pm_output/retention/run")
+    async def run_output_retention_route(request):
+        return await run_pm_output_retention(request)
+
+    # Media index routes (output + input)
+    @PromptServer.instance.routes.get("/pm_media/similar")
+    async def get_similar_media_route(request):
+        return await get_pm_similar_media(request)
+
+    @PromptServer.instance.routes.get("/pm_media/duplicates")
+    async def get_duplicate_report_route(request):
+        return await get_pm_duplicate_report(request)
+
+    @PromptServer.instance.routes.get("/pm_media/probe")
+    async def get_media_probe_route(request):
+        return await get_pm_media_probe(request)
+
+    @PromptServer.instance.routes.post("/pm_media/probe")
+    async def run_media_probe_route(request):
+        return await run_pm_media_probe(request)
+
+    # 保存节点的输出直接写入索引 (无需重新扫描目录)
+    install_output_hook()
+    # 输出目录保留策略 (未启用时后台线程只做定时检查)
+    get_retention_worker("output", get_pm_output_dir).start()
+    # 后台探测尺寸/时长/编码，信息面板和加载节点直接读取索引
+    schedule_probe(get_media_roots())
+
     # Absolute path file access route
     @PromptServer.instance.routes.get("/pm/view")
     async def view_file_by_absolute_path_route(request):
@@ -41,6 +41,23 @@ from .media import (
     get_pm_file_by_absolute_path,
 )
 
+from .media_library import (
+    search_pm_output,
+    reindex_pm_output,
+    get_pm_input_thumbnail,
+    get_pm_output_thumbnail,
+    star_pm_output,
+    get_pm_output_retention,
+    save_pm_output_retention,
+    run_pm_output_retention,
+    get_pm_similar_media,
+    get_pm_duplicate_report,
+    get_pm_media_probe,
+    run_pm_media_probe,
+)
+
+from .output_events import install_output_hook
+
 __all__ = [
     # Workflows
     "list_pm_workflows",
@@ -78,4 +95,18 @@ __all__ = [
     "new_output_folder",
     "get_pm_output_metadata",
     "upload_pm_output",
+    # Media library (index-backed)
+    "search_pm_output",
+    "reindex_pm_output",
+    "get_pm_input_thumbnail",
+    "get_pm_output_thumbnail",
+    "star_pm_output",
+    "get_pm_output_retention",
+    "save_pm_output_retention",
+    "run_pm_output_retention",
+    "get_pm_similar_media",
+    "get_pm_duplicate_report",
+    "get_pm_media_probe",
+    "run_pm_media_probe",
+    "install_output_hook",
 ]
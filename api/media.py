@@ -1,14 +1,17 @@
 import os
-import json
+import asyncio
 import logging
 import folder_paths
 import urllib.parse
 from aiohttp import web
-from PIL import Image
 
 from ..utils.helpers import (
     get_file_info,
 )
+from ..utils.media_metadata import read_media_metadata
+from ..utils.media_index import get_media_index, index_file, schedule_sync
+from ..utils.media_probe import get_probe_info
+from ..utils.video_previews import enqueue_video_previews, get_cached_previews
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +24,14 @@ def get_pm_output_dir():
     return folder_paths.get_output_directory()
 
 
+def _mtime(path):
+    """修改时间，前端用作缩略图 URL 的版本号 (文件不变时 URL 不变，浏览器缓存可用)"""
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
 def scan_media_directory(base_dir, relative_path=""):
     current_dir = os.path.join(base_dir, relative_path) if relative_path else base_dir
     items = []
@@ -40,6 +51,7 @@ def scan_media_directory(base_dir, relative_path=""):
 
     if not os.path.exists(current_dir):
         return items
+    missing_video_previews = []
 
     def check_folder_content(folder_path):
         has_image = False
@@ -90,7 +102,8 @@ def scan_media_directory(base_dir, relative_path=""):
 
         if os.path.isdir(entry_path):
             folder_preview_path = os.path.join(current_dir, f".{entry}.png")
-            has_preview = os.path.exists(folder_preview_path)
+            preview_mtime = _mtime(folder_preview_path)
+            has_preview = preview_mtime is not None
 
             folder_content = check_folder_content(entry_path)
 
@@ -100,6 +113,7 @@ def scan_media_directory(base_dir, relative_path=""):
                     "name": entry,
                     "path": entry_relative_path,
                     "has_preview": has_preview,
+                    "preview_mtime": preview_mtime,
                     "has_content": folder_content["has_content"],
                     "has_image": folder_content["has_image"],
                     "has_audio": folder_content["has_audio"],
@@ -113,6 +127,7 @@ def scan_media_directory(base_dir, relative_path=""):
                     "name": entry,
                     "path": entry_relative_path,
                     "has_preview": True,
+                    "mtime": _mtime(entry_path),
                 }
             )
         elif entry.lower().endswith(audio_extensions):
@@ -125,19 +140,44 @@ def scan_media_directory(base_dir, relative_path=""):
                 }
             )
         elif entry.lower().endswith(video_extensions):
+            # 封面和悬停雪碧图由后台任务生成 (/pm/videopreview)
+            poster, sprite = get_cached_previews(entry_path)
+            has_poster = poster is not None and sprite is not None
+            if not has_poster:
+                missing_video_previews.append(entry_path)
             items.append(
                 {
                     "type": "video",
                     "name": entry,
                     "path": entry_relative_path,
                     "has_preview": False,
+                    "has_poster": has_poster,
+                    "mtime": _mtime(entry_path),
                 }
             )
 
+    enqueue_video_previews(missing_video_previews)
     items.sort(key=lambda x: (0 if x["type"] == "folder" else 1, x["name"]))
     return items
 
 
+def update_index_after_change(root, base_dir, old_path, new_path=None, is_dir=False):
+    """删除/重命名后同步媒体索引，保证基于索引的统计 (保留策略等) 不失真"""
+    try:
+        index = get_media_index()
+        old_path = old_path.replace("\\", "/").strip("/")
+        if is_dir:
+            index.remove_folder(root, old_path)
+            if new_path is not None:
+                schedule_sync(root, base_dir, force=True)
+        else:
+            index.remove_paths(root, [old_path])
+            if new_path is not None:
+                index_file(index, root, base_dir, new_path.replace("\\", "/").strip("/"))
+    except Exception as e:
+        logger.error(f"Index update error: {e}")
+
+
 # ============ Input APIs ============
 
 
@@ -179,6 +219,11 @@ async def get_pm_input_info(request):
         return web.Response(status=404, text="File not found")
 
     info = get_file_info(full_path, media_path)
+    if info.get("type") == "file":
+        # 尺寸、时长、编码等来自探测索引 (按 mtime 失效)，不解码文件
+        info["media"] = await asyncio.to_thread(
+            get_probe_info, "input", pm_input_dir, media_path.replace("\\", "/")
+        )
     return web.json_response(info)
 
 
@@ -295,6 +340,11 @@ async def get_pm_output_info(request):
         return web.Response(status=404, text="File not found")
 
     info = get_file_info(full_path, media_path)
+    if info.get("type") == "file":
+        # 尺寸、时长、编码等来自探测索引 (按 mtime 失效)，不解码文件
+        info["media"] = await asyncio.to_thread(
+            get_probe_info, "output", pm_output_dir, media_path.replace("\\", "/")
+        )
     return web.json_response(info)
 
 
@@ -308,10 +358,12 @@ async def delete_pm_output(request):
     if os.path.exists(full_path):
         if os.path.isfile(full_path):
             os.remove(full_path)
+            update_index_after_change("output", pm_output_dir, media_path)
         elif os.path.isdir(full_path):
             import shutil
 
             shutil.rmtree(full_path)
+            update_index_after_change("output", pm_output_dir, media_path, is_dir=True)
 
     return web.json_response({"success": True})
 
@@ -339,6 +391,13 @@ async def rename_pm_output(request):
             return web.Response(status=400, text="New name already exists")
 
         os.rename(old_full_path, new_full_path)
+        update_index_after_change(
+            "output",
+            pm_output_dir,
+            old_path,
+            os.path.relpath(new_full_path, pm_output_dir),
+            is_dir=os.path.isdir(new_full_path),
+        )
         return web.json_response({"success": True})
     except Exception as e:
         logger.error(f"Rename error: {e}")
@@ -385,16 +444,17 @@ async def get_pm_output_metadata(request):
         return web.Response(status=400, text="Not an image file")
 
     try:
-        metadata = {}
+        info = read_media_metadata(full_path)
 
-        if ext == ".png":
-            with Image.open(full_path) as img:
-                png_info = img.info
-                if "prompt" in png_info:
-                    try:
-                        metadata["prompt"] = json.loads(png_info["prompt"])
-                    except:
-                        metadata["prompt"] = png_info["prompt"]
+        metadata = {
+            "format": info["format"],
+            "width": info["width"],
+            "height": info["height"],
+        }
+        if info["prompt"] is not None:
+            metadata["prompt"] = info["prompt"]
+        if info["workflow"] is not None:
+            metadata["workflow"] = info["workflow"]
 
         return web.json_response(metadata)
     except Exception as e:
@@ -485,6 +545,12 @@ async def upload_pm_output(request):
                     size += len(chunk)
                     f.write(chunk)
 
+            rel_path = os.path.relpath(file_path, pm_output_dir).replace("\\", "/")
+            try:
+                index_file(get_media_index(), "output", pm_output_dir, rel_path)
+            except Exception as e:
+                logger.error(f"Index update error: {e}")
+
             return web.json_response(
                 {"success": True, "filename": filename, "size": size}
             )
@@ -0,0 +1,257 @@
+import os
+import asyncio
+import logging
+import urllib.parse
+from aiohttp import web
+
+from .media import get_pm_input_dir, get_pm_output_dir
+from ..utils.media_index import (
+    SEARCH_FACETS,
+    get_media_index,
+    get_sync_state,
+    index_file,
+    schedule_sync,
+)
+from ..utils.retention import (
+    build_projection,
+    get_retention_worker,
+    load_retention_config,
+    save_retention_config,
+)
+from ..utils.media_probe import get_probe_state, schedule_probe
+from ..utils.thumbnails import THUMBNAIL_SIZE, make_thumbnail
+from ..utils.similarity import (
+    HASH_KINDS,
+    duplicate_groups,
+    find_similar,
+    get_hash_state,
+    schedule_hashing,
+)
+
+logger = logging.getLogger(__name__)
+
+MAX_SEARCH_LIMIT = 1000
+
+
+def get_media_roots():
+    return {"output": get_pm_output_dir(), "input": get_pm_input_dir()}
+
+
+def _int_query(query, key, default):
+    try:
+        return int(query.get(key, default))
+    except (TypeError, ValueError):
+        return default
+
+
+# ============ Output Search APIs ============
+
+
+async def search_pm_output(request):
+    """
+    查询参数:
+      q         全文检索 (提示词、模型、LoRA、采样器)
+      model, lora, seed, sampler, scheduler  分面过滤 (可重复)
+      path      限定子文件夹
+      limit, offset
+    """
+    query = request.rel_url.query
+    text = query.get("q", "").strip()
+    folder = urllib.parse.unquote(query.get("path", ""))
+    filters = {facet: query.getall(facet) for facet in SEARCH_FACETS if facet in query}
+    limit = max(1, min(_int_query(query, "limit", 100), MAX_SEARCH_LIMIT))
+    offset = max(0, _int_query(query, "offset", 0))
+
+    pm_output_dir = get_pm_output_dir()
+    schedule_sync("output", pm_output_dir)
+
+    try:
+        index = get_media_index()
+        result = await asyncio.to_thread(
+            index.search, "output", text, filters, folder, limit, offset
+        )
+    except Exception as e:
+        logger.error(f"Search error: {e}")
+        return web.Response(status=500, text=str(e))
+
+    for item in result["items"]:
+        item["absolute_path"] = os.path.join(pm_output_dir, item["path"])
+
+    result["index"] = get_sync_state("output")
+    return web.json_response(result)
+
+
+async def reindex_pm_output(request):
+    started = schedule_sync("output", get_pm_output_dir(), force=True)
+    return web.json_response({"success": True, "started": started, "index": get_sync_state("output")})
+
+
+# ============ Thumbnail APIs ============
+
+
+async def _thumbnail_response(request, base_dir):
+    media_path = request.match_info.get("path", "")
+    media_path = urllib.parse.unquote(media_path)
+    full_path = os.path.join(base_dir, media_path)
+
+    if not os.path.isfile(full_path):
+        return web.Response(status=404)
+
+    size = max(32, min(_int_query(request.rel_url.query, "size", THUMBNAIL_SIZE), 1024))
+    try:
+        thumbnail_path = await asyncio.to_thread(make_thumbnail, full_path, size)
+    except Exception as e:
+        logger.error(f"Thumbnail error: {e}")
+        thumbnail_path = None
+
+    if thumbnail_path is None:
+        return web.FileResponse(full_path)
+    return web.FileResponse(
+        thumbnail_path, headers={"Cache-Control": "max-age=86400"}
+    )
+
+
+async def get_pm_input_thumbnail(request):
+    return await _thumbnail_response(request, get_pm_input_dir())
+
+
+async def get_pm_output_thumbnail(request):
+    return await _thumbnail_response(request, get_pm_output_dir())
+
+
+# ============ Star / Retention APIs ============
+
+
+async def star_pm_output(request):
+    try:
+        data = await request.json()
+        media_path = urllib.parse.unquote(data.get("path", "")).replace("\\", "/")
+        starred = bool(data.get("starred", True))
+
+        pm_output_dir = get_pm_output_dir()
+        if not media_path or not os.path.isfile(os.path.join(pm_output_dir, media_path)):
+            return web.Response(status=404, text="File not found")
+
+        index = get_media_index()
+        if not await asyncio.to_thread(index.set_starred, "output", media_path, starred):
+            # 尚未入索引的文件先补录
+            await asyncio.to_thread(index_file, index, "output", pm_output_dir, media_path)
+            await asyncio.to_thread(index.set_starred, "output", media_path, starred)
+
+        return web.json_response({"success": True, "path": media_path, "starred": starred})
+    except Exception as e:
+        logger.error(f"Star error: {e}")
+        return web.Response(status=500, text=str(e))
+
+
+async def get_pm_output_retention(request):
+    config = load_retention_config()
+    try:
+        projection = await asyncio.to_thread(
+            build_projection, "output", get_pm_output_dir(), config
+        )
+    except Exception as e:
+        logger.error(f"Retention projection error: {e}")
+        return web.Response(status=500, text=str(e))
+
+    planned = projection.pop("planned")
+    projection["sample"] = list(planned)[:50]
+    return web.json_response(
+        {
+            "config": config,
+            "status": get_retention_worker().status,
+            "projection": projection,
+            "index": get_sync_state("output"),
+        }
+    )
+
+
+async def save_pm_output_retention(request):
+    try:
+        data = await request.json()
+        config = save_retention_config(data)
+        return web.json_response({"success": True, "config": config})
+    except Exception as e:
+        logger.error(f"Save retention error: {e}")
+        return web.Response(status=400, text=str(e))
+
+
+async def run_pm_output_retention(request):
+    get_retention_worker().trigger()
+    return web.json_response({"success": True, "status": get_retention_worker().status})
+
+
+# ============ Similar Image APIs ============
+
+
+def _similarity_params(query):
+    kind = query.get("kind", "phash")
+    if kind not in HASH_KINDS:
+        kind = "phash"
+    distance = max(0, min(_int_query(query, "distance", 8), 32))
+    limit = max(1, min(_int_query(query, "limit", 100), MAX_SEARCH_LIMIT))
+    scope = query.get("scope", "all")
+    roots = None if scope == "all" else [scope]
+    return kind, distance, limit, roots
+
+
+async def get_pm_similar_media(request):
+    """查询参数: root (output/input), path, distance, kind (phash/dhash), scope (all/output/input)"""
+    query = request.rel_url.query
+    media_roots = get_media_roots()
+    root = query.get("root", "output")
+    if root not in media_roots:
+        return web.Response(status=400, text="Invalid root")
+    media_path = urllib.parse.unquote(query.get("path", "")).replace("\\", "/")
+    if not media_path or not os.path.isfile(os.path.join(media_roots[root], media_path)):
+        return web.Response(status=404, text="File not found")
+
+    kind, distance, limit, roots = _similarity_params(query)
+    schedule_hashing(media_roots)
+    try:
+        items = await asyncio.to_thread(
+            find_similar, root, media_roots[root], media_path, distance, kind, roots, limit
+        )
+    except Exception as e:
+        logger.error(f"Similar query error: {e}")
+        return web.Response(status=500, text=str(e))
+    if items is None:
+        return web.Response(status=400, text="Not a hashable image")
+
+    for item in items:
+        item["absolute_path"] = os.path.join(media_roots[item["root"]], item["path"])
+    return web.json_response({"items": items, "hashing": get_hash_state()})
+
+
+async def get_pm_duplicate_report(request):
+    """近似重复清理报告；查询参数: distance (默认 4), kind, scope, limit"""
+    query = request.rel_url.query
+    media_roots = get_media_roots()
+    kind, distance, limit, roots = _similarity_params(query)
+    if "distance" not in query:
+        distance = 4
+
+    schedule_hashing(media_roots)
+    try:
+        report = await asyncio.to_thread(duplicate_groups, distance, kind, roots, limit)
+    except Exception as e:
+        logger.error(f"Duplicate report error: {e}")
+        return web.Response(status=500, text=str(e))
+
+    for group in report["groups"]:
+        for item in group["files"]:
+            item["absolute_path"] = os.path.join(media_roots[item["root"]], item["path"])
+    report["hashing"] = get_hash_state()
+    return web.json_response(report)
+
+
+# ============ Media Probe APIs ============
+
+
+async def get_pm_media_probe(request):
+    return web.json_response({"probe": get_probe_state()})
+
+
+async def run_pm_media_probe(request):
+    started = schedule_probe(get_media_roots())
+    return web.json_response({"success": True, "started": started, "probe": get_probe_state()})
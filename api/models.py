@@ -12,6 +12,7 @@ from ..utils.helpers import (
     load_pm_metadata,
     has_models_or_subfolders,
 )
+from ..utils.video_previews import enqueue_video_previews, get_cached_previews
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +24,7 @@ def get_pm_models_dir():
 def scan_model_directory(base_dir, relative_path=""):
     current_dir = os.path.join(base_dir, relative_path) if relative_path else base_dir
     items = []
+    missing_video_previews = []
 
     if not os.path.exists(current_dir):
         return items
@@ -89,6 +91,15 @@ def scan_model_directory(base_dir, relative_path=""):
                         preview_ext = ext
                         break
 
+            # 视频预览的封面/雪碧图在后台生成，网格只需请求一张小图
+            has_video_poster = False
+            if preview_type == "video":
+                video_path = os.path.join(current_dir, f"{model_name}{preview_ext}")
+                poster, sprite = get_cached_previews(video_path)
+                has_video_poster = poster is not None and sprite is not None
+                if not has_video_poster:
+                    missing_video_previews.append(video_path)
+
             metadata = load_pm_metadata(current_dir, model_name)
             items.append(
                 {
@@ -99,11 +110,13 @@ def scan_model_directory(base_dir, relative_path=""):
                     "has_preview": has_preview,
                     "preview_type": preview_type,
                     "preview_ext": preview_ext,
+                    "has_video_poster": has_video_poster,
                     "title": metadata.get("title", ""),
                     "metadata": metadata,
                 }
             )
 
+    enqueue_video_previews(missing_video_previews)
     items.sort(key=lambda x: (0 if x["type"] == "folder" else 1, x["name"]))
     return items
 
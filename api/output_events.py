@@ -0,0 +1,136 @@
+import os
+import queue
+import logging
+import threading
+
+from .media import get_pm_output_dir
+from ..utils.media_index import MEDIA_EXTENSIONS, get_media_index, index_file, media_type
+from ..utils.media_probe import get_probe_info
+from ..utils.thumbnails import make_thumbnail
+from ..utils.video_previews import enqueue_video_previews
+
+logger = logging.getLogger(__name__)
+
+# 保存节点执行后 ("executed" 事件) 产生的输出文件，由后台线程写入索引和缩略图，
+# 这样输出浏览器和搜索索引无需重新扫描目录即可保持最新。
+
+_queue = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def collect_output_files(output):
+    """从 executed 事件的 output 中取出 type == "output" 的文件 (images / gifs / audio ...)"""
+    files = []
+    if not isinstance(output, dict):
+        return files
+    for values in output.values():
+        if not isinstance(values, list):
+            continue
+        for item in values:
+            if not isinstance(item, dict) or item.get("type") != "output":
+                continue
+            filename = item.get("filename")
+            if not filename:
+                continue
+            subfolder = item.get("subfolder") or ""
+            rel_path = f"{subfolder}/{filename}" if subfolder else filename
+            rel_path = rel_path.replace("\\", "/").strip("/")
+            if rel_path.lower().endswith(MEDIA_EXTENSIONS) and rel_path not in files:
+                files.append(rel_path)
+    return files
+
+
+def _process(rel_paths):
+    from server import PromptServer
+
+    base_dir = get_pm_output_dir()
+    index = get_media_index()
+    items = []
+
+    for rel_path in rel_paths:
+        full_path = os.path.join(base_dir, rel_path)
+        if not os.path.isfile(full_path):
+            continue
+        try:
+            index_file(index, "output", base_dir, rel_path)
+            mtime = os.path.getmtime(full_path)
+        except Exception as e:
+            logger.error(f"Index output error ({rel_path}): {e}")
+            continue
+
+        media = None
+        try:
+            media = get_probe_info("output", base_dir, rel_path)
+        except Exception as e:
+            logger.debug(f"Probe error ({rel_path}): {e}")
+
+        has_thumbnail = False
+        try:
+            has_thumbnail = make_thumbnail(full_path) is not None
+        except Exception as e:
+            logger.debug(f"Thumbnail error ({rel_path}): {e}")
+
+        items.append(
+            {
+                "type": media_type(rel_path),
+                "name": os.path.basename(rel_path),
+                "path": rel_path,
+                "folder": rel_path.rpartition("/")[0],
+                "absolute_path": full_path,
+                "has_thumbnail": has_thumbnail,
+                "mtime": mtime,
+                "media": media,
+            }
+        )
+
+    enqueue_video_previews(
+        [item["absolute_path"] for item in items if item["type"] == "video"]
+    )
+    if items:
+        PromptServer.instance.send_sync("pm_output.added", {"items": items})
+
+
+def _worker_loop():
+    while True:
+        rel_paths = _queue.get()
+        try:
+            _process(rel_paths)
+        except Exception as e:
+            logger.error(f"Output event worker error: {e}")
+        finally:
+            _queue.task_done()
+
+
+def enqueue_output_files(rel_paths):
+    global _worker
+    if not rel_paths:
+        return
+    with _worker_lock:
+        if _worker is None:
+            _worker = threading.Thread(target=_worker_loop, name="pm-output-events", daemon=True)
+            _worker.start()
+    _queue.put(list(rel_paths))
+
+
+def install_output_hook():
+    """包装 PromptServer.send_sync，在 executed 事件发出后把输出文件加入索引"""
+    from server import PromptServer
+
+    server_instance = PromptServer.instance
+    if getattr(server_instance, "_pm_output_hook_installed", False):
+        return
+
+    original_send_sync = server_instance.send_sync
+
+    def send_sync(event, data, sid=None):
+        original_send_sync(event, data, sid)
+        if event != "executed" or not isinstance(data, dict):
+            return
+        try:
+            enqueue_output_files(collect_output_files(data.get("output")))
+        except Exception as e:
+            logger.error(f"Output hook error: {e}")
+
+    server_instance.send_sync = send_sync
+    server_instance._pm_output_hook_installed = True
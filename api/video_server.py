@@ -1,25 +1,29 @@
 import os
-import re
+import math
 import asyncio
+import urllib.parse
 import subprocess
 import server
 import folder_paths
-import shutil
 
-ENCODE_ARGS = ("utf-8", "backslashreplace")
-
-query_cache = {}
-
-ffmpeg_path = None
-try:
-    from imageio_ffmpeg import get_ffmpeg_exe
-    ffmpeg_path = get_ffmpeg_exe()
-except:
-    system_ffmpeg = shutil.which("ffmpeg")
-    if system_ffmpeg is not None:
-        ffmpeg_path = system_ffmpeg
-    elif os.path.isfile("ffmpeg.exe"):
-        ffmpeg_path = os.path.abspath("ffmpeg.exe")
+from ..utils.ffmpeg import ffmpeg_path
+from ..utils.media_probe import get_probe_stats, probe_file, probe_videos
+from ..utils.encoder_bench import (
+    ensure_benchmark,
+    get_benchmark_state,
+    select_preview_profile,
+)
+from ..utils.probe_worker import keyframe_before
+from ..utils.video_frames import FRAME_FORMATS, extract_frame
+from ..utils.video_previews import make_video_previews
+from ..utils.transcode_scheduler import (
+    DISCONNECT_POLL_SECONDS, ClientGone, client_gone, get_transcode_scheduler,
+)
+from ..utils.transcode_cache import (
+    get_transcode_cache,
+    normalize_transcode_params,
+    transcode_name,
+)
 
 
 def is_safe_path(path, strict=False):
@@ -73,35 +77,23 @@ async def resolve_path(query):
     return file, filename, output_dir
 
 
-@server.PromptServer.instance.routes.get("/pm/viewvideo")
-async def pm_view_video(request):
-    query = request.rel_url.query
-    path_res = await resolve_path(query)
-    if isinstance(path_res, server.web.Response):
-        return path_res
-    file, filename, output_dir = path_res
+# 同一缓存键正在进行的转码：{cache_name: {"future": Future, "waiters": int}}
+transcodes_in_flight = {}
 
-    if ffmpeg_path is None:
-        if is_safe_path(output_dir, strict=True):
-            return server.web.FileResponse(path=file)
 
+# 探测不到帧率时使用的源帧率
+DEFAULT_SOURCE_FPS = 30
+
+
+def source_input_args(file, probe):
+    """输入参数；vp9 源强制使用 libvpx 解码以保留透明通道"""
     in_args = ["-i", file]
+    if probe.get('codec') == 'vp9':
+        in_args = ['-c:v', 'libvpx-vp9'] + in_args
+    return in_args
 
-    base_fps = 30
-    try:
-        proc = await asyncio.create_subprocess_exec(ffmpeg_path, *in_args, '-t',
-                                   '0', '-f', 'null', '-', stdout=subprocess.PIPE,
-                                    stderr=subprocess.PIPE, stdin=subprocess.DEVNULL)
-        _, res_stderr = await proc.communicate()
-
-        match = re.search(': Video: (\\w+) .+, (\\d+) fps,', res_stderr.decode(*ENCODE_ARGS))
-        if match:
-            base_fps = float(match.group(2))
-            if match.group(1) == 'vp9':
-                in_args = ['-c:v', 'libvpx-vp9'] + in_args
-    except subprocess.CalledProcessError:
-        pass
 
+def build_transcode_args(in_args, base_fps, query, profile=None, audio=True):
     vfilters = []
     target_rate = float(query.get('force_rate', 0)) or base_fps
     modified_rate = target_rate / (float(query.get('select_every_nth', 1)) or 1)
@@ -141,68 +133,451 @@ async def pm_view_video(request):
     if float(query.get('frame_load_cap', 0)) > 0:
         args += ["-frames:v", query['frame_load_cap'].split('.')[0]]
 
-    args += ['-c:v', 'libvpx-vp9', '-deadline', 'realtime', '-cpu-used', '8', '-f', 'webm', '-']
+    if not audio:
+        args += ['-an']
+    profile = profile or select_preview_profile(None)[1]
+    args += profile['args'] + ['-f', profile['format'], '-']
+    return args
+
 
+def remove_temp(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+async def stream_and_cache(request, args, filename, cache_name, entry, content_type='video/webm'):
+    """
+    把 ffmpeg 输出同时写给客户端和缓存临时文件；完整结束后移入缓存
+    客户端断开时 (每个数据块之间检查)，若还有其他请求在等待同一结果则继续编码，否则立即终止
+    """
+    cache = get_transcode_cache()
+    temp_path = cache.temp_path(cache_name)
+    cached = None
+    resp = server.web.StreamResponse()
+    resp.content_type = content_type
+    resp.headers["Content-Disposition"] = f'filename="{filename}"'
     try:
         proc = await asyncio.create_subprocess_exec(*args, stdout=subprocess.PIPE,
                                                     stdin=subprocess.DEVNULL)
+    except BrokenPipeError:
+        return resp, None
+
+    gone = False
+    killed = False
+    try:
+        # 缓存文件的写入、移入缓存 (可能触发淘汰) 和删除都在线程中进行，不阻塞事件循环
+        f = await asyncio.to_thread(open, temp_path, "wb")
         try:
-            resp = server.web.StreamResponse()
-            resp.content_type = 'video/webm'
-            resp.headers["Content-Disposition"] = f'filename="{filename}"'
-            await resp.prepare(request)
+            try:
+                await resp.prepare(request)
+            except (ConnectionResetError, ConnectionError):
+                gone = True
             while len(bytes_read := await proc.stdout.read(2**20)) != 0:
-                await resp.write(bytes_read)
-            await proc.wait()
-        except (ConnectionResetError, ConnectionError):
+                await asyncio.to_thread(f.write, bytes_read)
+                if not gone:
+                    try:
+                        await resp.write(bytes_read)
+                    except (ConnectionResetError, ConnectionError):
+                        gone = True
+                    gone = gone or client_gone(request)
+                if gone and entry["waiters"] == 0:
+                    proc.kill()
+                    killed = True
+                    get_transcode_scheduler().metrics["killed_on_disconnect"] += 1
+                    break
+        finally:
+            await asyncio.to_thread(f.close)
+        returncode = await proc.wait()
+        if returncode == 0 and not killed:
+            cached = await asyncio.to_thread(cache.put, cache_name, temp_path)
+    finally:
+        if proc.returncode is None:
             proc.kill()
-    except BrokenPipeError:
-        pass
-    return resp
+        if cached is None:
+            await asyncio.to_thread(remove_temp, temp_path)
+    return resp, cached
+
+
+# 浏览器可直接播放的 (容器, 视频编码, 音频编码) 组合
+PASSTHROUGH_FORMATS = {
+    ".mp4": ({"h264", "vp9", "av1"}, {"aac", "mp3", "opus"}, "mp4"),
+    ".m4v": ({"h264", "vp9", "av1"}, {"aac", "mp3", "opus"}, "mp4"),
+    ".webm": ({"vp8", "vp9", "av1"}, {"opus", "vorbis"}, "webm"),
+}
+BROWSER_PIX_FMTS = ("yuv420p", "yuvj420p", "yuva420p")
+
+
+def size_is_noop(force_size, probe):
+    """force_size 只缩小不放大：源尺寸已不超过目标时等同于不缩放"""
+    if force_size == "Disabled":
+        return True
+    width, height = (force_size.split('x') + ['?'])[:2]
+    if width != '?' and height != '?':
+        # 固定宽高比需要裁剪
+        return False
+    try:
+        if width != '?':
+            return probe['width'] <= float(width)
+        if height != '?':
+            return probe['height'] <= float(height)
+    except (KeyError, TypeError, ValueError):
+        return False
+    return True
+
+
+def plan_preview(file, probe, params):
+    """
+    决定预览方式，返回 (mode, start, duration)
+      passthrough  源文件可直接播放且无需任何处理
+      copy         只需裁剪时间范围，可用 -c copy (调用方还需确认起点落在关键帧上)
+      transcode    需要改帧率、缩放或源格式浏览器不支持
+    """
+    ext = os.path.splitext(file)[1].lower()
+    formats = PASSTHROUGH_FORMATS.get(ext)
+    fps = probe.get('fps')
+    if (
+        formats is None
+        or probe.get('type') != 'video'
+        or not fps
+        or probe.get('codec') not in formats[0]
+        or probe.get('pix_fmt') not in BROWSER_PIX_FMTS
+        or (probe.get('audio_codec') and probe['audio_codec'] not in formats[1])
+    ):
+        return 'transcode', 0, None
+    if params['force_rate'] and abs(params['force_rate'] - fps) > 1e-3:
+        return 'transcode', 0, None
+    if params['select_every_nth'] != 1 or not size_is_noop(params['force_size'], probe):
+        return 'transcode', 0, None
+
+    start = params.get('start_time', params['skip_first_frames'] / fps)
+    cap = params['frame_load_cap']
+    if start <= 0 and (not cap or cap >= probe.get('frames', 0)):
+        return 'passthrough', 0, None
+    return 'copy', max(0.0, start), cap / fps if cap else None
+
+
+def build_copy_args(file, start, duration, container):
+    args = [ffmpeg_path, "-v", "error"]
+    if start > 0:
+        args += ['-ss', str(start)]
+    args += ['-i', file]
+    if duration:
+        args += ['-t', str(duration)]
+    args += ['-map', '0:v:0', '-map', '0:a:0?', '-c', 'copy', '-avoid_negative_ts', 'make_zero']
+    if container == 'mp4':
+        # 写入管道需要分片 mp4
+        args += ['-movflags', 'frag_keyframe+empty_moov+default_base_moof']
+    return args + ['-f', container, '-']
+
+
+async def get_video_probe(filepath):
+    """
+    完整探测信息 (编码、像素格式、帧率...)；input/output 下的文件结果缓存在媒体索引 (SQLite) 中，
+    只读文件头，不解码首帧
+    """
+    return await asyncio.to_thread(probe_file, filepath, probe_roots()) or {}
 
 
-@server.PromptServer.instance.routes.get("/pm/queryvideo")
-async def pm_query_video(request):
+@server.PromptServer.instance.routes.get("/pm/viewvideo")
+async def pm_view_video(request):
     query = request.rel_url.query
     path_res = await resolve_path(query)
     if isinstance(path_res, server.web.Response):
         return path_res
-    filepath = path_res[0]
+    file, filename, output_dir = path_res
 
-    if filepath.endswith(".webp"):
-        return server.web.json_response({})
+    if ffmpeg_path is None:
+        if is_safe_path(output_dir, strict=True):
+            return server.web.FileResponse(path=file)
 
-    if filepath in query_cache and query_cache[filepath][0] == os.stat(filepath).st_mtime:
-        source = query_cache[filepath][1]
+    params = normalize_transcode_params(query)
+    probe = await get_video_probe(file)
+    mode, start, duration = plan_preview(file, probe, params)
+    if mode == 'passthrough':
+        return server.web.FileResponse(file)
+    if mode == 'copy':
+        # 输入端 -ss 配合 -c copy 会从之前最近的关键帧开始，起点必须正好是关键帧
+        keyframe = await asyncio.to_thread(keyframe_before, file, start)
+        if keyframe is None or start - keyframe > 0.5 / probe['fps']:
+            mode = 'transcode'
+
+    cache = get_transcode_cache()
+    if mode == 'copy':
+        container = PASSTHROUGH_FORMATS[os.path.splitext(file)[1].lower()][2]
+        cache_name = transcode_name(file, {**params, "mode": "copy"}, container)
     else:
-        source = {}
+        # 编码方案由启动基准选出；带透明通道的源只用支持 alpha 的方案
+        profile_name, profile = select_preview_profile(ffmpeg_path, probe.get('alpha', False))
+        cache_name = transcode_name(file, {**params, "profile": profile_name}, profile['format'])
+    cached = cache.get(cache_name)
+    if cached is None and cache_name in transcodes_in_flight:
+        # 相同参数的首次编码正在进行：等它完成后直接读取缓存，不重复编码
+        entry = transcodes_in_flight[cache_name]
+        entry["waiters"] += 1
         try:
-            import av
-            with av.open(filepath) as cont:
-                stream = cont.streams.video[0]
-                source['fps'] = float(stream.average_rate)
-                source['duration'] = float(cont.duration / av.time_base)
-
-                if stream.codec_context.name == 'vp9':
-                    cc = av.Codec('libvpx-vp9', 'r').create()
-                else:
-                    cc = stream
-
-                def fit():
-                    for packet in cont.demux(video=0):
-                        yield from cc.decode(packet)
-                frame = next(fit())
-
-                source['size'] = [frame.width, frame.height]
-                source['alpha'] = 'a' in frame.format.name
-                source['frames'] = stream.metadata.get('NUMBER_OF_FRAMES', round(source['duration'] * source['fps']))
-                query_cache[filepath] = (os.stat(filepath).st_mtime, source)
-        except Exception:
-            pass
+            cached = await asyncio.shield(entry["future"])
+        finally:
+            entry["waiters"] -= 1
+    if cached is not None:
+        return server.web.FileResponse(
+            cached, headers={"Content-Disposition": f'filename="{filename}"'}
+        )
+
+    entry = {"future": asyncio.get_running_loop().create_future(), "waiters": 0}
+    transcodes_in_flight[cache_name] = entry
+    cached = None
+    try:
+        if mode == 'copy':
+            # 流复制几乎不占 CPU，不经过转码调度
+            args = build_copy_args(file, start, duration, container)
+            resp, cached = await stream_and_cache(
+                request, args, filename, cache_name, entry, f'video/{container}'
+            )
+        else:
+            # 帧率和编码来自已缓存的探测结果，不再单独启动 ffmpeg
+            args = build_transcode_args(source_input_args(file, probe),
+                                        probe.get('fps') or DEFAULT_SOURCE_FPS, query, profile)
+            async with get_transcode_scheduler().slot(request):
+                resp, cached = await stream_and_cache(
+                    request, args, filename, cache_name, entry, profile['mime']
+                )
+    except ClientGone:
+        resp = server.web.Response(status=503, text="Client disconnected")
+    finally:
+        if transcodes_in_flight.get(cache_name) is entry:
+            del transcodes_in_flight[cache_name]
+        entry["future"].set_result(cached)
+    return resp
 
-    if not 'frames' in source:
-        return server.web.json_response({})
 
+# ============ Segmented Preview ============
+
+SEGMENT_SECONDS = 4
+SEGMENT_PREFETCH = 1
+
+prefetch_tasks = set()
+
+
+def segment_layout(probe, params):
+    """按输出帧数切分：每段固定帧数，段与段首尾相接，拼起来与完整预览逐帧一致"""
+    fps = probe.get('fps')
+    duration = probe.get('duration')
+    if not fps or not duration:
+        return None
+    target_rate = params['force_rate'] or fps
+    out_fps = target_rate / params['select_every_nth']
+    start = params.get('start_time', params['skip_first_frames'] / target_rate)
+    frames = max(0, int((duration - start) * out_fps))
+    if params['frame_load_cap']:
+        frames = min(frames, params['frame_load_cap'])
+    segment_frames = max(1, round(SEGMENT_SECONDS * out_fps))
+    return {
+        "fps": out_fps,
+        "start": start,
+        "frames": frames,
+        "segment_frames": segment_frames,
+        "count": math.ceil(frames / segment_frames),
+    }
+
+
+def segment_query(params, layout, index):
+    first = index * layout["segment_frames"]
+    return {
+        "force_rate": str(params['force_rate']),
+        "select_every_nth": str(params['select_every_nth']),
+        "force_size": params['force_size'],
+        "start_time": str(layout["start"] + first / layout["fps"]),
+        "frame_load_cap": str(min(layout["segment_frames"], layout["frames"] - first)),
+    }
+
+
+async def run_encode(cache_name, args):
+    """实际的编码任务，不绑定任何请求；是否放弃由 encode_to_cache 的等待者计数决定"""
+    cache = get_transcode_cache()
+    temp_path = cache.temp_path(cache_name)
+    cached = None
+    try:
+        async with get_transcode_scheduler().slot(None):
+            proc = await asyncio.create_subprocess_exec(*args[:-1], temp_path,
+                                                        stdin=subprocess.DEVNULL)
+            try:
+                returncode = await proc.wait()
+            finally:
+                if proc.returncode is None:
+                    proc.kill()
+                    get_transcode_scheduler().metrics["killed_on_disconnect"] += 1
+            if returncode == 0:
+                cached = await asyncio.to_thread(cache.put, cache_name, temp_path)
+    finally:
+        if cached is None:
+            await asyncio.to_thread(remove_temp, temp_path)
+    return cached
+
+
+async def encode_to_cache(cache_name, args, request=None):
+    """
+    编码到缓存文件 (不经管道)，同一 cache_name 只编码一次
+    request 为 None 表示后台预取。编码在独立任务中进行，任何一个请求断开都不影响其他等待者；
+    只有前台发起的编码在所有等待者都断开后才终止
+    """
+    cache = get_transcode_cache()
+    cached = cache.get(cache_name)
+    if cached is not None:
+        return cached
+    entry = transcodes_in_flight.get(cache_name)
+    if entry is None:
+        task = asyncio.create_task(run_encode(cache_name, args))
+        entry = {"future": task, "waiters": 0, "background": request is None}
+        transcodes_in_flight[cache_name] = entry
+
+        def finished(_task, entry=entry):
+            if transcodes_in_flight.get(cache_name) is entry:
+                del transcodes_in_flight[cache_name]
+        task.add_done_callback(finished)
+    task = entry["future"]
+
+    entry["waiters"] += 1
+    try:
+        while True:
+            try:
+                return await asyncio.wait_for(asyncio.shield(task), DISCONNECT_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                if client_gone(request):
+                    raise ClientGone()
+    finally:
+        entry["waiters"] -= 1
+        if entry["waiters"] == 0 and not entry["background"] and not task.done():
+            # 没有人再需要这个结果：终止编码，之后的同名请求重新开始
+            if transcodes_in_flight.get(cache_name) is entry:
+                del transcodes_in_flight[cache_name]
+            task.cancel()
+
+
+def segment_job(file, probe, params, layout, index):
+    profile_name, profile = select_preview_profile(ffmpeg_path, probe.get('alpha', False))
+    # 分段只有视频流，前端按 playlist 中的 codecs 用 MediaSource 拼接播放
+    args = build_transcode_args(
+        source_input_args(file, probe), probe['fps'], segment_query(params, layout, index), profile,
+        audio=False
+    )
+    cache_name = transcode_name(
+        file,
+        {**params, "segment": index, "segment_frames": layout["segment_frames"],
+         "profile": profile_name, "audio": False},
+        profile['format'],
+    )
+    return cache_name, args
+
+
+def prefetch_segments(file, probe, params, layout, index):
+    """只在调度器空闲时预取播放头之后的分段，不与前台请求争抢 CPU"""
+    scheduler = get_transcode_scheduler()
+    for next_index in range(index + 1, min(layout["count"], index + 1 + SEGMENT_PREFETCH)):
+        if not scheduler.has_capacity():
+            return
+        cache_name, args = segment_job(file, probe, params, layout, next_index)
+        if get_transcode_cache().get(cache_name) or cache_name in transcodes_in_flight:
+            continue
+        task = asyncio.create_task(encode_to_cache(cache_name, args))
+        prefetch_tasks.add(task)
+        task.add_done_callback(prefetch_tasks.discard)
+
+
+async def resolve_segmented(request):
+    query = request.rel_url.query
+    path_res = await resolve_path(query)
+    if isinstance(path_res, server.web.Response):
+        return path_res
+    file = path_res[0]
+    if ffmpeg_path is None:
+        return server.web.Response(status=501, text="ffmpeg not available")
+    probe = await get_video_probe(file)
+    params = normalize_transcode_params(query)
+    layout = segment_layout(probe, params) if probe.get('type') == 'video' else None
+    if layout is None:
+        return server.web.Response(status=415, text="Not a seekable video")
+    return file, probe, params, layout
+
+
+@server.PromptServer.instance.routes.get("/pm/viewvideo/playlist")
+async def pm_view_video_playlist(request):
+    """分段预览的播放列表；参数与 /pm/viewvideo 相同"""
+    resolved = await resolve_segmented(request)
+    if isinstance(resolved, server.web.Response):
+        return resolved
+    _, probe, _, layout = resolved
+    _, profile = select_preview_profile(ffmpeg_path, probe.get('alpha', False))
+
+    base_query = {k: v for k, v in request.rel_url.query.items() if k != 'timestamp'}
+    segments = []
+    for index in range(layout["count"]):
+        first = index * layout["segment_frames"]
+        frames = min(layout["segment_frames"], layout["frames"] - first)
+        segments.append({
+            "index": index,
+            "start": first / layout["fps"],
+            "duration": frames / layout["fps"],
+            "frames": frames,
+            "url": "/pm/viewvideo/segment?" + urllib.parse.urlencode({**base_query, "index": index}),
+        })
+    return server.web.json_response({
+        "fps": layout["fps"],
+        "frames": layout["frames"],
+        "duration": layout["frames"] / layout["fps"],
+        "segment_seconds": SEGMENT_SECONDS,
+        "mime": profile['mime'],
+        "codecs": profile['codecs'],
+        "segments": segments,
+    })
+
+
+@server.PromptServer.instance.routes.get("/pm/viewvideo/segment")
+async def pm_view_video_segment(request):
+    """按需编码单个分段 (缓存)，并在空闲时预取下一段"""
+    resolved = await resolve_segmented(request)
+    if isinstance(resolved, server.web.Response):
+        return resolved
+    file, probe, params, layout = resolved
+    try:
+        index = int(request.rel_url.query.get('index', 0))
+    except ValueError:
+        return server.web.Response(status=400, text="Invalid index")
+    if not 0 <= index < layout["count"]:
+        return server.web.Response(status=404, text="Segment out of range")
+
+    cache_name, args = segment_job(file, probe, params, layout, index)
+    try:
+        cached = await encode_to_cache(cache_name, args, request)
+    except ClientGone:
+        return server.web.Response(status=503, text="Client disconnected")
+    if cached is None:
+        return server.web.Response(status=500, text="Segment encode failed")
+
+    prefetch_segments(file, probe, params, layout, index)
+    return server.web.FileResponse(cached, headers={"Cache-Control": "max-age=86400"})
+
+
+def probe_roots():
+    return {
+        "output": folder_paths.get_output_directory(),
+        "input": folder_paths.get_input_directory(),
+    }
+
+
+def source_from_probe(probe):
+    source = {}
+    if probe and probe.get('type') == 'video' and probe.get('frames'):
+        source['fps'] = probe.get('fps', 1)
+        source['duration'] = probe.get('duration', 0)
+        source['size'] = [probe['width'], probe['height']]
+        source['alpha'] = probe.get('alpha', False)
+        source['frames'] = probe['frames']
+    return source
+
+
+def loaded_info(source, query):
     loaded = {}
     loaded['duration'] = source['duration']
     loaded['duration'] -= float(query.get('start_time', 0))
@@ -210,4 +585,140 @@ async def pm_query_video(request):
     loaded['duration'] -= int(query.get('skip_first_frames', 0)) / loaded['fps']
     loaded['fps'] /= int(query.get('select_every_nth', 1)) or 1
     loaded['frames'] = round(loaded['duration'] * loaded['fps'])
-    return server.web.json_response({'source': source, 'loaded': loaded})
+    return loaded
+
+
+@server.PromptServer.instance.routes.get("/pm/queryvideo")
+async def pm_query_video(request):
+    query = request.rel_url.query
+    path_res = await resolve_path(query)
+    if isinstance(path_res, server.web.Response):
+        return path_res
+    filepath = path_res[0]
+
+    if filepath.endswith(".webp"):
+        return server.web.json_response({})
+
+    source = source_from_probe(await get_video_probe(filepath))
+    if not 'frames' in source:
+        return server.web.json_response({})
+
+    return server.web.json_response({'source': source, 'loaded': loaded_info(source, query)})
+
+
+@server.PromptServer.instance.routes.post("/pm/queryvideo/batch")
+async def pm_query_video_batch(request):
+    """
+    请求体: {"paths": [绝对路径...], "force_rate", "skip_first_frames", "select_every_nth", "start_time"}
+    返回: {"results": {path: {"source", "loaded"} 或 {}}}
+    """
+    try:
+        data = await request.json()
+    except Exception:
+        return server.web.Response(status=400, text="Invalid JSON")
+    paths = data.get("paths")
+    if not isinstance(paths, list):
+        return server.web.Response(status=400, text="Missing paths")
+
+    results = {}
+    pending = []
+    for filepath in dict.fromkeys(p for p in paths if isinstance(p, str)):
+        results[filepath] = {}
+        if not filepath.endswith(".webp"):
+            pending.append(filepath)
+
+    # 索引命中直接返回，其余在进程池中探测；不存在的文件得到空结果
+    if pending:
+        probes = await probe_videos(pending, probe_roots())
+        for filepath in pending:
+            source = source_from_probe(probes.get(filepath))
+            if source:
+                results[filepath] = {'source': source}
+
+    for entry in results.values():
+        if 'source' in entry:
+            entry['loaded'] = loaded_info(entry['source'], data)
+    return server.web.json_response({'results': results})
+
+
+@server.PromptServer.instance.routes.get("/pm/queryvideo/stats")
+async def pm_query_video_stats(request):
+    return server.web.json_response(get_probe_stats())
+
+
+@server.PromptServer.instance.routes.get("/pm/viewvideo/stats")
+async def pm_view_video_stats(request):
+    return server.web.json_response(
+        {
+            "scheduler": get_transcode_scheduler().stats(),
+            "cache": get_transcode_cache().stats(),
+            "in_flight": len(transcodes_in_flight),
+        }
+    )
+
+
+@server.PromptServer.instance.routes.get("/pm/viewvideo/encoders")
+async def pm_view_video_encoders(request):
+    """预览编码器基准结果 (每核帧率) 与当前选用的方案"""
+    if ffmpeg_path is not None:
+        ensure_benchmark(ffmpeg_path)
+    return server.web.json_response({"ffmpeg_path": ffmpeg_path, **get_benchmark_state()})
+
+
+@server.PromptServer.instance.routes.post("/pm/viewvideo/encoders")
+async def pm_view_video_encoders_rerun(request):
+    if ffmpeg_path is None:
+        return server.web.Response(status=501, text="ffmpeg not available")
+    started = ensure_benchmark(ffmpeg_path, force=True)
+    return server.web.json_response({"started": started, **get_benchmark_state()})
+
+
+@server.PromptServer.instance.routes.get("/pm/videopreview")
+async def pm_video_preview(request):
+    """
+    视频封面 / 悬停预览雪碧图；kind = poster | sprite | info
+    info 返回雪碧图布局 (每格宽高、对应时间点)，前端按鼠标位置偏移 background-position 即可
+    """
+    query = request.rel_url.query
+    path_res = await resolve_path(query)
+    if isinstance(path_res, server.web.Response):
+        return path_res
+    file = path_res[0]
+    kind = query.get('kind', 'poster')
+    if kind not in ('poster', 'sprite', 'info'):
+        return server.web.Response(status=400, text="Invalid kind")
+
+    try:
+        poster, sprite, layout = await asyncio.to_thread(make_video_previews, file)
+    except Exception as e:
+        return server.web.Response(status=415, text=str(e))
+
+    if kind == 'info':
+        return server.web.json_response(layout)
+    return server.web.FileResponse(
+        poster if kind == 'poster' else sprite, headers={"Cache-Control": "max-age=86400"}
+    )
+
+
+@server.PromptServer.instance.routes.get("/pm/videoframe")
+async def pm_video_frame(request):
+    """单帧提取：?path=&t=秒&size=最长边&format=jpeg|webp，结果缓存"""
+    query = request.rel_url.query
+    path_res = await resolve_path(query)
+    if isinstance(path_res, server.web.Response):
+        return path_res
+    file = path_res[0]
+    try:
+        t = float(query.get('t', 0))
+        size = max(0, min(int(query.get('size', 0)), 4096))
+    except ValueError:
+        return server.web.Response(status=400, text="Invalid t or size")
+    fmt = query.get('format', 'jpeg')
+    if fmt not in FRAME_FORMATS:
+        return server.web.Response(status=400, text="Invalid format")
+
+    try:
+        frame_path = await asyncio.to_thread(extract_frame, file, t, size, fmt)
+    except Exception as e:
+        return server.web.Response(status=415, text=str(e))
+    return server.web.FileResponse(frame_path, headers={"Cache-Control": "max-age=86400"})
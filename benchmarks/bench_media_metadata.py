@@ -0,0 +1,125 @@
+"""
+对比 PIL 路径与 chunk 级元数据读取器的耗时
+
+用法: python benchmarks/bench_media_metadata.py [图片或目录 ...]
+不传参数时会生成几张带 prompt/workflow 的大尺寸测试图片 (需要 Pillow)。
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import importlib.util
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_reader():
+    # 直接按路径加载，避免导入依赖 ComfyUI 的 utils 包
+    path = os.path.join(REPO_DIR, "utils", "media_metadata.py")
+    spec = importlib.util.spec_from_file_location("pm_media_metadata", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.read_media_metadata
+
+
+def pil_read(path):
+    from PIL import Image
+
+    # 与 read_media_metadata 做相同的工作：PNG 文本块和 EXIF 中的 "key:value" 字段，
+    # prompt/workflow 解析为 JSON，保证两边的对比公平
+    def store(result, key, value):
+        if key in ("prompt", "workflow"):
+            try:
+                result[key] = json.loads(value)
+            except (TypeError, ValueError):
+                result[key] = value
+        else:
+            result["text"][key] = value
+
+    with Image.open(path) as img:
+        result = {"width": img.width, "height": img.height, "prompt": None, "workflow": None, "text": {}}
+        for key, value in img.info.items():
+            if isinstance(value, str):
+                store(result, key, value)
+        for value in img.getexif().values():
+            if isinstance(value, bytes):
+                value = value.decode("utf-8", "replace")
+            if not isinstance(value, str):
+                continue
+            key, sep, rest = value.rstrip("\x00").partition(":")
+            if sep and key and " " not in key:
+                store(result, key, rest)
+        return result
+
+
+def make_samples(target_dir):
+    import numpy as np
+    from PIL import Image, PngImagePlugin
+
+    prompt = json.dumps({str(i): {"class_type": "KSampler", "inputs": {"seed": i}} for i in range(200)})
+    workflow = json.dumps({"nodes": [{"id": i} for i in range(500)]})
+    pixels = (np.random.rand(2048, 2048, 3) * 255).astype("uint8")
+    img = Image.fromarray(pixels)
+
+    pnginfo = PngImagePlugin.PngInfo()
+    pnginfo.add_text("prompt", prompt)
+    pnginfo.add_text("workflow", workflow)
+    png_path = os.path.join(target_dir, "sample.png")
+    img.save(png_path, pnginfo=pnginfo, compress_level=1)
+
+    exif = img.getexif()
+    exif[0x0110] = "prompt:" + prompt
+    exif[0x010F] = "workflow:" + workflow
+    webp_path = os.path.join(target_dir, "sample.webp")
+    img.save(webp_path, exif=exif, quality=90)
+    jpg_path = os.path.join(target_dir, "sample.jpg")
+    img.save(jpg_path, exif=exif, quality=95)
+    return [png_path, webp_path, jpg_path]
+
+
+def collect(paths):
+    exts = (".png", ".jpg", ".jpeg", ".webp")
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in files:
+                    if name.lower().endswith(exts):
+                        yield os.path.join(root, name)
+        elif path.lower().endswith(exts):
+            yield path
+
+
+def bench(fn, paths, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for path in paths:
+            fn(path)
+    return (time.perf_counter() - start) / (repeat * len(paths))
+
+
+def main():
+    read_media_metadata = load_reader()
+    tmp = None
+    if len(sys.argv) > 1:
+        paths = list(collect(sys.argv[1:]))
+    else:
+        tmp = tempfile.TemporaryDirectory()
+        paths = make_samples(tmp.name)
+
+    for path in paths:
+        size_mb = os.path.getsize(path) / 2**20
+        pil_time = bench(pil_read, [path], 20)
+        chunk_time = bench(read_media_metadata, [path], 20)
+        print(
+            f"{os.path.basename(path):30s} {size_mb:8.2f} MB  "
+            f"PIL {pil_time * 1000:9.2f} ms  chunk {chunk_time * 1000:8.2f} ms  "
+            f"x{pil_time / max(chunk_time, 1e-9):.1f}"
+        )
+
+    if tmp is not None:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+对比 PMLoadVideo 各帧生成器 (OpenCV 串行 / OpenCV 多线程流水线 / ffmpeg rawvideo 管道)
+以及各缩放方法 (float lanczos / 解码阶段 uint8 缩放) 的加载耗时与输出差异
+
+用法: python benchmarks/bench_video_loader.py --comfy /path/to/ComfyUI [视频 ...]
+需要在 ComfyUI 的 Python 环境中运行 (torch / cv2 / comfy.utils)。
+不传视频时会用 ffmpeg 的 testsrc2 生成一段 1080p 测试片段。
+"""
+import os
+import sys
+import time
+import types
+import argparse
+import functools
+import tempfile
+import importlib
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE_NAME = "pm_manager_bench"
+
+CASES = [
+    ("full", {}),
+    ("resize 512", {"custom_width": 512}),
+    ("resize 512 area", {"custom_width": 512, "resize_method": "area"}),
+    ("resize 512 bilinear", {"custom_width": 512, "resize_method": "bilinear"}),
+    ("skip 150 cap 60", {"skip_first_frames": 150, "frame_load_cap": 60}),
+    ("rate 8 nth 2", {"force_rate": 8, "select_every_nth": 2}),
+]
+
+
+def load_video_loader(comfy_dir):
+    # 注册一个不执行根 __init__ 的包对象，节点模块内的相对导入 (..utils) 照常解析，
+    # 又不会启动 PromptServer 路由
+    sys.path.insert(0, comfy_dir)
+    package = types.ModuleType(PACKAGE_NAME)
+    package.__path__ = [REPO_DIR]
+    sys.modules[PACKAGE_NAME] = package
+    return importlib.import_module(f"{PACKAGE_NAME}.Node.video_loader")
+
+
+def make_sample(ffmpeg_path, target_dir):
+    path = os.path.join(target_dir, "sample.mp4")
+    subprocess.run(
+        [ffmpeg_path, "-v", "error", "-f", "lavfi", "-i", "testsrc2=size=1920x1080:rate=30:duration=10",
+         "-c:v", "libx264", "-preset", "veryfast", "-g", "60", "-pix_fmt", "yuv420p", path],
+        check=True,
+    )
+    return path
+
+
+def run(vl, video, generator, params):
+    kwargs = {
+        "video": video,
+        "force_rate": 0,
+        "custom_width": 0,
+        "custom_height": 0,
+        "frame_load_cap": 0,
+        "skip_first_frames": 0,
+        "select_every_nth": 1,
+    }
+    kwargs.update(params)
+    start = time.perf_counter()
+    images = vl.load_video(generator=generator, **kwargs)[0]
+    return images, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--comfy", required=True, help="ComfyUI 根目录")
+    parser.add_argument("videos", nargs="*")
+    args = parser.parse_args()
+
+    vl = load_video_loader(args.comfy)
+    generators = {
+        "opencv": functools.partial(vl.resized_cv_frame_gen, pipeline=False),
+        "pipeline": vl.resized_cv_frame_gen,
+    }
+    if vl.ffmpeg_path is not None:
+        generators["ffmpeg"] = vl.ffmpeg_frame_gen
+
+    tmp = None
+    videos = args.videos
+    if not videos:
+        if vl.ffmpeg_path is None:
+            sys.exit("ffmpeg not found; pass a video file instead")
+        tmp = tempfile.TemporaryDirectory()
+        videos = [make_sample(vl.ffmpeg_path, tmp.name)]
+
+    for video in videos:
+        print(os.path.basename(video))
+        reference = {}
+        for case, params in CASES:
+            # 解码阶段缩放的结果与 lanczos 路径比较，差异即插值方法本身带来的差别
+            baseline = reference.get(params.get("custom_width")) if "resize_method" in params else None
+            for name, generator in generators.items():
+                images, elapsed = run(vl, video, generator, params)
+                line = (f"  {case:20s} {name:8s} {elapsed * 1000:9.1f} ms  "
+                        f"{len(images):5d} frames {tuple(images.shape[1:])}")
+                if baseline is None:
+                    baseline = images
+                    if "resize_method" not in params:
+                        reference[params.get("custom_width")] = images
+                elif baseline.shape == images.shape:
+                    line += f"  max diff {(baseline - images).abs().max().item():.4f}"
+                else:
+                    line += f"  shape differs from {tuple(baseline.shape)}"
+                print(line)
+
+    if tmp is not None:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+对比 PMLoadVideo 各输出精度 (output_dtype) 的加载耗时和内存占用
+
+用法: python benchmarks/bench_video_precision.py --comfy /path/to/ComfyUI [视频 ...]
+需要在 ComfyUI 的 Python 环境中运行；不传视频时生成 1080p 测试片段 (见 bench_video_loader.py)。
+每种精度在独立子进程中运行，峰值 RSS 互不影响 (依赖 resource 模块，仅限 Linux/macOS)。
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+from bench_video_loader import load_video_loader, make_sample
+
+DTYPES = ["float32", "float16", "bfloat16", "uint8"]
+
+
+def measure(comfy_dir, video, output_dtype):
+    import resource
+    import torch
+
+    vl = load_video_loader(comfy_dir)
+    start = time.perf_counter()
+    images = vl.load_video(
+        video=video, force_rate=0, custom_width=0, custom_height=0, frame_load_cap=0,
+        skip_first_frames=0, select_every_nth=1, output_dtype=output_dtype,
+    )[0]
+    load_time = time.perf_counter() - start
+    # 再计时一次按批转换为 float32 [0, 1] 的开销 (下游节点使用时的代价)
+    start = time.perf_counter()
+    for i in range(0, len(images), 16):
+        batch = images[i:i + 16].float()
+        if images.dtype == torch.uint8:
+            batch.div_(255)
+        batch.mean()
+    use_time = time.perf_counter() - start
+    tensor_bytes = images.numel() * images.element_size()
+    # Linux 上 ru_maxrss 以 KB 为单位
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return {
+        "frames": len(images),
+        "load_s": load_time,
+        "use_s": use_time,
+        "tensor_mb": tensor_bytes / 2**20,
+        "peak_rss_mb": peak_rss / 2**20,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--comfy", required=True, help="ComfyUI 根目录")
+    parser.add_argument("--child", nargs=2, metavar=("VIDEO", "DTYPE"), help=argparse.SUPPRESS)
+    parser.add_argument("videos", nargs="*")
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.comfy, *args.child)))
+        return
+
+    tmp = None
+    videos = args.videos
+    if not videos:
+        vl = load_video_loader(args.comfy)
+        if vl.ffmpeg_path is None:
+            sys.exit("ffmpeg not found; pass a video file instead")
+        tmp = tempfile.TemporaryDirectory()
+        videos = [make_sample(vl.ffmpeg_path, tmp.name)]
+
+    for video in videos:
+        print(os.path.basename(video))
+        for output_dtype in DTYPES:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--comfy", args.comfy,
+                 "--child", video, output_dtype],
+                capture_output=True, check=True, text=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(
+                f"  {output_dtype:9s} {result['frames']:5d} frames  load {result['load_s'] * 1000:9.1f} ms  "
+                f"use {result['use_s'] * 1000:8.1f} ms  tensor {result['tensor_mb']:9.1f} MB  "
+                f"peak RSS {result['peak_rss_mb']:9.1f} MB"
+            )
+
+    if tmp is not None:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
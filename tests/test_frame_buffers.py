@@ -0,0 +1,131 @@
+import os
+import importlib.util
+
+import pytest
+
+np = pytest.importorskip("numpy")
+torch = pytest.importorskip("torch")
+
+# 按文件路径加载：包的 __init__ 依赖 ComfyUI
+_spec = importlib.util.spec_from_file_location(
+    "pm_frame_buffers",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "utils", "frame_buffers.py"),
+)
+frame_buffers = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(frame_buffers)
+
+
+def make_frames(n, shape=(4, 6, 3)):
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 256, size=shape, dtype=np.uint8) for _ in range(n)]
+
+
+def uint8_allocator(shape):
+    return torch.empty(shape, dtype=torch.uint8)
+
+
+def test_uint8_output_is_plain_uint8_tensor():
+    frames = make_frames(5)
+    images = frame_buffers.collect_frames(iter(frames), frames[0].shape, 5, 100, uint8_allocator)
+    assert type(images) is torch.Tensor
+    assert images.dtype == torch.uint8
+    assert images.element_size() == 1
+    assert torch.equal(images, torch.from_numpy(np.stack(frames)))
+
+
+def test_uint8_slicing_keeps_dtype_and_shares_storage():
+    frames = make_frames(6)
+    images = frame_buffers.collect_frames(iter(frames), frames[0].shape, 6, 100, uint8_allocator)
+    batch = images[2:4]
+    assert batch.dtype == torch.uint8
+    assert batch.shape == (2, *frames[0].shape)
+    assert batch.data_ptr() == images[2].data_ptr()
+
+
+def test_uint8_setitem_and_inplace_ops_persist():
+    frames = make_frames(4)
+    images = frame_buffers.collect_frames(iter(frames), frames[0].shape, 4, 100, uint8_allocator)
+    images[1] = 7
+    images[2:3].zero_()
+    images[0].add_(1)
+    assert (images[1] == 7).all()
+    assert (images[2] == 0).all()
+    expected = torch.from_numpy(frames[0]).add(1)
+    assert torch.equal(images[0], expected)
+
+
+@pytest.mark.parametrize("dtype", [torch.float32, torch.float16, torch.bfloat16])
+def test_float_outputs_are_normalized(dtype):
+    frames = make_frames(3)
+    images = frame_buffers.collect_frames(
+        iter(frames), frames[0].shape, 3, 100, lambda shape: torch.empty(shape, dtype=dtype))
+    assert images.dtype == dtype
+    expected = torch.from_numpy(np.stack(frames)).float().div(255).to(dtype)
+    assert torch.equal(images, expected)
+
+
+def test_short_estimate_grows_output():
+    frames = make_frames(40)
+    images = frame_buffers.collect_frames(iter(frames), frames[0].shape, 3, 100, uint8_allocator)
+    assert len(images) == 40
+    assert torch.equal(images, torch.from_numpy(np.stack(frames)))
+
+
+def test_overestimate_is_shrunk_to_frame_count():
+    frames = make_frames(5)
+    images = frame_buffers.collect_frames(iter(frames), frames[0].shape, 100, 100, uint8_allocator)
+    assert len(images) == 5
+    assert images.untyped_storage().nbytes() == images.numel()
+    assert torch.equal(images, torch.from_numpy(np.stack(frames)))
+
+
+def test_close_estimate_keeps_view():
+    frames = make_frames(9)
+    images = frame_buffers.collect_frames(iter(frames), frames[0].shape, 10, 100, uint8_allocator)
+    assert len(images) == 9
+    assert images.untyped_storage().nbytes() == 10 * images[0].numel()
+
+
+def test_max_frames_caps_allocation():
+    frames = make_frames(10)
+    images = frame_buffers.collect_frames(iter(frames[:4]), frames[0].shape, 10, 4, uint8_allocator)
+    assert len(images) == 4
+
+
+def test_store_float_to_uint8_is_exact_for_k_over_255():
+    values = torch.arange(256, dtype=torch.uint8).reshape(1, 16, 16, 1).expand(1, 16, 16, 3)
+    out = torch.empty(values.shape, dtype=torch.uint8)
+    frame_buffers.store_float(out, values.float().div(255))
+    assert torch.equal(out, values)
+
+
+def test_frame_budget_uses_element_size():
+    shape = (1080, 1920, 3)
+    limit = 10 * 1080 * 1920 * 3
+    assert frame_buffers.frame_budget(limit, shape, torch.uint8) == 10
+    assert frame_buffers.frame_budget(limit, shape, torch.float16) == 5
+    assert frame_buffers.frame_budget(limit, shape, torch.float32) == 2
+
+
+def test_yieldable_frames_subtracts_skipped_frames():
+    assert frame_buffers.count_yieldable_frames(30000, 30, 0, 0, 1, 29900) == 100
+    assert frame_buffers.count_yieldable_frames(30000, 30, 0, 0, 1) == 30000
+    # force_rate 先换算帧数，再扣除跳过的帧 (按目标帧率计)，最后抽取
+    assert frame_buffers.count_yieldable_frames(300, 30, 15, 0, 1, 100) == 50
+    assert frame_buffers.count_yieldable_frames(300, 30, 0, 0, 3, 290) == 4
+    assert frame_buffers.count_yieldable_frames(300, 30, 0, 2, 3, 290) == 2
+    assert frame_buffers.count_yieldable_frames(300, 30, 0, 0, 1, 400) == 0
+
+
+def test_skip_sizes_allocation_to_remaining_frames():
+    frames = make_frames(100, shape=(2, 2, 3))
+    expected = frame_buffers.count_yieldable_frames(30000, 30, 0, 0, 1, 29900)
+    allocated = []
+
+    def allocate(shape):
+        allocated.append(shape[0])
+        return torch.empty(shape, dtype=torch.uint8)
+
+    images = frame_buffers.collect_frames(iter(frames), frames[0].shape, expected, 30000, allocate)
+    assert len(images) == 100
+    assert allocated == [100]
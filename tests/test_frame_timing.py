@@ -0,0 +1,191 @@
+import os
+import sys
+import itertools
+import subprocess
+import importlib.util
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+UTILS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "utils")
+
+
+def load_module(name, filename):
+    # 按文件路径加载：包的 __init__ 依赖 ComfyUI
+    spec = importlib.util.spec_from_file_location(name, os.path.join(UTILS_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+frame_timing = load_module("pm_frame_timing", "frame_timing.py")
+
+
+class FakeCapture:
+    """只计数的 VideoCapture：grab 成功时前进一帧，retrieve 返回当前帧号"""
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.position = -1
+
+    def grab(self):
+        if self.position + 1 >= self.frames:
+            return False
+        self.position += 1
+        return True
+
+    def retrieve(self):
+        return self.position
+
+
+def grab_loop(frames, fps, force_rate, frame_load_cap, skip_first_frames, select_every_nth,
+              seek=False):
+    """cv_frame_generator 的 grab 循环；seek 时与节点一样用 skip_position 跳过前面的帧"""
+    cap = FakeCapture(frames)
+    if not cap.grab():
+        return []
+    base_frame_time = 1 / fps
+    target_frame_time = base_frame_time if force_rate == 0 else 1 / force_rate
+    time_offset = target_frame_time
+    total_frame_count = 0
+    total_frames_evaluated = -1
+    selected = []
+    if seek and skip_first_frames > 0:
+        time_offset, source_frame = frame_timing.skip_position(
+            skip_first_frames, base_frame_time, target_frame_time)
+        total_frame_count = skip_first_frames
+        while cap.position < source_frame:
+            if not cap.grab():
+                return []
+    while True:
+        if time_offset < target_frame_time:
+            if not cap.grab():
+                break
+            time_offset += base_frame_time
+        if time_offset < target_frame_time:
+            continue
+        time_offset -= target_frame_time
+        total_frame_count += 1
+        if total_frame_count <= skip_first_frames:
+            continue
+        total_frames_evaluated += 1
+        if total_frames_evaluated % select_every_nth != 0:
+            continue
+        selected.append(cap.retrieve())
+        if frame_load_cap > 0 and len(selected) >= frame_load_cap:
+            break
+    return selected
+
+
+TIMING_CASES = list(itertools.product(
+    (1, 50, 121),                   # 源帧数
+    (24, 30000 / 1001, 30, 60),     # 源帧率
+    (0, 8, 12, 24, 30, 59.94),      # force_rate
+    (0, 7),                         # frame_load_cap
+    (0, 1, 5, 37),                  # skip_first_frames
+    (1, 2, 3),                      # select_every_nth
+))
+
+
+@pytest.mark.parametrize("frames, fps, force_rate, cap, skip, nth", TIMING_CASES)
+def test_schedule_and_skip_match_grab_loop(frames, fps, force_rate, cap, skip, nth):
+    expected = grab_loop(frames, fps, force_rate, cap, skip, nth)
+    target_frame_time = 1 / fps if force_rate == 0 else 1 / force_rate
+    assert frame_timing.frame_schedule(frames, 1 / fps, target_frame_time, skip, nth, cap) == expected
+    assert grab_loop(frames, fps, force_rate, cap, skip, nth, seek=True) == expected
+
+
+def test_plan_segments_start_on_keyframes():
+    index = {"frames": 100, "keyframes": [0, 12, 24, 36, 48, 60, 72, 84, 96],
+             "keyframe_times": [k / 24 for k in range(0, 100, 12)]}
+    schedule = frame_timing.frame_schedule(100, 1 / 24, 1 / 12, 3, 1, 0)
+    segments = frame_timing.plan_segments(schedule, index, 4)
+    assert segments[0][0] == 0 and segments[-1][1] == len(schedule)
+    for (_, end), (start, _) in zip(segments, segments[1:]):
+        assert end == start
+    # 每段从某个关键帧区间内的第一个输出帧开始，前一段不会解码到这个 GOP
+    for start, _ in segments[1:]:
+        keyframe = frame_timing.keyframe_at_or_before(index, schedule[start])[0]
+        assert schedule[start - 1] < keyframe <= schedule[start]
+
+
+# ============ 并行分段解码与串行 grab 的一致性 ============
+
+CLIP_FPS = 24
+CLIP_FRAMES = 72
+CLIP_GOP = 12
+
+
+@pytest.fixture(scope="module")
+def clip(tmp_path_factory):
+    imageio_ffmpeg = pytest.importorskip("imageio_ffmpeg")
+    path = str(tmp_path_factory.mktemp("clip") / "clip.mp4")
+    subprocess.run(
+        [imageio_ffmpeg.get_ffmpeg_exe(), "-v", "error", "-y",
+         "-f", "lavfi", "-i", f"testsrc2=size=160x96:rate={CLIP_FPS}",
+         "-frames:v", str(CLIP_FRAMES), "-c:v", "libx264", "-pix_fmt", "yuv420p",
+         "-g", str(CLIP_GOP), "-keyint_min", str(CLIP_GOP), "-sc_threshold", "0", path],
+        check=True,
+    )
+    keyframes = list(range(0, CLIP_FRAMES, CLIP_GOP))
+    index = {"frames": CLIP_FRAMES, "keyframes": keyframes,
+             "keyframe_times": [k / CLIP_FPS for k in keyframes]}
+    return path, index
+
+
+@pytest.fixture(scope="module")
+def decode_pool():
+    process_workers = load_module("pm_process_workers", "process_workers.py")
+    decode_worker = load_module("pm_decode_worker_source", "decode_worker.py")
+    code = process_workers.register(decode_worker)
+    pool = ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=exec, initargs=(code,))
+    yield pool, sys.modules[decode_worker.MODULE_NAME].decode_segment
+    pool.shutdown()
+
+
+def serial_frames(path):
+    cv2 = pytest.importorskip("cv2")
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while cap.grab():
+        frames.append(cv2.cvtColor(cap.retrieve()[1], cv2.COLOR_BGR2RGB))
+    cap.release()
+    return frames
+
+
+@pytest.mark.parametrize("force_rate, cap, skip, nth", [
+    (0, 0, 0, 1),
+    (0, 0, 17, 2),
+    (10, 0, 3, 1),
+    (0, 20, 30, 1),
+])
+def test_parallel_decode_matches_serial(clip, decode_pool, force_rate, cap, skip, nth):
+    np = pytest.importorskip("numpy")
+    torch = pytest.importorskip("torch")
+    path, index = clip
+    pool, decode_segment = decode_pool
+    frames = serial_frames(path)
+    assert len(frames) == CLIP_FRAMES
+
+    target_frame_time = 1 / CLIP_FPS if force_rate == 0 else 1 / force_rate
+    schedule = frame_timing.frame_schedule(CLIP_FRAMES, 1 / CLIP_FPS, target_frame_time, skip, nth, cap)
+    expected = torch.from_numpy(np.stack([frames[s] for s in schedule]))
+
+    for dtype in (torch.uint8, torch.float32):
+        out = torch.empty((len(schedule), *frames[0].shape), dtype=dtype)
+        out.share_memory_()
+        segments = frame_timing.plan_segments(schedule, index, 4)
+        assert len(segments) > 1
+        futures = [
+            pool.submit(decode_segment, path, out, start, schedule[start:end],
+                        frame_timing.keyframe_at_or_before(index, schedule[start]), CLIP_FPS)
+            for start, end in segments
+        ]
+        assert [f.result() for f in futures] == [end - start for start, end in segments]
+        if dtype == torch.uint8:
+            assert torch.equal(out, expected)
+        else:
+            assert torch.equal(out, expected.float() / 255)
+
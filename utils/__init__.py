@@ -1,4 +1,5 @@
 from .helpers import (
+    get_pm_cache_dir,
     get_file_size,
     load_pm_metadata,
     save_pm_metadata,
@@ -20,6 +21,7 @@ from .model_paths import (
 
 __all__ = [
     # helpers
+    "get_pm_cache_dir",
     "get_file_size",
     "load_pm_metadata",
     "save_pm_metadata",
@@ -0,0 +1,87 @@
+# 独立模块：PMLoadVideo 并行分段解码的子进程入口。与 probe_worker 一样不使用包内相对导入，
+# spawn 出的子进程按文件路径单独加载本文件 (见 process_workers)，不必导入依赖 ComfyUI 的节点包。
+
+MODULE_NAME = "pm_decode_worker"
+
+
+def seek_to(video_cap, video, frame_number, keyframe, fps):
+    """
+    让 video_cap 停在 frame_number (进入时已 grab 第 0 帧)。
+    keyframe 为 (帧号, 时间)：先跳到该关键帧再逐帧 grab；后端落点与关键帧时间不符时
+    重新打开文件从头 grab，保证帧号精确
+    """
+    import cv2
+
+    position = 0
+    if keyframe is not None and keyframe[0] > 0:
+        keyframe_number, keyframe_time = keyframe
+        video_cap.set(cv2.CAP_PROP_POS_FRAMES, keyframe_number)
+        landed = video_cap.grab() and \
+            abs(video_cap.get(cv2.CAP_PROP_POS_MSEC) / 1000 - keyframe_time) < 0.5 / fps
+        if landed:
+            position = keyframe_number
+        elif not video_cap.open(video) or not video_cap.grab():
+            return False
+    while position < frame_number:
+        if not video_cap.grab():
+            return False
+        position += 1
+    return True
+
+
+def crop_resize(frame, resize):
+    """
+    解码阶段直接在 uint8 帧上缩放：resize 为 (x, y, w, h, new_width, new_height, interpolation)，
+    先按与 common_upscale(..., "center") 相同的方式居中裁剪再用 cv2.resize 缩放
+    """
+    import cv2
+
+    x, y, w, h, new_width, new_height, interpolation = resize
+    return cv2.resize(frame[y:y + h, x:x + w], (new_width, new_height), interpolation=interpolation)
+
+
+def decode_segment(video, out, start, sources, keyframe, fps, resize=None):
+    """
+    解码 sources 中的源帧号 (非递减，可重复) 写入共享张量 out[start:]。
+    归一化方式与串行路径 (frame_buffers.store_uint8) 相同：uint8 原样写入，float32 先 copy_ 再 div_，
+    半精度类型先在 float32 中归一化再转换。
+    resize 不为 None 时先 crop_resize 再写入 (out 为缩放后的尺寸)。
+    返回实际写入的帧数，文件提前结束时少于 len(sources)
+    """
+    import cv2
+    import torch
+
+    torch.set_num_threads(1)
+    video_cap = cv2.VideoCapture(video)
+    try:
+        if not video_cap.isOpened() or not video_cap.grab():
+            return 0
+        if not seek_to(video_cap, video, sources[0], keyframe, fps):
+            return 0
+        position = sources[0]
+        frame = None
+        written = 0
+        for source in sources:
+            while position < source:
+                if not video_cap.grab():
+                    return written
+                position += 1
+                frame = None
+            if frame is None:
+                frame = video_cap.retrieve()[1]
+                if resize is not None:
+                    frame = crop_resize(frame, resize)
+                frame = torch.from_numpy(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            target = out[start + written]
+            if target.dtype == torch.uint8:
+                target.copy_(frame)
+            elif target.dtype == torch.float32:
+                target.copy_(frame)
+                target.div_(255)
+            else:
+                target.copy_(frame.float().div_(255))
+            written += 1
+        return written
+    finally:
+        video_cap.release()
+
@@ -0,0 +1,130 @@
+import os
+import time
+import hashlib
+import logging
+import threading
+
+from .helpers import get_pm_cache_dir
+
+logger = logging.getLogger(__name__)
+
+
+def file_identity(full_path, *extra):
+    """由路径、大小和修改时间生成缓存键；文件被覆盖后键随之改变"""
+    stat = os.stat(full_path)
+    h = hashlib.sha1()
+    h.update(os.path.abspath(full_path).encode("utf-8", "surrogateescape"))
+    h.update(f"|{stat.st_size}|{stat.st_mtime_ns}".encode())
+    for value in extra:
+        h.update(f"|{value}".encode())
+    return h.hexdigest()
+
+
+class DiskCache:
+    """
+    按配额做 LRU 淘汰的文件缓存
+    文件名即缓存键，访问时刷新 mtime 作为 LRU 时间戳
+    """
+
+    def __init__(self, name, max_bytes):
+        self.directory = get_pm_cache_dir(name)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._total = 0
+
+        for entry in os.scandir(self.directory):
+            if not entry.is_file():
+                continue
+            if entry.name.endswith(".part"):
+                # 上次进程退出时未完成的写入
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+                continue
+            stat = entry.stat()
+            self._entries[entry.name] = [stat.st_size, stat.st_mtime]
+            self._total += stat.st_size
+
+    def path_for(self, name):
+        return os.path.join(self.directory, name)
+
+    def temp_path(self, name):
+        return self.path_for(f"{name}.{threading.get_ident()}.{time.monotonic_ns()}.part")
+
+    def get(self, name):
+        path = self.path_for(name)
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return None
+            if not os.path.exists(path):
+                self._total -= entry[0]
+                del self._entries[name]
+                return None
+            entry[1] = time.time()
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def put(self, name, temp_path):
+        """把已写好的临时文件移入缓存，并按配额淘汰最久未访问的条目"""
+        path = self.path_for(name)
+        os.replace(temp_path, path)
+        size = os.path.getsize(path)
+        with self._lock:
+            old = self._entries.get(name)
+            if old is not None:
+                self._total -= old[0]
+            self._entries[name] = [size, time.time()]
+            self._total += size
+            evicted = self._evict_locked(keep=name)
+        # 删除文件不占用锁，淘汰期间 get 不会被阻塞
+        for evicted_path in evicted:
+            try:
+                os.remove(evicted_path)
+            except OSError:
+                pass
+        return path
+
+    def put_bytes(self, name, data):
+        temp_path = self.temp_path(name)
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        return self.put(name, temp_path)
+
+    def discard(self, name):
+        with self._lock:
+            entry = self._entries.pop(name, None)
+            if entry is not None:
+                self._total -= entry[0]
+        try:
+            os.remove(self.path_for(name))
+        except OSError:
+            pass
+
+    def _evict_locked(self, keep=None):
+        """从索引中移除最久未访问的条目直到不超过配额，返回要删除的文件路径"""
+        evicted = []
+        if self._total <= self.max_bytes:
+            return evicted
+        for name, (size, _) in sorted(self._entries.items(), key=lambda item: item[1][1]):
+            if self._total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            evicted.append(self.path_for(name))
+            del self._entries[name]
+            self._total -= size
+        return evicted
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total,
+                "max_bytes": self.max_bytes,
+            }
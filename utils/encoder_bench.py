@@ -0,0 +1,238 @@
+import os
+import json
+import time
+import logging
+import threading
+import subprocess
+
+from .helpers import get_pm_cache_dir
+
+logger = logging.getLogger(__name__)
+
+# 预览编码器微基准：首次使用时用 lavfi 合成片段，以与实际转码相同的参数分别测试各编码器。
+# 按子进程消耗的 CPU 时间 (user + sys，扣除生成测试源本身的开销) 计算每核帧率，选出最省 CPU 的
+# 浏览器兼容方案：多线程编码器在空闲机器上墙钟最快，但并发转码时 CPU 才是瓶颈。
+# 线程数不做限制 (libsvtav1 也不理会 -threads)。结果按 ffmpeg 路径/大小/修改时间缓存。
+
+BENCH_SIZE = "640x360"
+BENCH_RATE = 30
+BENCH_DURATION = 2
+BENCH_SOURCE = f"testsrc2=size={BENCH_SIZE}:rate={BENCH_RATE}:duration={BENCH_DURATION}"
+BENCH_FRAMES = BENCH_RATE * BENCH_DURATION
+BENCH_TIMEOUT = 60
+DEFAULT_PROFILE = "vp9"
+# 测量方式变化时递增，旧的缓存结果作废
+BENCH_VERSION = 3
+
+# codecs 用于前端 MediaSource 播放分段预览 (不含音频)
+PREVIEW_PROFILES = {
+    "vp9": {
+        "encoder": "libvpx-vp9",
+        "args": ["-c:v", "libvpx-vp9", "-deadline", "realtime", "-cpu-used", "8"],
+        "format": "webm",
+        "mime": "video/webm",
+        "codecs": "vp9",
+        "pix_fmt": "yuv420p",
+        # libvpx 编码透明通道时不能使用 alt-ref 帧
+        "alpha_args": ["-pix_fmt", "yuva420p", "-auto-alt-ref", "0"],
+    },
+    "vp8": {
+        "encoder": "libvpx",
+        "args": ["-c:v", "libvpx", "-deadline", "realtime", "-cpu-used", "16", "-b:v", "2M"],
+        "format": "webm",
+        "mime": "video/webm",
+        "codecs": "vp8",
+        "pix_fmt": "yuv420p",
+        # libvpx 编码透明通道时不能使用 alt-ref 帧
+        "alpha_args": ["-pix_fmt", "yuva420p", "-auto-alt-ref", "0"],
+    },
+    "h264": {
+        "encoder": "libx264",
+        "args": [
+            "-c:v", "libx264", "-preset", "ultrafast", "-tune", "zerolatency",
+            "-movflags", "frag_keyframe+empty_moov+default_base_moof",
+        ],
+        "format": "mp4",
+        "mime": "video/mp4",
+        "codecs": "avc1.42E028",
+        "pix_fmt": "yuv420p",
+    },
+    "av1": {
+        "encoder": "libsvtav1",
+        "args": ["-c:v", "libsvtav1", "-preset", "12"],
+        "format": "webm",
+        "mime": "video/webm",
+        "codecs": "av01.0.08M.08",
+        "pix_fmt": "yuv420p",
+    },
+}
+
+_lock = threading.Lock()
+_state = {"running": False, "result": None}
+
+
+def _cache_path():
+    return os.path.join(get_pm_cache_dir(), "encoder_bench.json")
+
+
+def _ffmpeg_signature(ffmpeg_path):
+    stat = os.stat(ffmpeg_path)
+    return f"{os.path.abspath(ffmpeg_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+
+
+def available_encoders(ffmpeg_path):
+    try:
+        output = subprocess.run(
+            [ffmpeg_path, "-hide_banner", "-encoders"],
+            capture_output=True, check=True, timeout=BENCH_TIMEOUT,
+        ).stdout.decode("utf-8", "backslashreplace")
+    except Exception:
+        return set()
+    encoders = set()
+    for line in output.splitlines():
+        parts = line.split()
+        if len(parts) >= 2 and parts[0].startswith("V"):
+            encoders.add(parts[1])
+    return encoders
+
+
+def encode_args(profile, alpha=False):
+    """profile 的编码参数；alpha 为 True 时输出带透明通道的像素格式 (只有带 alpha_args 的方案支持)"""
+    if alpha:
+        return profile["args"] + profile["alpha_args"]
+    return profile["args"] + ["-pix_fmt", profile["pix_fmt"]]
+
+
+def bench_profile(ffmpeg_path, profile):
+    output_args = encode_args(profile)
+    # 基准只测编码速度，输出丢弃 (容器参数不需要)
+    if "-movflags" in output_args:
+        index = output_args.index("-movflags")
+        del output_args[index:index + 2]
+    source_args = [ffmpeg_path, "-hide_banner", "-v", "error", "-f", "lavfi", "-i", BENCH_SOURCE]
+    encode_time = _cpu_time(source_args + output_args + ["-f", "null", "-"])
+    # 生成测试源和 null 输出本身的开销：以不编码 (rawvideo) 的同一命令为基线扣除
+    encode_time -= _cpu_time(source_args + ["-c:v", "rawvideo", "-f", "null", "-"])
+    return BENCH_FRAMES / encode_time if encode_time > 0 else None
+
+
+def _cpu_time(args):
+    """
+    运行 args，返回子进程消耗的 CPU 秒数 (user + sys)。
+    只统计这一个子进程 (os.wait4)，不受同时运行的转码影响；没有 wait4 的平台 (Windows) 退回墙钟时间
+    """
+    if not hasattr(os, "wait4"):
+        start = time.perf_counter()
+        subprocess.run(args, capture_output=True, check=True, timeout=BENCH_TIMEOUT)
+        return time.perf_counter() - start
+    proc = subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.DEVNULL)
+    timer = threading.Timer(BENCH_TIMEOUT, proc.kill)
+    timer.start()
+    try:
+        _, status, usage = os.wait4(proc.pid, 0)
+    finally:
+        timer.cancel()
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, args)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run_benchmark(ffmpeg_path):
+    encoders = available_encoders(ffmpeg_path)
+    results = []
+    for name, profile in PREVIEW_PROFILES.items():
+        entry = {"name": name, "encoder": profile["encoder"], "available": profile["encoder"] in encoders}
+        if entry["available"]:
+            try:
+                entry["fps_per_core"] = bench_profile(ffmpeg_path, profile)
+            except Exception as e:
+                entry["available"] = False
+                entry["error"] = str(e)
+        results.append(entry)
+
+    return {
+        "ffmpeg": _ffmpeg_signature(ffmpeg_path),
+        "version": BENCH_VERSION,
+        "benchmarked_at": time.time(),
+        "selected": _fastest(results),
+        "selected_alpha": _fastest(results, need_alpha=True),
+        "results": results,
+    }
+
+
+def _fastest(results, need_alpha=False):
+    usable = [
+        r for r in results
+        if r["available"] and r.get("fps_per_core")
+        and ("alpha_args" in PREVIEW_PROFILES[r["name"]] or not need_alpha)
+    ]
+    if not usable:
+        return DEFAULT_PROFILE
+    return max(usable, key=lambda r: r["fps_per_core"])["name"]
+
+
+def _load_cached(ffmpeg_path):
+    try:
+        with open(_cache_path(), "r", encoding="utf-8") as f:
+            result = json.load(f)
+    except Exception:
+        return None
+    if result.get("ffmpeg") != _ffmpeg_signature(ffmpeg_path) or result.get("version") != BENCH_VERSION:
+        return None
+    return result
+
+
+def _worker(ffmpeg_path, force):
+    result = None if force else _load_cached(ffmpeg_path)
+    if result is None:
+        try:
+            result = run_benchmark(ffmpeg_path)
+            with open(_cache_path(), "w", encoding="utf-8") as f:
+                json.dump(result, f, indent=2)
+            logger.info(f"PM preview encoder benchmark: selected {result['selected']}")
+        except Exception as e:
+            logger.error(f"Encoder benchmark error: {e}")
+            # 不写入缓存，下次启动时重试；本次运行期间使用默认方案
+            result = {"selected": DEFAULT_PROFILE, "selected_alpha": DEFAULT_PROFILE,
+                      "results": [], "error": str(e)}
+    with _lock:
+        _state["running"] = False
+        _state["result"] = result
+
+
+def ensure_benchmark(ffmpeg_path, force=False):
+    """
+    已有结果 (且不 force) 时直接返回；否则在后台线程读取缓存，缓存无效再运行基准。
+    会在事件循环上调用，这里不做任何文件操作
+    """
+    with _lock:
+        if _state["running"]:
+            return False
+        if not force and _state["result"] is not None:
+            return False
+        _state["running"] = True
+    threading.Thread(target=_worker, args=(ffmpeg_path, force), name="pm-encoder-bench", daemon=True).start()
+    return True
+
+
+def get_benchmark_state():
+    with _lock:
+        return {"running": _state["running"], "result": _state["result"]}
+
+
+def select_preview_profile(ffmpeg_path, need_alpha=False):
+    """
+    返回 (name, profile)；基准尚未完成时使用默认的 VP9。
+    profile["args"] 已包含像素格式：need_alpha 时为带透明通道的格式
+    """
+    if ffmpeg_path is not None:
+        ensure_benchmark(ffmpeg_path)
+    with _lock:
+        result = _state["result"]
+    name = DEFAULT_PROFILE
+    if result:
+        name = result.get("selected_alpha" if need_alpha else "selected", DEFAULT_PROFILE)
+    profile = PREVIEW_PROFILES[name]
+    return name, {**profile, "args": encode_args(profile, need_alpha)}
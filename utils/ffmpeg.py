@@ -0,0 +1,19 @@
+import os
+import shutil
+
+
+def find_ffmpeg():
+    """优先使用 imageio_ffmpeg 自带的 ffmpeg，其次是系统 PATH 和当前目录下的 ffmpeg.exe"""
+    try:
+        from imageio_ffmpeg import get_ffmpeg_exe
+        return get_ffmpeg_exe()
+    except:
+        system_ffmpeg = shutil.which("ffmpeg")
+        if system_ffmpeg is not None:
+            return system_ffmpeg
+        elif os.path.isfile("ffmpeg.exe"):
+            return os.path.abspath("ffmpeg.exe")
+    return None
+
+
+ffmpeg_path = find_ffmpeg()
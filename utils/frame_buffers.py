@@ -0,0 +1,123 @@
+import numpy as np
+import torch
+
+# 独立模块：PMLoadVideo 把解码帧写入输出张量的部分 (精度换算、分块归一化、预分配与扩容)。
+# 只依赖 numpy / torch，不使用包内相对导入，便于单独加载测试。
+
+OUTPUT_DTYPES = {
+    "float32": torch.float32,
+    "float16": torch.float16,
+    "bfloat16": torch.bfloat16,
+    "uint8": torch.uint8,
+}
+
+# 暂存 uint8 帧的块大小：约 16 帧 1080p
+STAGING_BYTES = 1920 * 1080 * 3 * 16
+# 实际帧数低于预分配容量的这一比例时复制到刚好大小的张量，释放多余的分配
+SHRINK_RATIO = 0.75
+
+
+def count_yieldable_frames(total_frames, fps, force_rate, frame_load_cap, select_every_nth,
+                           skip_first_frames=0):
+    """
+    预估输出帧数，用于预分配和进度条。先扣除跳过的帧再按 select_every_nth 抽取，
+    否则跳过大半个视频时仍会按整段预分配
+    """
+    if total_frames <= 0:
+        return 0
+    if force_rate != 0:
+        yieldable_frames = int(total_frames / fps * force_rate)
+    else:
+        yieldable_frames = total_frames
+    yieldable_frames = max(0, yieldable_frames - skip_first_frames)
+    if select_every_nth:
+        # 抽取第 0, n, 2n... 帧
+        yieldable_frames = -(-yieldable_frames // select_every_nth)
+    if frame_load_cap != 0:
+        yieldable_frames = min(frame_load_cap, yieldable_frames)
+    return yieldable_frames
+
+
+def frame_budget(memory_limit, frame_shape, dtype=torch.float32):
+    """memory_limit 字节内能放下多少帧 frame_shape / dtype 的帧"""
+    element_size = torch.empty((), dtype=dtype).element_size()
+    return max(0, int(memory_limit // (int(np.prod(frame_shape)) * element_size)))
+
+
+def store_uint8(out, frames):
+    """
+    把 uint8 帧 (tensor) 写入 out：out 为 uint8 时原样复制，否则归一化到 [0, 1]。
+    半精度输出先在 float32 中归一化再转换，只舍入一次
+    """
+    if out.dtype == torch.uint8:
+        out.copy_(frames)
+    elif out.dtype == torch.float32:
+        out.copy_(frames)
+        out.div_(255)
+    else:
+        out.copy_(frames.float().div_(255))
+
+
+def store_float(out, frames):
+    """把已归一化的 float 帧 (tensor) 写入 out"""
+    if out.dtype == torch.uint8:
+        # common_upscale 缩放后的值都是 k/255，乘回 255 取整是精确的
+        out.copy_(frames.mul(255).round_())
+    else:
+        out.copy_(frames)
+
+
+def collect_frames(gen, frame_shape, expected_frames, max_frames, allocate=None):
+    """把 gen 产出的帧写入按 expected_frames 预分配的张量 (allocate(shape) 创建，默认 float32)"""
+    allocate = allocate or (lambda shape: torch.empty(shape, dtype=torch.float32))
+    frame_size = int(np.prod(frame_shape))
+    block = max(1, STAGING_BYTES // frame_size)
+    if expected_frames > 0:
+        capacity = min(expected_frames, max_frames)
+    else:
+        capacity = min(block, max_frames)
+    capacity = max(1, capacity)
+    images = allocate((capacity, *frame_shape))
+    staging = None
+    staged = 0
+    count = 0
+
+    def reserve(n):
+        nonlocal images, capacity
+        if count + n <= capacity:
+            return
+        # 帧数估计可能偏少：按几何级数扩容兜底
+        capacity = min(max_frames, max(count + n, capacity + capacity // 2 + block))
+        grown = allocate((capacity, *frame_shape))
+        grown[:count] = images[:count]
+        images = grown
+
+    def flush():
+        nonlocal staged, count
+        if staged == 0:
+            return
+        reserve(staged)
+        store_uint8(images[count:count + staged], torch.from_numpy(staging[:staged]))
+        count += staged
+        staged = 0
+
+    for frame in gen:
+        if frame.dtype == np.uint8:
+            if staging is None:
+                staging = np.empty((block, *frame_shape), dtype=np.uint8)
+            staging[staged] = frame
+            staged += 1
+            if staged == block:
+                flush()
+        else:
+            flush()
+            reserve(1)
+            store_float(images[count], torch.from_numpy(frame))
+            count += 1
+    flush()
+    if count < capacity * SHRINK_RATIO:
+        # 帧数估计偏多 (文件提前结束等)：不让切片视图拖住整块分配
+        shrunk = allocate((count, *frame_shape))
+        shrunk.copy_(images[:count])
+        return shrunk
+    return images[:count]
@@ -0,0 +1,90 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+
+from .disk_cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+# PMLoadVideo 的解码帧缓存：键为 calculate_file_hash (路径 + 修改时间) 加全部加载参数，
+# 内容是 uint8 NHWC 帧的 .npy 文件，命中时直接 mmap 读取，不再解码和缩放。
+# 同名 .json 记录帧间隔等元数据，命中时也不必再打开视频读取帧率；缺少任一文件都按未命中处理。
+# 磁盘配额可用环境变量 PM_FRAME_CACHE_GB 调整，超出后按 LRU 淘汰。
+
+DEFAULT_FRAME_CACHE_GB = 16
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _budget_bytes():
+    try:
+        return int(float(os.environ.get("PM_FRAME_CACHE_GB", DEFAULT_FRAME_CACHE_GB)) * 2**30)
+    except ValueError:
+        return DEFAULT_FRAME_CACHE_GB * 2**30
+
+
+def get_frame_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DiskCache("video_frames", _budget_bytes())
+        return _cache
+
+
+def frame_cache_name(file_hash, params):
+    h = hashlib.sha256(file_hash.encode())
+    h.update(json.dumps(params, sort_keys=True).encode())
+    return f"{h.hexdigest()}.npy"
+
+
+def _meta_name(name):
+    return f"{os.path.splitext(name)[0]}.json"
+
+
+def load_cached_frames(name):
+    """返回 (只读 mmap 的 uint8 数组, 元数据 dict)；未命中或文件损坏时返回 None"""
+    import numpy as np
+
+    cache = get_frame_cache()
+    meta_name = _meta_name(name)
+    path = cache.get(name)
+    meta_path = cache.get(meta_name)
+    if path is None or meta_path is None:
+        return None
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        return np.load(path, mmap_mode="r"), meta
+    except Exception as e:
+        logger.debug(f"Frame cache entry unreadable ({name}): {e}")
+        cache.discard(name)
+        cache.discard(meta_name)
+        return None
+
+
+def store_frames(name, shape, fill, meta):
+    """
+    以 .npy 格式写入 uint8 帧：fill(array) 负责把帧写入传入的 open_memmap 数组，
+    写完后连同元数据 meta (可 JSON 序列化) 移入缓存。单条超过整个配额时不写入
+    """
+    import numpy as np
+
+    cache = get_frame_cache()
+    nbytes = int(np.prod(shape))
+    if nbytes > cache.max_bytes:
+        return None
+    temp_path = cache.temp_path(name)
+    try:
+        array = np.lib.format.open_memmap(temp_path, mode="w+", dtype=np.uint8, shape=shape)
+        fill(array)
+        array.flush()
+        del array
+        path = cache.put(name, temp_path)
+        cache.put_bytes(_meta_name(name), json.dumps(meta).encode("utf-8"))
+        return path
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
@@ -0,0 +1,94 @@
+import json
+import logging
+import threading
+from collections import OrderedDict
+
+from .disk_cache import DiskCache, file_identity
+
+logger = logging.getLogger(__name__)
+
+# 每个视频文件的帧索引：只解复用不解码，记录展示顺序下每个关键帧的帧号和时间，
+# 用于把 "第 N 帧" 映射到之前最近的关键帧再向前精确解码。
+# 结果按文件标识存入磁盘缓存 (JSON)，进程内另有一个小的 LRU。
+
+FRAME_INDEX_CACHE_BYTES = 64 * 2**20
+MEMORY_ENTRIES = 32
+INDEX_VERSION = 1
+
+_cache = None
+_memory = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_frame_index_cache():
+    global _cache
+    with _lock:
+        if _cache is None:
+            _cache = DiskCache("frame_index", FRAME_INDEX_CACHE_BYTES)
+        return _cache
+
+
+def build_frame_index(full_path):
+    import av
+
+    with av.open(full_path) as container:
+        stream = container.streams.video[0]
+        time_base = float(stream.time_base)
+        start = stream.start_time or 0
+        packets = []
+        for packet in container.demux(stream):
+            if packet.pts is None:
+                continue
+            packets.append((packet.pts, packet.is_keyframe))
+
+    # 解复用顺序是解码顺序，按 pts 排序得到展示顺序下的帧号
+    packets.sort()
+    keyframes = []
+    keyframe_times = []
+    for frame_number, (pts, is_keyframe) in enumerate(packets):
+        if is_keyframe:
+            keyframes.append(frame_number)
+            keyframe_times.append((pts - start) * time_base)
+    return {
+        "version": INDEX_VERSION,
+        "frames": len(packets),
+        "keyframes": keyframes,
+        "keyframe_times": keyframe_times,
+    }
+
+
+def get_frame_index(full_path):
+    """返回帧索引 dict；无法建立 (缺少 PyAV、没有视频流等) 时返回 None"""
+    try:
+        name = f"{file_identity(full_path, 'frame_index', INDEX_VERSION)}.json"
+    except OSError:
+        return None
+    with _lock:
+        index = _memory.get(name)
+        if index is not None:
+            _memory.move_to_end(name)
+            return index
+
+    cache = get_frame_index_cache()
+    index = None
+    path = cache.get(name)
+    if path is not None:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except Exception:
+            cache.discard(name)
+    if index is None:
+        try:
+            index = build_frame_index(full_path)
+        except Exception as e:
+            logger.debug(f"Frame index error ({full_path}): {e}")
+            return None
+        cache.put_bytes(name, json.dumps(index).encode("utf-8"))
+
+    with _lock:
+        _memory[name] = index
+        while len(_memory) > MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+    return index
+
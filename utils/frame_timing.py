@@ -0,0 +1,73 @@
+import bisect
+
+# 独立模块：PMLoadVideo 的取帧时序 (force_rate / skip_first_frames / select_every_nth) 与并行分段划分。
+# 不依赖 cv2 / torch，也不使用包内相对导入，便于单独加载测试。
+# 所有函数都与 cv_frame_generator 的 grab 循环使用相同的浮点运算，选出的源帧与逐帧 grab 完全一致。
+
+
+def skip_position(skip_first_frames, base_frame_time, target_frame_time):
+    """
+    不解码地重放 cv_frame_generator 的取帧时序。
+    返回数完 skip_first_frames 个输出帧时的 (time_offset, source_frame)，之后选出的帧与完整 grab 循环相同
+    """
+    time_offset = target_frame_time
+    source_frame = 0
+    skipped = 0
+    while skipped < skip_first_frames:
+        if time_offset < target_frame_time:
+            source_frame += 1
+            time_offset += base_frame_time
+        if time_offset < target_frame_time:
+            continue
+        time_offset -= target_frame_time
+        skipped += 1
+    return time_offset, source_frame
+
+
+def frame_schedule(source_frames, base_frame_time, target_frame_time, skip_first_frames,
+                   select_every_nth, frame_load_cap):
+    """返回 cv_frame_generator 会输出的每一帧的源帧号 (不解码)"""
+    schedule = []
+    time_offset = target_frame_time
+    source_frame = 0
+    total_frame_count = 0
+    while True:
+        if time_offset < target_frame_time:
+            source_frame += 1
+            if source_frame >= source_frames:
+                break
+            time_offset += base_frame_time
+        if time_offset < target_frame_time:
+            continue
+        time_offset -= target_frame_time
+        total_frame_count += 1
+        if total_frame_count <= skip_first_frames:
+            continue
+        if (total_frame_count - skip_first_frames - 1) % select_every_nth != 0:
+            continue
+        schedule.append(source_frame)
+        if frame_load_cap > 0 and len(schedule) >= frame_load_cap:
+            break
+    return schedule
+
+
+def keyframe_at_or_before(index, frame_number):
+    """返回 (keyframe_number, keyframe_time)；frame_number 之前没有关键帧时返回 None"""
+    i = bisect.bisect_right(index["keyframes"], frame_number) - 1
+    if i < 0:
+        return None
+    return index["keyframes"][i], index["keyframe_times"][i]
+
+
+def plan_segments(schedule, index, segments):
+    """
+    把输出位置切成连续的段，每段都从某个关键帧区间的第一帧开始，
+    不同 worker 不会解码同一个 GOP。返回 [(start, end), ...]
+    """
+    bounds = {0}
+    for i in range(1, segments):
+        keyframe = keyframe_at_or_before(index, schedule[len(schedule) * i // segments])
+        if keyframe is not None:
+            bounds.add(bisect.bisect_left(schedule, keyframe[0]))
+    bounds = sorted(bounds) + [len(schedule)]
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
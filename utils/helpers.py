@@ -6,6 +6,15 @@ from datetime import datetime
 logger = logging.getLogger(__name__)
 
 
+def get_pm_cache_dir(*parts):
+    import folder_paths
+
+    prefix = getattr(folder_paths, "SYSTEM_USER_PREFIX", "__")
+    cache_dir = os.path.join(folder_paths.get_user_directory(), f"{prefix}pm_manager", *parts)
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
 def get_file_size(file_path):
     size_bytes = os.path.getsize(file_path)
     for unit in ["B", "KB", "MB", "GB"]:
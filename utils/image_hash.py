@@ -0,0 +1,107 @@
+import math
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def to_signed(value):
+    # SQLite 只有有符号 64 位整数
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def to_unsigned(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def _bits_to_int(bits):
+    value = 0
+    for bit in bits.flatten():
+        value = (value << 1) | int(bit)
+    return value
+
+
+_DCT_CACHE = {}
+
+
+def _dct_matrix(n):
+    import numpy as np
+
+    matrix = _DCT_CACHE.get(n)
+    if matrix is None:
+        k = np.arange(n)[:, None]
+        i = np.arange(n)[None, :]
+        matrix = np.cos(math.pi * (2 * i + 1) * k / (2 * n)) * math.sqrt(2 / n)
+        matrix[0, :] = math.sqrt(1 / n)
+        _DCT_CACHE[n] = matrix
+    return matrix
+
+
+def compute_hashes(full_path):
+    """返回 (dhash, phash)，均为 64 位无符号整数"""
+    import numpy as np
+    from PIL import Image, ImageOps
+
+    with Image.open(full_path) as img:
+        img.draft("L", (64, 64))
+        img = ImageOps.exif_transpose(img).convert("L")
+
+        small = np.asarray(img.resize((9, 8), Image.Resampling.BILINEAR), dtype=np.int16)
+        dhash = _bits_to_int(small[:, 1:] > small[:, :-1])
+
+        pixels = np.asarray(img.resize((32, 32), Image.Resampling.BILINEAR), dtype=np.float64)
+        dct = _dct_matrix(32)
+        low = (dct @ pixels @ dct.T)[:8, :8]
+        median = np.median(low.flatten()[1:])
+        phash = _bits_to_int(low > median)
+
+    return dhash, phash
+
+
+class BKTree:
+    """汉明距离上的 BK 树，查询代价随库规模亚线性增长"""
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def add(self, value, item):
+        node = [value, [item], {}]
+        if self.root is None:
+            self.root = node
+            self.size = 1
+            return
+        current = self.root
+        while True:
+            distance = hamming(value, current[0])
+            if distance == 0:
+                current[1].append(item)
+                self.size += 1
+                return
+            child = current[2].get(distance)
+            if child is None:
+                current[2][distance] = node
+                self.size += 1
+                return
+            current = child
+
+    def query(self, value, max_distance):
+        """返回 [(distance, item)]，按距离排序"""
+        results = []
+        if self.root is None:
+            return results
+        stack = [self.root]
+        while stack:
+            node_value, items, children = stack.pop()
+            distance = hamming(value, node_value)
+            if distance <= max_distance:
+                results.extend((distance, item) for item in items)
+            low, high = distance - max_distance, distance + max_distance
+            for child_distance, child in children.items():
+                if low <= child_distance <= high:
+                    stack.append(child)
+        results.sort(key=lambda r: r[0])
+        return results
@@ -0,0 +1,664 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+
+from .helpers import get_pm_cache_dir
+from .media_metadata import read_media_metadata
+from .image_hash import to_signed, to_unsigned
+
+logger = logging.getLogger(__name__)
+
+# Formats that can carry an embedded ComfyUI prompt/workflow
+METADATA_IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".gif", ".bmp", ".tiff", ".tif")
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".flac", ".aac", ".ogg", ".m4a")
+VIDEO_EXTENSIONS = (".mp4", ".webm", ".avi", ".mov", ".mkv")
+MEDIA_EXTENSIONS = IMAGE_EXTENSIONS + AUDIO_EXTENSIONS + VIDEO_EXTENSIONS
+
+SEARCH_FACETS = ("model", "lora", "seed", "sampler", "scheduler")
+
+MODEL_INPUT_KEYS = (
+    "ckpt_name",
+    "unet_name",
+    "model_name",
+    "vae_name",
+    "clip_name",
+    "clip_name1",
+    "clip_name2",
+    "clip_name3",
+    "control_net_name",
+    "style_model_name",
+    "upscale_model_name",
+)
+# PM loaders keep their selection in a hidden list widget
+PM_MODEL_WIDGETS = ("checkpointsWidget", "unetsWidget", "vaesWidget", "clipsWidget")
+SEED_INPUT_KEYS = ("seed", "noise_seed")
+TEXT_INPUT_KEYS = ("text", "text_g", "text_l", "clip_l", "t5xxl", "prompt", "positive", "negative")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    root TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    width INTEGER,
+    height INTEGER,
+    has_prompt INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (root, path)
+);
+CREATE TABLE IF NOT EXISTS facets (
+    file_id INTEGER NOT NULL,
+    facet TEXT NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS facets_value ON facets (facet, value);
+CREATE INDEX IF NOT EXISTS facets_file ON facets (file_id);
+CREATE INDEX IF NOT EXISTS files_mtime ON files (root, mtime);
+CREATE TABLE IF NOT EXISTS stars (
+    file_id INTEGER PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS image_hashes (
+    file_id INTEGER PRIMARY KEY,
+    dhash INTEGER,
+    phash INTEGER
+);
+CREATE TABLE IF NOT EXISTS probes (
+    file_id INTEGER PRIMARY KEY,
+    mtime REAL NOT NULL,
+    data TEXT NOT NULL
+);
+"""
+
+# 探测结果的格式版本：探测内容变化 (新增字段、按其他类型探测) 时递增，旧版本的结果视为过期重新探测
+# 1: GIF 按视频探测
+# 2: 视频结果必须包含 pix_fmt (预览直通依赖它，早期写入的结果没有)
+PROBE_VERSION = 2
+
+
+def media_type(path):
+    lower = path.lower()
+    if lower.endswith(IMAGE_EXTENSIONS):
+        return "image"
+    if lower.endswith(VIDEO_EXTENSIONS):
+        return "video"
+    if lower.endswith(AUDIO_EXTENSIONS):
+        return "audio"
+    return None
+
+
+# ============ Prompt Extraction ============
+
+
+def _model_label(name):
+    name = str(name).replace("\\", "/").rsplit("/", 1)[-1]
+    return os.path.splitext(name)[0]
+
+
+def _widget_entries(value):
+    if isinstance(value, dict) and "__value__" in value:
+        value = value["__value__"]
+    return value if isinstance(value, list) else []
+
+
+def extract_generation_info(prompt):
+    """
+    从 ComfyUI 的 prompt (API 格式) 中提取模型、LoRA、种子、采样器和提示词
+    返回 {"facets": {facet: [values]}, "text": [prompt strings]}
+    """
+    facets = {facet: set() for facet in SEARCH_FACETS}
+    texts = []
+
+    if not isinstance(prompt, dict):
+        return {"facets": {facet: [] for facet in SEARCH_FACETS}, "text": texts}
+
+    for node in prompt.values():
+        if not isinstance(node, dict):
+            continue
+        inputs = node.get("inputs")
+        if not isinstance(inputs, dict):
+            continue
+
+        for key, value in inputs.items():
+            # Linked inputs are [node_id, output_index]
+            if isinstance(value, list):
+                continue
+
+            if key in MODEL_INPUT_KEYS and isinstance(value, str) and value:
+                facets["model"].add(_model_label(value))
+            elif key == "lora_name" and isinstance(value, str) and value:
+                facets["lora"].add(_model_label(value))
+            elif key in SEED_INPUT_KEYS and isinstance(value, (int, float)):
+                facets["seed"].add(str(int(value)))
+            elif key == "sampler_name" and isinstance(value, str):
+                facets["sampler"].add(value)
+            elif key == "scheduler" and isinstance(value, str):
+                facets["scheduler"].add(value)
+            elif key in TEXT_INPUT_KEYS and isinstance(value, str) and value.strip():
+                texts.append(value.strip())
+            elif key in PM_MODEL_WIDGETS:
+                entries = _widget_entries(value)
+                selected = [e for e in entries if isinstance(e, dict) and e.get("selected")]
+                for entry in (selected or entries[:1]):
+                    if isinstance(entry, dict) and entry.get("name"):
+                        facets["model"].add(_model_label(entry["name"]))
+            elif key in ("lorasWidget", "loras"):
+                for entry in _widget_entries(value):
+                    if isinstance(entry, dict) and entry.get("name") and entry.get("active", True):
+                        facets["lora"].add(_model_label(entry["name"]))
+
+    return {"facets": {facet: sorted(values) for facet, values in facets.items()}, "text": texts}
+
+
+# ============ Index Store ============
+
+
+def _folder_like(folder):
+    """返回匹配文件夹下所有路径的 LIKE 子句和参数"""
+    folder = folder.replace("\\", "/").strip("/")
+    escaped = folder.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return "LIKE ? ESCAPE '\\'", f"{escaped}/%"
+
+
+def _fts_query(text):
+    tokens = [token.replace('"', '""') for token in text.split()]
+    return " ".join(f'"{token}"*' for token in tokens if token)
+
+
+class MediaIndex:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(probes)")]
+        if "version" not in columns:
+            self._conn.execute("ALTER TABLE probes ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        try:
+            self._conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS prompt_fts USING fts5(text)")
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: fall back to LIKE matching
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS prompt_text (id INTEGER PRIMARY KEY, text TEXT)"
+            )
+            self.has_fts = False
+        self._conn.commit()
+
+    def get_entries(self, root):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, id, size, mtime FROM files WHERE root = ?", (root,)
+            ).fetchall()
+        return {row[0]: (row[1], row[2], row[3]) for row in rows}
+
+    def lookup(self, root, path):
+        """返回 (id, size, mtime)，未入索引时返回 None"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, size, mtime FROM files WHERE root = ? AND path = ?", (root, path)
+            ).fetchone()
+
+    def upsert_file(self, root, path, size, mtime, metadata=None, commit=True):
+        metadata = metadata or {}
+        info = extract_generation_info(metadata.get("prompt"))
+        text_table = "prompt_fts" if self.has_fts else "prompt_text"
+        text_key = "rowid" if self.has_fts else "id"
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO files (root, path, size, mtime, width, height, has_prompt) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (root, path) DO UPDATE SET size = excluded.size, "
+                "mtime = excluded.mtime, width = excluded.width, height = excluded.height, "
+                "has_prompt = excluded.has_prompt",
+                (
+                    root,
+                    path,
+                    size,
+                    mtime,
+                    metadata.get("width"),
+                    metadata.get("height"),
+                    1 if metadata.get("prompt") else 0,
+                ),
+            )
+            file_id = self._conn.execute(
+                "SELECT id FROM files WHERE root = ? AND path = ?", (root, path)
+            ).fetchone()[0]
+
+            self._conn.execute("DELETE FROM facets WHERE file_id = ?", (file_id,))
+            self._conn.execute(f"DELETE FROM {text_table} WHERE {text_key} = ?", (file_id,))
+            # 内容已变化，感知哈希需要重新计算
+            self._conn.execute("DELETE FROM image_hashes WHERE file_id = ?", (file_id,))
+            self._conn.execute("DELETE FROM probes WHERE file_id = ? AND mtime != ?", (file_id, mtime))
+
+            self._conn.executemany(
+                "INSERT INTO facets (file_id, facet, value) VALUES (?, ?, ?)",
+                [
+                    (file_id, facet, value)
+                    for facet, values in info["facets"].items()
+                    for value in values
+                ],
+            )
+            # Model/LoRA names and samplers are searchable as free text too
+            text = "\n".join(
+                info["text"]
+                + [value for facet in ("model", "lora", "sampler") for value in info["facets"][facet]]
+            )
+            if text:
+                self._conn.execute(
+                    f"INSERT INTO {text_table} ({text_key}, text) VALUES (?, ?)", (file_id, text)
+                )
+            if commit:
+                self._conn.commit()
+        return file_id
+
+    def _delete_ids_locked(self, file_ids):
+        text_table = "prompt_fts" if self.has_fts else "prompt_text"
+        text_key = "rowid" if self.has_fts else "id"
+        for file_id in file_ids:
+            self._conn.execute("DELETE FROM facets WHERE file_id = ?", (file_id,))
+            self._conn.execute(f"DELETE FROM {text_table} WHERE {text_key} = ?", (file_id,))
+            self._conn.execute("DELETE FROM stars WHERE file_id = ?", (file_id,))
+            self._conn.execute("DELETE FROM image_hashes WHERE file_id = ?", (file_id,))
+            self._conn.execute("DELETE FROM probes WHERE file_id = ?", (file_id,))
+            self._conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def remove_paths(self, root, paths, commit=True):
+        with self._lock:
+            file_ids = []
+            for path in paths:
+                row = self._conn.execute(
+                    "SELECT id FROM files WHERE root = ? AND path = ?", (root, path)
+                ).fetchone()
+                if row is not None:
+                    file_ids.append(row[0])
+            self._delete_ids_locked(file_ids)
+            if commit:
+                self._conn.commit()
+
+    def remove_folder(self, root, folder, commit=True):
+        """删除文件夹后移除其下所有条目"""
+        like, escaped = _folder_like(folder)
+        with self._lock:
+            file_ids = [
+                row[0]
+                for row in self._conn.execute(
+                    f"SELECT id FROM files WHERE root = ? AND path {like}", (root, escaped)
+                )
+            ]
+            self._delete_ids_locked(file_ids)
+            if commit:
+                self._conn.commit()
+
+    # ============ Stars / Aggregates ============
+
+    def set_starred(self, root, path, starred):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM files WHERE root = ? AND path = ?", (root, path)
+            ).fetchone()
+            if row is None:
+                return False
+            if starred:
+                self._conn.execute("INSERT OR IGNORE INTO stars (file_id) VALUES (?)", (row[0],))
+            else:
+                self._conn.execute("DELETE FROM stars WHERE file_id = ?", (row[0],))
+            self._conn.commit()
+        return True
+
+    def describe_files(self, file_ids):
+        result = {}
+        with self._lock:
+            for file_id in file_ids:
+                row = self._conn.execute(
+                    "SELECT f.root, f.path, f.size, f.mtime, s.file_id IS NOT NULL "
+                    "FROM files f LEFT JOIN stars s ON s.file_id = f.id WHERE f.id = ?",
+                    (file_id,),
+                ).fetchone()
+                if row is not None:
+                    result[file_id] = {
+                        "root": row[0],
+                        "path": row[1],
+                        "size_bytes": row[2],
+                        "mtime": row[3],
+                        "starred": bool(row[4]),
+                    }
+        return result
+
+    # ============ Perceptual Hashes ============
+
+    def files_missing_hashes(self, root, limit=200):
+        ext_clause = " OR ".join("lower(f.path) LIKE ?" for _ in IMAGE_EXTENSIONS)
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT f.id, f.path FROM files f "
+                f"LEFT JOIN image_hashes h ON h.file_id = f.id "
+                f"WHERE f.root = ? AND h.file_id IS NULL AND ({ext_clause}) "
+                f"ORDER BY f.id LIMIT ?",
+                [root] + [f"%{ext}" for ext in IMAGE_EXTENSIONS] + [limit],
+            ).fetchall()
+
+    def set_hashes(self, file_id, dhash, phash, commit=True):
+        """dhash/phash 为 None 表示无法计算 (损坏文件等)，避免反复重试"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO image_hashes (file_id, dhash, phash) VALUES (?, ?, ?)",
+                (
+                    file_id,
+                    None if dhash is None else to_signed(dhash),
+                    None if phash is None else to_signed(phash),
+                ),
+            )
+            if commit:
+                self._conn.commit()
+
+    def get_hashes(self, root, path):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT f.id, h.dhash, h.phash FROM files f "
+                "JOIN image_hashes h ON h.file_id = f.id WHERE f.root = ? AND f.path = ?",
+                (root, path),
+            ).fetchone()
+        if row is None or row[1] is None:
+            return None
+        return {"id": row[0], "dhash": to_unsigned(row[1]), "phash": to_unsigned(row[2])}
+
+    def get_hash_values(self, file_ids, kind):
+        """返回 {file_id: 当前哈希}；已删除或无法计算哈希的文件不在结果中"""
+        column = "phash" if kind == "phash" else "dhash"
+        result = {}
+        with self._lock:
+            for file_id in file_ids:
+                row = self._conn.execute(
+                    f"SELECT {column} FROM image_hashes WHERE file_id = ?", (file_id,)
+                ).fetchone()
+                if row is not None and row[0] is not None:
+                    result[file_id] = to_unsigned(row[0])
+        return result
+
+    def iter_hashes(self, kind):
+        column = "phash" if kind == "phash" else "dhash"
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT file_id, {column} FROM image_hashes WHERE {column} IS NOT NULL"
+            ).fetchall()
+        for file_id, value in rows:
+            yield file_id, to_unsigned(value)
+
+    # ============ Media Probes ============
+
+    def files_missing_probes(self, root, limit=200):
+        """尚未探测或探测结果已过期 (mtime 或 PROBE_VERSION 变化) 的文件"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT f.id, f.path, f.mtime FROM files f "
+                "LEFT JOIN probes p ON p.file_id = f.id "
+                "WHERE f.root = ? AND (p.file_id IS NULL OR p.mtime != f.mtime OR p.version != ?) "
+                "ORDER BY f.id DESC LIMIT ?",
+                (root, PROBE_VERSION, limit),
+            ).fetchall()
+
+    def set_probe(self, file_id, mtime, data, commit=True):
+        """data 为空字典表示探测失败，同一 mtime 下不再重试"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO probes (file_id, mtime, data, version) VALUES (?, ?, ?, ?)",
+                (file_id, mtime, json.dumps(data), PROBE_VERSION),
+            )
+            if commit:
+                self._conn.commit()
+
+    def get_probe(self, root, path, mtime=None, size=None):
+        """返回缓存的探测结果；给定 mtime / size 时结果必须与之一致"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT p.mtime, p.data, p.version, f.size FROM files f "
+                "JOIN probes p ON p.file_id = f.id WHERE f.root = ? AND f.path = ?",
+                (root, path),
+            ).fetchone()
+        if row is None or row[2] != PROBE_VERSION:
+            return None
+        if (mtime is not None and row[0] != mtime) or (size is not None and row[3] != size):
+            return None
+        return json.loads(row[1])
+
+    def folder_usage(self, root, folder="", since=None):
+        """文件夹 (含子文件夹) 的文件数、总字节数和星标字节数，直接由索引聚合"""
+        where = "f.root = ?"
+        params = [root]
+        if folder:
+            like, escaped = _folder_like(folder)
+            where += f" AND f.path {like}"
+            params.append(escaped)
+        if since is not None:
+            where += " AND f.mtime >= ?"
+            params.append(since)
+        with self._lock:
+            count, total, starred = self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(f.size), 0), "
+                f"COALESCE(SUM(CASE WHEN s.file_id IS NULL THEN 0 ELSE f.size END), 0) "
+                f"FROM files f LEFT JOIN stars s ON s.file_id = f.id WHERE {where}",
+                params,
+            ).fetchone()
+        return {"files": count, "bytes": total, "starred_bytes": starred}
+
+    def iter_oldest(self, root, folder="", include_starred=False, batch_size=500):
+        """按修改时间从旧到新遍历 (path, size, mtime, starred)"""
+        where = "f.root = ?"
+        params = [root]
+        if folder:
+            like, escaped = _folder_like(folder)
+            where += f" AND f.path {like}"
+            params.append(escaped)
+        if not include_starred:
+            where += " AND s.file_id IS NULL"
+
+        last = (float("-inf"), -1)
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT f.id, f.path, f.size, f.mtime, s.file_id IS NOT NULL "
+                    f"FROM files f LEFT JOIN stars s ON s.file_id = f.id "
+                    f"WHERE {where} AND (f.mtime > ? OR (f.mtime = ? AND f.id > ?)) "
+                    f"ORDER BY f.mtime, f.id LIMIT ?",
+                    params + [last[0], last[0], last[1], batch_size],
+                ).fetchall()
+            if not rows:
+                return
+            for file_id, path, size, mtime, starred in rows:
+                yield path, size, mtime, bool(starred)
+            last = (rows[-1][3], rows[-1][0])
+
+    def commit(self):
+        with self._lock:
+            self._conn.commit()
+
+    def _match_clause(self, root, text="", filters=None, folder=""):
+        where = ["f.root = ?"]
+        params = [root]
+
+        if folder:
+            like, escaped = _folder_like(folder)
+            where.append(f"f.path {like}")
+            params.append(escaped)
+
+        if text:
+            if self.has_fts:
+                where.append("f.id IN (SELECT rowid FROM prompt_fts WHERE prompt_fts MATCH ?)")
+                params.append(_fts_query(text))
+            else:
+                for token in text.split():
+                    where.append("f.id IN (SELECT id FROM prompt_text WHERE text LIKE ?)")
+                    params.append(f"%{token}%")
+
+        for facet, values in (filters or {}).items():
+            for value in values:
+                where.append("f.id IN (SELECT file_id FROM facets WHERE facet = ? AND value = ?)")
+                params.extend([facet, value])
+
+        return " AND ".join(where), params
+
+    def search(self, root, text="", filters=None, folder="", limit=100, offset=0, facet_limit=20):
+        where, params = self._match_clause(root, text, filters, folder)
+
+        with self._lock:
+            total = self._conn.execute(
+                f"SELECT COUNT(*) FROM files f WHERE {where}", params
+            ).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT f.id, f.path, f.size, f.mtime, f.width, f.height, "
+                f"EXISTS (SELECT 1 FROM stars s WHERE s.file_id = f.id) FROM files f "
+                f"WHERE {where} ORDER BY f.mtime DESC LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            ).fetchall()
+
+            items = []
+            for file_id, path, size, mtime, width, height, starred in rows:
+                item = {
+                    "type": media_type(path),
+                    "path": path,
+                    "name": path.rsplit("/", 1)[-1],
+                    "size_bytes": size,
+                    "mtime": mtime,
+                    "width": width,
+                    "height": height,
+                    "starred": bool(starred),
+                }
+                for facet, value in self._conn.execute(
+                    "SELECT facet, value FROM facets WHERE file_id = ?", (file_id,)
+                ):
+                    item.setdefault(facet, []).append(value)
+                items.append(item)
+
+            facet_counts = {}
+            for facet in SEARCH_FACETS:
+                facet_counts[facet] = [
+                    {"value": value, "count": count}
+                    for value, count in self._conn.execute(
+                        f"SELECT value, COUNT(*) AS n FROM facets WHERE facet = ? AND file_id IN "
+                        f"(SELECT f.id FROM files f WHERE {where}) "
+                        f"GROUP BY value ORDER BY n DESC, value LIMIT ?",
+                        [facet] + params + [facet_limit],
+                    )
+                ]
+
+        return {"total": total, "items": items, "facets": facet_counts}
+
+
+# ============ Background Indexing ============
+
+_index = None
+_index_lock = threading.Lock()
+_sync_state = {}
+_sync_lock = threading.Lock()
+
+RESYNC_INTERVAL = 300
+
+
+def get_media_index():
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = MediaIndex(os.path.join(get_pm_cache_dir(), "media_index.db"))
+        return _index
+
+
+def iter_media_files(base_dir, extensions):
+    for current_dir, dirs, files in os.walk(base_dir):
+        # 跳过隐藏目录和文件夹预览图 (.name.png)
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        for name in files:
+            if name.startswith(".") or not name.lower().endswith(extensions):
+                continue
+            full_path = os.path.join(current_dir, name)
+            yield os.path.relpath(full_path, base_dir).replace("\\", "/"), full_path
+
+
+def index_file(index, root, base_dir, rel_path, commit=True):
+    full_path = os.path.join(base_dir, rel_path)
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        index.remove_paths(root, [rel_path], commit=commit)
+        return None
+
+    metadata = None
+    if rel_path.lower().endswith(METADATA_IMAGE_EXTENSIONS):
+        try:
+            metadata = read_media_metadata(full_path)
+        except Exception as e:
+            logger.debug(f"Metadata read failed for {full_path}: {e}")
+    return index.upsert_file(root, rel_path, stat.st_size, stat.st_mtime, metadata, commit=commit)
+
+
+def sync_directory(root, base_dir, batch_size=200):
+    """增量同步：只为新增或修改过的文件读取元数据，已删除的文件移出索引"""
+    index = get_media_index()
+    known = index.get_entries(root)
+    seen = set()
+    pending = 0
+    indexed = 0
+
+    for rel_path, full_path in iter_media_files(base_dir, MEDIA_EXTENSIONS):
+        seen.add(rel_path)
+        try:
+            stat = os.stat(full_path)
+        except OSError:
+            continue
+        entry = known.get(rel_path)
+        if entry is not None and entry[1] == stat.st_size and entry[2] == stat.st_mtime:
+            continue
+
+        index_file(index, root, base_dir, rel_path, commit=False)
+        indexed += 1
+        pending += 1
+        if pending >= batch_size:
+            index.commit()
+            pending = 0
+
+    removed = [path for path in known if path not in seen]
+    index.remove_paths(root, removed, commit=False)
+    index.commit()
+    return {"indexed": indexed, "removed": len(removed), "total": len(seen)}
+
+
+def get_sync_state(root):
+    with _sync_lock:
+        return dict(_sync_state.get(root, {"running": False, "last_sync": None}))
+
+
+def schedule_sync(root, base_dir, force=False):
+    """在后台线程同步索引；已在运行或最近刚同步过时直接返回"""
+    with _sync_lock:
+        state = _sync_state.setdefault(root, {"running": False, "last_sync": None})
+        if state["running"]:
+            return False
+        if (
+            not force
+            and state["last_sync"] is not None
+            and time.time() - state["last_sync"] < RESYNC_INTERVAL
+        ):
+            return False
+        state["running"] = True
+
+    def worker():
+        result = {}
+        try:
+            result = sync_directory(root, base_dir)
+            logger.info(f"PM media index synced ({root}): {result}")
+        except Exception as e:
+            logger.error(f"PM media index sync error ({root}): {e}")
+        finally:
+            with _sync_lock:
+                state["running"] = False
+                state["last_sync"] = time.time()
+                state["last_result"] = result
+
+    threading.Thread(target=worker, name=f"pm-media-index-{root}", daemon=True).start()
+    return True
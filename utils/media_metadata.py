@@ -0,0 +1,315 @@
+import os
+import json
+import zlib
+import struct
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 不解码像素的图片元数据读取器：只遍历容器结构 (PNG chunk / RIFF chunk / JPEG segment)，
+# 像素数据通过 seek 跳过，用于索引和信息面板读取 prompt、workflow 与尺寸。
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+XMP_JPEG_HEADER = b"http://ns.adobe.com/xap/1.0/\x00"
+
+# EXIF tags ComfyUI writes "key:value" strings into (SaveAnimatedWEBP and friends)
+EXIF_ASCII_TAGS = (0x010D, 0x010E, 0x010F, 0x0110, 0x0131, 0x013B)
+EXIF_IFD_POINTER = 0x8769
+EXIF_USER_COMMENT = 0x9286
+
+# JPEG start-of-frame markers (SOF0..SOF15 except DHT/JPG/DAC)
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def _empty_result(fmt=None):
+    return {
+        "format": fmt,
+        "width": None,
+        "height": None,
+        "alpha": None,
+        "prompt": None,
+        "workflow": None,
+        "text": {},
+    }
+
+
+def _store_text(result, key, value):
+    """prompt/workflow 解析为 JSON，其余保存在 text 中"""
+    if key in ("prompt", "workflow"):
+        try:
+            result[key] = json.loads(value)
+        except (TypeError, ValueError):
+            result[key] = value
+    else:
+        result["text"][key] = value
+
+
+# ============ PNG ============
+
+
+def _read_png(f, result):
+    if f.read(8) != PNG_SIGNATURE:
+        return result
+    result["format"] = "png"
+
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            break
+        length, chunk_type = struct.unpack(">I4s", header)
+
+        if chunk_type == b"IHDR":
+            data = f.read(length)
+            width, height, _, color_type = struct.unpack(">IIBB", data[:10])
+            result["width"], result["height"] = width, height
+            result["alpha"] = color_type in (4, 6)
+            f.seek(4, os.SEEK_CUR)
+        elif chunk_type == b"tEXt":
+            data = f.read(length)
+            key, _, value = data.partition(b"\x00")
+            _store_text(result, key.decode("latin-1"), value.decode("latin-1"))
+            f.seek(4, os.SEEK_CUR)
+        elif chunk_type == b"zTXt":
+            data = f.read(length)
+            key, _, value = data.partition(b"\x00")
+            try:
+                text = zlib.decompress(value[1:]).decode("latin-1")
+                _store_text(result, key.decode("latin-1"), text)
+            except zlib.error:
+                pass
+            f.seek(4, os.SEEK_CUR)
+        elif chunk_type == b"iTXt":
+            data = f.read(length)
+            key, _, rest = data.partition(b"\x00")
+            compressed = rest[:1] == b"\x01"
+            _, _, rest = rest[2:].partition(b"\x00")  # language tag
+            _, _, value = rest.partition(b"\x00")  # translated keyword
+            try:
+                if compressed:
+                    value = zlib.decompress(value)
+                _store_text(result, key.decode("latin-1"), value.decode("utf-8", "replace"))
+            except zlib.error:
+                pass
+            f.seek(4, os.SEEK_CUR)
+        elif chunk_type == b"tRNS":
+            result["alpha"] = True
+            f.seek(length + 4, os.SEEK_CUR)
+        elif chunk_type == b"IDAT":
+            # ComfyUI writes text chunks before the image data; only keep
+            # walking past IDAT when nothing has been found yet
+            if result["prompt"] is not None or result["workflow"] is not None:
+                break
+            f.seek(length + 4, os.SEEK_CUR)
+        elif chunk_type == b"IEND":
+            break
+        else:
+            f.seek(length + 4, os.SEEK_CUR)
+    return result
+
+
+# ============ EXIF / XMP ============
+
+
+def _parse_exif(data, result):
+    if data.startswith(b"Exif\x00\x00"):
+        data = data[6:]
+    if len(data) < 8:
+        return
+    endian = {b"II": "<", b"MM": ">"}.get(data[:2])
+    if endian is None:
+        return
+
+    def read_ifd(offset, tags):
+        if offset + 2 > len(data):
+            return {}
+        entries = {}
+        (count,) = struct.unpack(endian + "H", data[offset:offset + 2])
+        for i in range(count):
+            pos = offset + 2 + i * 12
+            if pos + 12 > len(data):
+                break
+            tag, typ, n = struct.unpack(endian + "HHI", data[pos:pos + 8])
+            if tag not in tags:
+                continue
+            if typ == 4:
+                entries[tag] = struct.unpack(endian + "I", data[pos + 8:pos + 12])[0]
+                continue
+            if typ not in (2, 7):
+                continue
+            if n <= 4:
+                raw = data[pos + 8:pos + 8 + n]
+            else:
+                (value_offset,) = struct.unpack(endian + "I", data[pos + 8:pos + 12])
+                raw = data[value_offset:value_offset + n]
+            entries[tag] = raw
+        return entries
+
+    (ifd0_offset,) = struct.unpack(endian + "I", data[4:8])
+    ifd0 = read_ifd(ifd0_offset, set(EXIF_ASCII_TAGS) | {EXIF_IFD_POINTER})
+
+    for tag in EXIF_ASCII_TAGS:
+        raw = ifd0.get(tag)
+        if not isinstance(raw, bytes):
+            continue
+        value = raw.rstrip(b"\x00").decode("utf-8", "replace")
+        key, sep, rest = value.partition(":")
+        if sep and key and " " not in key:
+            _store_text(result, key, rest)
+
+    exif_ifd = ifd0.get(EXIF_IFD_POINTER)
+    if isinstance(exif_ifd, int):
+        comment = read_ifd(exif_ifd, {EXIF_USER_COMMENT}).get(EXIF_USER_COMMENT)
+        if isinstance(comment, bytes) and len(comment) > 8:
+            charset, body = comment[:8], comment[8:]
+            if charset.startswith(b"UNICODE"):
+                text = body.decode("utf-16-le" if endian == "<" else "utf-16-be", "replace")
+            else:
+                text = body.decode("utf-8", "replace")
+            text = text.rstrip("\x00")
+            if text:
+                result["text"]["parameters"] = text
+
+
+def _parse_xmp(data, result):
+    result["text"]["xmp"] = data.rstrip(b"\x00").decode("utf-8", "replace")
+
+
+# ============ WebP ============
+
+
+def _read_webp(f, result):
+    header = f.read(12)
+    if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WEBP":
+        return result
+    result["format"] = "webp"
+
+    while True:
+        chunk_header = f.read(8)
+        if len(chunk_header) < 8:
+            break
+        fourcc, length = struct.unpack("<4sI", chunk_header)
+        padded = length + (length & 1)
+
+        if fourcc == b"VP8X":
+            data = f.read(10)
+            flags = data[0]
+            result["alpha"] = bool(flags & 0x10)
+            result["width"] = 1 + int.from_bytes(data[4:7], "little")
+            result["height"] = 1 + int.from_bytes(data[7:10], "little")
+            f.seek(padded - 10, os.SEEK_CUR)
+        elif fourcc == b"VP8 ":
+            data = f.read(10)
+            if result["width"] is None and data[3:6] == b"\x9d\x01\x2a":
+                w, h = struct.unpack("<HH", data[6:10])
+                result["width"], result["height"] = w & 0x3FFF, h & 0x3FFF
+                result["alpha"] = False
+            f.seek(padded - 10, os.SEEK_CUR)
+        elif fourcc == b"VP8L":
+            data = f.read(5)
+            if result["width"] is None and data[0] == 0x2F:
+                bits = int.from_bytes(data[1:5], "little")
+                result["width"] = (bits & 0x3FFF) + 1
+                result["height"] = ((bits >> 14) & 0x3FFF) + 1
+                result["alpha"] = bool((bits >> 28) & 1)
+            f.seek(padded - 5, os.SEEK_CUR)
+        elif fourcc == b"EXIF":
+            _parse_exif(f.read(length), result)
+            f.seek(padded - length, os.SEEK_CUR)
+        elif fourcc == b"XMP ":
+            _parse_xmp(f.read(length), result)
+            f.seek(padded - length, os.SEEK_CUR)
+        else:
+            # ANIM/ANMF/ALPH/ICCP: image data, skip without reading
+            f.seek(padded, os.SEEK_CUR)
+    return result
+
+
+# ============ JPEG ============
+
+
+def _read_jpeg(f, result):
+    if f.read(2) != b"\xff\xd8":
+        return result
+    result["format"] = "jpeg"
+    result["alpha"] = False
+
+    while True:
+        byte = f.read(1)
+        if not byte:
+            break
+        if byte != b"\xff":
+            continue
+        marker = f.read(1)
+        while marker == b"\xff":
+            marker = f.read(1)
+        if not marker:
+            break
+        code = marker[0]
+        if code == 0x01 or 0xD0 <= code <= 0xD8:
+            continue
+        if code in (0xD9, 0xDA):
+            # EOI or start of scan: everything after is entropy-coded data
+            break
+
+        raw_length = f.read(2)
+        if len(raw_length) < 2:
+            break
+        length = struct.unpack(">H", raw_length)[0] - 2
+
+        if code in JPEG_SOF_MARKERS:
+            data = f.read(5)
+            result["height"], result["width"] = struct.unpack(">HH", data[1:5])
+            f.seek(length - 5, os.SEEK_CUR)
+        elif code == 0xE1:
+            data = f.read(length)
+            if data.startswith(b"Exif\x00\x00"):
+                _parse_exif(data, result)
+            elif data.startswith(XMP_JPEG_HEADER):
+                _parse_xmp(data[len(XMP_JPEG_HEADER):], result)
+        elif code == 0xFE:
+            data = f.read(length)
+            result["text"]["comment"] = data.rstrip(b"\x00").decode("utf-8", "replace")
+        else:
+            f.seek(length, os.SEEK_CUR)
+    return result
+
+
+# ============ GIF ============
+
+
+def _read_gif(f, result):
+    header = f.read(10)
+    if header[:6] not in (b"GIF87a", b"GIF89a"):
+        return result
+    result["format"] = "gif"
+    result["width"], result["height"] = struct.unpack("<HH", header[6:10])
+    return result
+
+
+READERS = {
+    ".png": _read_png,
+    ".webp": _read_webp,
+    ".jpg": _read_jpeg,
+    ".jpeg": _read_jpeg,
+    ".gif": _read_gif,
+}
+
+
+def read_media_metadata(full_path):
+    """
+    读取图片的 prompt、workflow、尺寸和透明通道信息
+    返回 {"format", "width", "height", "alpha", "prompt", "workflow", "text"}
+    """
+    ext = os.path.splitext(full_path)[1].lower()
+    reader = READERS.get(ext)
+    result = _empty_result()
+    if reader is None:
+        return result
+
+    with open(full_path, "rb") as f:
+        try:
+            return reader(f, result)
+        except (struct.error, IndexError, ValueError) as e:
+            # Truncated or malformed container: return what was read so far
+            logger.debug(f"Metadata parse stopped early for {full_path}: {e}")
+            return result
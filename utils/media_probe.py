@@ -0,0 +1,393 @@
+import os
+import sys
+import json
+import asyncio
+import multiprocessing
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .media_index import (
+    AUDIO_EXTENSIONS,
+    IMAGE_EXTENSIONS,
+    VIDEO_EXTENSIONS,
+    PROBE_VERSION,
+    get_media_index,
+    index_file,
+    sync_directory,
+)
+from .media_metadata import read_media_metadata
+from .disk_cache import DiskCache, file_identity
+from . import probe_worker, process_workers
+from .probe_worker import probe_av
+
+logger = logging.getLogger(__name__)
+
+# 媒体探测索引：图片尺寸/透明通道，音视频的时长、帧率、帧数、编码、声道和采样率。
+# 只读取文件头 / 容器参数，不解码任何帧；结果按 size + mtime 缓存在媒体索引中，由后台线程池填充。
+# input/output 之外的文件不在索引中，结果按文件标识 (路径/大小/mtime) 存入有配额的磁盘 LRU。
+
+# 视频探测结果必须包含的字段；缺少时 (旧版本写入的结果) 视为未命中重新探测
+REQUIRED_VIDEO_FIELDS = ("pix_fmt",)
+
+# GIF 在索引中归为图片，但 PMLoadVideo 把它当作视频加载，帧率/帧数按视频容器探测
+VIDEO_PROBE_EXTENSIONS = VIDEO_EXTENSIONS + (".gif",)
+
+PROBE_WORKERS = max(1, min(4, (os.cpu_count() or 2) // 2))
+PROCESS_PROBE_WORKERS = max(1, min(8, os.cpu_count() or 2))
+PROBE_TIMEOUT = 10.0
+# 子进程内的超时未能中断探测 (Windows 没有 SIGALRM，或卡在不可中断的调用中) 时，
+# 父进程再多等这么久后放弃该结果，并杀掉重建进程池
+PROBE_TIMEOUT_GRACE = 5.0
+# 索引之外的文件的探测结果缓存 (每条一个小 JSON 文件)
+PROBE_CACHE_BYTES = 16 * 2**20
+
+_pool = None
+_pool_lock = threading.Lock()
+_process_pool = None
+_probe_cache = None
+_probe_lock = threading.Lock()
+_probe_state = {"running": False, "probed": 0, "failed": 0}
+# 请求路径上的索引命中统计 (/pm/queryvideo/stats)
+_lookup_stats = {"hits": 0, "misses": 0}
+
+
+def _probe_image(full_path):
+    lower = full_path.lower()
+    info = {}
+    if lower.endswith((".png", ".jpg", ".jpeg", ".webp", ".gif")):
+        metadata = read_media_metadata(full_path)
+        info = {
+            "width": metadata.get("width"),
+            "height": metadata.get("height"),
+            "alpha": metadata.get("alpha"),
+            "codec": metadata.get("format"),
+        }
+    if not info.get("width"):
+        from PIL import Image
+
+        with Image.open(full_path) as img:
+            info = {
+                "width": img.width,
+                "height": img.height,
+                "alpha": "A" in img.getbands() or "transparency" in img.info,
+                "codec": (img.format or "").lower(),
+            }
+            if getattr(img, "n_frames", 1) > 1:
+                info["frames"] = img.n_frames
+    return {"type": "image", **info}
+
+
+def probe_media(full_path):
+    """读取文件头，返回媒体参数字典；不支持的文件返回空字典"""
+    lower = full_path.lower()
+    if lower.endswith(VIDEO_PROBE_EXTENSIONS):
+        try:
+            return probe_av(full_path, "video")
+        except Exception:
+            if not lower.endswith(IMAGE_EXTENSIONS):
+                raise
+    if lower.endswith(IMAGE_EXTENSIONS):
+        return _probe_image(full_path)
+    if lower.endswith(AUDIO_EXTENSIONS):
+        return probe_av(full_path, "audio")
+    return {}
+
+
+def _safe_probe(full_path):
+    try:
+        return probe_media(full_path)
+    except Exception as e:
+        logger.debug(f"Probe error ({full_path}): {e}")
+        return {}
+
+
+def _is_current(info):
+    if info is None:
+        return False
+    return info.get("type") != "video" or all(key in info for key in REQUIRED_VIDEO_FIELDS)
+
+
+def _count_lookup(hit):
+    with _probe_lock:
+        _lookup_stats["hits" if hit else "misses"] += 1
+
+
+def get_probe_stats():
+    with _probe_lock:
+        lookups = _lookup_stats["hits"] + _lookup_stats["misses"]
+        return {
+            **_lookup_stats,
+            "hit_rate": _lookup_stats["hits"] / lookups if lookups else None,
+            "background": dict(_probe_state),
+            "external_cache": _probe_cache.stats() if _probe_cache is not None else None,
+        }
+
+
+def get_probe_cache():
+    global _probe_cache
+    with _pool_lock:
+        if _probe_cache is None:
+            _probe_cache = DiskCache("probes", PROBE_CACHE_BYTES)
+        return _probe_cache
+
+
+def _load_external(name):
+    path = get_probe_cache().get(name)
+    if path is None:
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def _store_external(name, info):
+    try:
+        get_probe_cache().put_bytes(name, json.dumps(info).encode("utf-8"))
+    except OSError as e:
+        logger.debug(f"Probe cache write failed: {e}")
+
+
+def get_probe_info(root, base_dir, rel_path):
+    """
+    返回文件的探测信息；索引中的结果与当前 size / mtime 不一致时重新探测并写回
+    只读取文件头，适合在请求中直接调用 (放在线程里)
+    """
+    full_path = os.path.join(base_dir, rel_path)
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        return None
+
+    info = get_media_index().get_probe(root, rel_path, stat.st_mtime, stat.st_size)
+    _count_lookup(_is_current(info))
+    if _is_current(info):
+        return info
+
+    info = _safe_probe(full_path)
+    _store_probe((root, base_dir, rel_path), stat, info)
+    return info
+
+
+def _root_relative(full_path, roots):
+    """返回 (root, base_dir, rel_path)；不在任何 root 下时返回 None"""
+    full_path = os.path.abspath(full_path)
+    for root, base_dir in roots.items():
+        base_dir = os.path.abspath(base_dir)
+        try:
+            if os.path.commonpath([base_dir, full_path]) != base_dir:
+                continue
+        except ValueError:
+            continue
+        return root, base_dir, os.path.relpath(full_path, base_dir).replace("\\", "/")
+    return None
+
+
+def _cached_probe(full_path, roots):
+    """
+    只查缓存，返回 (info, key)；info 为 None 表示需要探测，探测后用 _store_cached(key, info) 写回。
+    位于 roots 下的文件查媒体索引，其余查磁盘 LRU
+    """
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        return {}, None
+    located = _root_relative(full_path, roots)
+    if located is not None:
+        info = get_media_index().get_probe(located[0], located[2], stat.st_mtime, stat.st_size)
+        key = (located, stat)
+    else:
+        key = f"{file_identity(full_path, 'probe', PROBE_VERSION)}.json"
+        info = _load_external(key)
+    if not _is_current(info):
+        info = None
+    _count_lookup(info is not None)
+    return info, key
+
+
+def _store_cached(key, info):
+    if isinstance(key, str):
+        _store_external(key, info)
+    elif key is not None:
+        _store_probe(*key, info)
+
+
+def _store_probe(located, stat, info):
+    root, base_dir, rel_path = located
+    index = get_media_index()
+    entry = index.lookup(root, rel_path)
+    if entry is not None and entry[1] == stat.st_size and entry[2] == stat.st_mtime:
+        file_id = entry[0]
+    else:
+        file_id = index_file(index, root, base_dir, rel_path)
+    if file_id is not None:
+        index.set_probe(file_id, stat.st_mtime, info)
+
+
+def probe_file(full_path, roots):
+    """按绝对路径查询；位于 roots ({root: base_dir}) 下的文件走索引缓存，其余走磁盘 LRU"""
+    info, key = _cached_probe(full_path, roots)
+    if info is None:
+        info = _safe_probe(full_path)
+        _store_cached(key, info)
+    return info
+
+
+# ============ Batch Probe (Process Pool) ============
+
+
+def _get_process_pool():
+    """
+    容器解析在子进程中进行，不占用事件循环或 GIL。
+    子进程用 spawn 启动，不会 fork 出整个 ComfyUI 服务进程
+    """
+    global _process_pool
+    with _pool_lock:
+        if _process_pool is None:
+            code = process_workers.register(probe_worker)
+            _process_pool = ProcessPoolExecutor(
+                max_workers=PROCESS_PROBE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=exec,
+                initargs=(code,),
+            )
+        return _process_pool
+
+
+def _reset_process_pool(pool, kill=False):
+    """
+    子进程崩溃后进程池不可再用：丢弃它，下次使用时重建。
+    kill 为 True 时同时杀掉其子进程：卡在 C 代码中 (av.open / 解复用停滞的文件) 的探测
+    收不到 SIGALRM，不杀掉就会一直占着一个子进程
+    """
+    global _process_pool
+    with _pool_lock:
+        if _process_pool is pool:
+            _process_pool = None
+    if not kill:
+        pool.shutdown(wait=False, cancel_futures=True)
+        return
+    kill_workers = getattr(pool, "kill_workers", None)  # Python 3.14+
+    if kill_workers is not None:
+        kill_workers()
+        return
+    processes = list((getattr(pool, "_processes", None) or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        try:
+            process.kill()
+        except Exception:
+            pass
+
+
+async def probe_videos(paths, roots, timeout=PROBE_TIMEOUT):
+    """
+    批量探测视频：缓存命中直接返回，未命中的文件在进程池中并发探测，每个文件单独超时
+    返回 {path: info}；失败或超时的文件为空字典
+    """
+    results = {}
+    misses = []
+    for path in dict.fromkeys(paths):
+        info, key = await asyncio.to_thread(_cached_probe, path, roots)
+        if info is not None:
+            results[path] = info
+        else:
+            misses.append((path, key))
+    if not misses:
+        return results
+
+    loop = asyncio.get_running_loop()
+    # 超时只计算实际运行时间，不包括排队时间
+    slots = asyncio.Semaphore(PROCESS_PROBE_WORKERS)
+
+    async def run(path, key):
+        # 进程池因其他文件超时被重建时，同批正在运行的探测在新进程池中重试一次
+        for _ in range(2):
+            pool = None
+            try:
+                async with slots:
+                    pool = await asyncio.to_thread(_get_process_pool)
+                    worker = sys.modules[probe_worker.MODULE_NAME].probe_video
+                    info, error = await asyncio.wait_for(
+                        loop.run_in_executor(pool, worker, path, timeout),
+                        timeout + PROBE_TIMEOUT_GRACE,
+                    )
+            except asyncio.TimeoutError:
+                # 子进程没能自行中断：杀掉并重建进程池，否则这个子进程永远不会空闲
+                logger.warning(f"Probe timed out after {timeout}s: {path}")
+                _reset_process_pool(pool, kill=True)
+                return path, {}
+            except (BrokenProcessPool, RuntimeError) as e:
+                # RuntimeError: 提交时进程池已被关闭
+                logger.debug(f"Probe error ({path}): {e}")
+                if pool is not None:
+                    _reset_process_pool(pool)
+                continue
+            except Exception as e:
+                logger.debug(f"Probe error ({path}): {e}")
+                return path, {}
+            if error:
+                logger.debug(f"Probe error ({path}): {error}")
+            await asyncio.to_thread(_store_cached, key, info)
+            return path, info
+        return path, {}
+
+    for path, info in await asyncio.gather(*(run(*miss) for miss in misses)):
+        results[path] = info
+    return results
+
+
+# ============ Background Probe Pool ============
+
+
+def get_probe_state():
+    with _probe_lock:
+        return dict(_probe_state)
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=PROBE_WORKERS, thread_name_prefix="pm-probe")
+        return _pool
+
+
+def probe_pending(roots, batch_size=64):
+    """为 roots ({root: base_dir}) 中尚未探测或已过期的文件并行探测"""
+    index = get_media_index()
+    pool = _get_pool()
+    for root, base_dir in roots.items():
+        sync_directory(root, base_dir)
+        while True:
+            rows = index.files_missing_probes(root, batch_size)
+            if not rows:
+                break
+            paths = [os.path.join(base_dir, rel_path) for _, rel_path, _ in rows]
+            for (file_id, _, mtime), info in zip(rows, pool.map(_safe_probe, paths)):
+                index.set_probe(file_id, mtime, info, commit=False)
+                with _probe_lock:
+                    _probe_state["probed" if info else "failed"] += 1
+            index.commit()
+
+
+def schedule_probe(roots):
+    with _probe_lock:
+        if _probe_state["running"]:
+            return False
+        _probe_state["running"] = True
+
+    def worker():
+        try:
+            probe_pending(roots)
+        except Exception as e:
+            logger.error(f"PM media probe error: {e}")
+        finally:
+            with _probe_lock:
+                _probe_state["running"] = False
+
+    threading.Thread(target=worker, name="pm-media-probe", daemon=True).start()
+    return True
@@ -0,0 +1,92 @@
+import signal
+
+# 独立模块：不使用包内相对导入，进程池的子进程 (spawn) 可以按文件路径单独加载
+# (见 process_workers)，而不必导入整个节点包 (后者依赖 server / folder_paths)。
+
+ALPHA_PIX_FMTS = ("yuva", "rgba", "bgra", "argb", "abgr", "gbrap", "ya")
+MODULE_NAME = "pm_probe_worker"
+
+
+def probe_av(full_path, kind):
+    import av
+
+    info = {"type": kind}
+    with av.open(full_path) as container:
+        if container.duration is not None:
+            info["duration"] = float(container.duration / av.time_base)
+
+        if container.streams.video:
+            stream = container.streams.video[0]
+            codec = stream.codec_context
+            info["width"] = codec.width
+            info["height"] = codec.height
+            info["codec"] = codec.name
+            info["pix_fmt"] = codec.pix_fmt
+            if stream.average_rate:
+                info["fps"] = float(stream.average_rate)
+            # libvpx 的透明通道存放在单独的 side data 中，像素格式不含 alpha
+            info["alpha"] = (codec.pix_fmt or "").startswith(ALPHA_PIX_FMTS) or (
+                stream.metadata.get("alpha_mode") == "1"
+            )
+            frames = stream.frames or stream.metadata.get("NUMBER_OF_FRAMES")
+            if not frames and "duration" in info and "fps" in info:
+                frames = round(info["duration"] * info["fps"])
+            if frames:
+                info["frames"] = int(frames)
+            if stream.duration is not None and stream.time_base is not None:
+                info.setdefault("duration", float(stream.duration * stream.time_base))
+        else:
+            info["type"] = "audio"
+
+        if container.streams.audio:
+            stream = container.streams.audio[0]
+            codec = stream.codec_context
+            info["audio_codec"] = codec.name
+            info["channels"] = codec.channels
+            info["sample_rate"] = codec.sample_rate
+            if "duration" not in info and stream.duration is not None:
+                info["duration"] = float(stream.duration * stream.time_base)
+    return info
+
+
+def keyframe_before(full_path, seconds):
+    """返回不晚于 seconds 的最近关键帧时间 (秒)，用于判断能否无重编码裁剪"""
+    try:
+        import av
+
+        with av.open(full_path) as container:
+            stream = container.streams.video[0]
+            offset = stream.start_time or 0
+            target = int(seconds / stream.time_base) + offset
+            container.seek(target, stream=stream, backward=True, any_frame=False)
+            for packet in container.demux(stream):
+                if packet.pts is None:
+                    continue
+                if packet.is_keyframe:
+                    return float((packet.pts - offset) * stream.time_base)
+    except Exception:
+        pass
+    return None
+
+
+def _raise_timeout(signum, frame):
+    raise TimeoutError("probe timed out")
+
+
+def probe_video(full_path, timeout=None):
+    """
+    进程池入口：返回 (info, error)，异常不跨进程抛出。
+    timeout 在子进程内用 SIGALRM 计时 (仅 POSIX)，超时只中断本次探测，子进程继续处理后续任务
+    """
+    alarm = bool(timeout) and hasattr(signal, "setitimer")
+    if alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return probe_av(full_path, "video"), None
+    except Exception as e:
+        return {}, str(e)
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
@@ -0,0 +1,29 @@
+import os
+import sys
+
+# 进程池加载独立模块 (probe_worker / decode_worker) 的公共部分：这些模块不使用包内相对导入，
+# 子进程 (spawn) 以固定的顶层模块名 (模块的 MODULE_NAME) 按文件路径加载它们，
+# 不必导入依赖 ComfyUI 的节点包，任务函数也能被反序列化。
+
+
+def registration_code(module):
+    """子进程初始化时执行的代码：以 module.MODULE_NAME 注册 module 所在的文件"""
+    name = module.MODULE_NAME
+    return (
+        "import importlib.util, sys\n"
+        f"spec = importlib.util.spec_from_file_location({name!r}, {os.path.abspath(module.__file__)!r})\n"
+        "module = importlib.util.module_from_spec(spec)\n"
+        f"sys.modules[{name!r}] = module\n"
+        "spec.loader.exec_module(module)\n"
+    )
+
+
+def register(module):
+    """
+    在当前进程也以同名注册并返回初始化代码 (作为 ProcessPoolExecutor 的 initargs)。
+    提交的任务函数须取自 sys.modules[module.MODULE_NAME]，才能按该模块名序列化
+    """
+    code = registration_code(module)
+    if module.MODULE_NAME not in sys.modules:
+        exec(code, {})
+    return code
@@ -0,0 +1,287 @@
+import os
+import json
+import time
+import shutil
+import logging
+import threading
+
+from .helpers import get_pm_cache_dir
+from .media_index import get_media_index, index_file, schedule_sync
+
+logger = logging.getLogger(__name__)
+
+# 输出目录保留策略：按文件夹设置最长保留时间、最大占用空间，可保留星标文件。
+# 规划只基于媒体索引中的大小/时间聚合 (由输出事件和浏览请求维护)，不遍历目录；
+# 删除时发现已消失或已被覆盖的文件就地修正索引。预估接口只在后台触发同步。
+# 删除在后台线程分批限速进行。星标文件保留时不计入配额。
+
+DEFAULT_CONFIG = {
+    "enabled": False,
+    "interval_seconds": 600,
+    "batch_size": 50,
+    "batch_pause_seconds": 0.5,
+    # 磁盘剩余空间低于此值时，从最旧的非星标输出开始清理 (0 = 不检查)
+    "min_free_bytes": 0,
+    "policies": [
+        # {"folder": "", "max_age_days": 30, "max_bytes": 500 * 2**30, "keep_starred": True}
+    ],
+}
+
+DAY = 86400
+
+
+def _config_path():
+    return os.path.join(get_pm_cache_dir(), "retention.json")
+
+
+def load_retention_config():
+    config = json.loads(json.dumps(DEFAULT_CONFIG))
+    try:
+        with open(_config_path(), "r", encoding="utf-8") as f:
+            config.update(json.load(f))
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.error(f"Load retention config error: {e}")
+    return config
+
+
+def normalize_policy(policy):
+    return {
+        "folder": str(policy.get("folder") or "").replace("\\", "/").strip("/"),
+        "max_age_days": float(policy["max_age_days"]) if policy.get("max_age_days") else None,
+        "max_bytes": int(policy["max_bytes"]) if policy.get("max_bytes") else None,
+        "keep_starred": bool(policy.get("keep_starred", True)),
+    }
+
+
+def save_retention_config(config):
+    merged = load_retention_config()
+    for key in DEFAULT_CONFIG:
+        if key in config:
+            merged[key] = config[key]
+    merged["policies"] = [normalize_policy(p) for p in merged.get("policies", [])]
+    with open(_config_path(), "w", encoding="utf-8") as f:
+        json.dump(merged, f, indent=2)
+    return merged
+
+
+def plan_policy(index, root, policy, now=None):
+    """
+    计算单条策略需要删除的文件 (从旧到新)
+    返回 (candidates, usage)，candidates 为 [(path, size, mtime)]
+    """
+    policy = normalize_policy(policy)
+    now = now or time.time()
+    folder = policy["folder"]
+    usage = index.folder_usage(root, folder)
+    include_starred = not policy["keep_starred"]
+
+    cutoff = now - policy["max_age_days"] * DAY if policy["max_age_days"] else None
+    # 保留的星标文件不会被删除，也不计入配额；否则星标文件本身超过配额时会清空所有非星标文件
+    remaining = quota_usage(usage, policy)
+    candidates = []
+
+    for path, size, mtime, starred in index.iter_oldest(root, folder, include_starred):
+        expired = cutoff is not None and mtime < cutoff
+        over_quota = policy["max_bytes"] is not None and remaining > policy["max_bytes"]
+        if not expired and not over_quota:
+            # 按时间排序：之后的文件既不会过期，也不需要再为配额删除
+            break
+        candidates.append((path, size, mtime))
+        remaining -= size
+
+    return candidates, usage
+
+
+def quota_usage(usage, policy):
+    """计入配额的字节数"""
+    if policy["keep_starred"]:
+        return usage["bytes"] - usage["starred_bytes"]
+    return usage["bytes"]
+
+
+def plan_free_space(index, root, base_dir, min_free_bytes, exclude):
+    if not min_free_bytes:
+        return []
+    try:
+        free = shutil.disk_usage(base_dir).free
+    except OSError:
+        return []
+    needed = min_free_bytes - free
+    candidates = []
+    for path, size, mtime, _ in index.iter_oldest(root):
+        if needed <= 0:
+            break
+        if path in exclude:
+            continue
+        candidates.append((path, size, mtime))
+        needed -= size
+    return candidates
+
+
+def build_projection(root, base_dir, config=None, now=None, sync=True):
+    """
+    预估：每条策略当前占用、将被清理的文件和空间、按近 7 天增长速度达到配额的天数。
+    sync 为 True 时在后台触发索引同步 (受 RESYNC_INTERVAL 限制)，本次结果基于当前索引
+    """
+    config = config or load_retention_config()
+    if sync:
+        schedule_sync(root, base_dir)
+    index = get_media_index()
+    now = now or time.time()
+    planned = {}
+    policies = []
+
+    for policy in config.get("policies", []):
+        policy = normalize_policy(policy)
+        candidates, usage = plan_policy(index, root, policy, now)
+        for path, size, mtime in candidates:
+            planned[path] = (size, mtime)
+
+        recent = index.folder_usage(root, policy["folder"], since=now - 7 * DAY)
+        daily_growth = recent["bytes"] / 7
+        purge_bytes = sum(size for _, size, _ in candidates)
+        after = usage["bytes"] - purge_bytes
+        days_to_quota = None
+        if policy["max_bytes"] and daily_growth > 0:
+            counted = quota_usage(usage, policy) - purge_bytes
+            days_to_quota = max(0.0, (policy["max_bytes"] - counted) / daily_growth)
+
+        policies.append(
+            {
+                **policy,
+                "usage": usage,
+                "purge_files": len(candidates),
+                "purge_bytes": purge_bytes,
+                "bytes_after_purge": after,
+                "daily_growth_bytes": daily_growth,
+                "days_until_quota": days_to_quota,
+            }
+        )
+
+    free_space = plan_free_space(index, root, base_dir, config.get("min_free_bytes"), planned)
+    for path, size, mtime in free_space:
+        planned[path] = (size, mtime)
+
+    try:
+        disk = shutil.disk_usage(base_dir)
+        disk_info = {"total": disk.total, "free": disk.free}
+    except OSError:
+        disk_info = None
+
+    return {
+        "policies": policies,
+        "free_space_purge_files": len(free_space),
+        "total_purge_files": len(planned),
+        "total_purge_bytes": sum(size for size, _ in planned.values()),
+        "disk": disk_info,
+        "planned": planned,
+    }
+
+
+class RetentionWorker:
+    def __init__(self, root, get_base_dir):
+        self.root = root
+        self.get_base_dir = get_base_dir
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.status = {
+            "running": False,
+            "last_run": None,
+            "last_error": None,
+            "last_deleted_files": 0,
+            "last_reclaimed_bytes": 0,
+            "total_deleted_files": 0,
+            "total_reclaimed_bytes": 0,
+        }
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._loop, name="pm-output-retention", daemon=True
+                )
+                self._thread.start()
+
+    def trigger(self):
+        self.start()
+        self._wake.set()
+
+    def _loop(self):
+        while True:
+            config = load_retention_config()
+            self._wake.wait(timeout=max(30, float(config.get("interval_seconds", 600))))
+            forced = self._wake.is_set()
+            self._wake.clear()
+            config = load_retention_config()
+            if not config.get("enabled") and not forced:
+                continue
+            try:
+                self.run_once(config)
+            except Exception as e:
+                logger.error(f"Retention run error: {e}")
+                self.status["last_error"] = str(e)
+
+    def run_once(self, config):
+        base_dir = self.get_base_dir()
+        index = get_media_index()
+        planned = build_projection(self.root, base_dir, config, sync=False)["planned"]
+        batch_size = max(1, int(config.get("batch_size", 50)))
+        pause = max(0.0, float(config.get("batch_pause_seconds", 0.5)))
+
+        self.status["running"] = True
+        deleted = 0
+        reclaimed = 0
+        try:
+            paths = list(planned.items())
+            for start in range(0, len(paths), batch_size):
+                removed = []
+                for rel_path, (size, mtime) in paths[start:start + batch_size]:
+                    full_path = os.path.join(base_dir, rel_path)
+                    try:
+                        # 索引过期 (文件已被覆盖) 时不删除，只更新这一条索引，下次运行按新的时间规划
+                        stat = os.stat(full_path)
+                        if stat.st_size != size or abs(stat.st_mtime - mtime) > 1e-3:
+                            index_file(index, self.root, base_dir, rel_path)
+                            continue
+                        os.remove(full_path)
+                        deleted += 1
+                        reclaimed += size
+                    except FileNotFoundError:
+                        # 已在索引之外被删除：移出索引
+                        pass
+                    except OSError as e:
+                        logger.warning(f"Retention could not delete {full_path}: {e}")
+                        continue
+                    removed.append(rel_path)
+                index.remove_paths(self.root, removed)
+                if pause and start + batch_size < len(paths):
+                    time.sleep(pause)
+        finally:
+            self.status.update(
+                {
+                    "running": False,
+                    "last_run": time.time(),
+                    "last_error": None,
+                    "last_deleted_files": deleted,
+                    "last_reclaimed_bytes": reclaimed,
+                }
+            )
+            self.status["total_deleted_files"] += deleted
+            self.status["total_reclaimed_bytes"] += reclaimed
+
+        if deleted:
+            logger.info(f"PM retention removed {deleted} output files ({reclaimed} bytes)")
+        return deleted, reclaimed
+
+
+_worker = None
+
+
+def get_retention_worker(root="output", get_base_dir=None):
+    global _worker
+    if _worker is None:
+        _worker = RetentionWorker(root, get_base_dir)
+    return _worker
@@ -0,0 +1,250 @@
+import os
+import logging
+import threading
+
+from .image_hash import BKTree, compute_hashes, hamming
+from .media_index import IMAGE_EXTENSIONS, get_media_index, index_file, schedule_sync
+
+logger = logging.getLogger(__name__)
+
+HASH_KINDS = ("phash", "dhash")
+
+# BK 树只增不删：文件删除、重新计算哈希或 rowid 被复用后旧节点仍留在树中，
+# 查询结果要对照数据库中的当前哈希过滤；失效节点累计超过树大小的这一比例时丢弃重建
+STALE_REBUILD_RATIO = 0.25
+
+_trees = {}
+_stale = {}
+_tree_lock = threading.Lock()
+_hash_lock = threading.Lock()
+_hash_state = {"running": False, "hashed": 0, "failed": 0}
+
+
+# ============ Hash Worker ============
+
+
+def get_hash_state():
+    with _hash_lock:
+        return dict(_hash_state)
+
+
+def _add_to_trees(file_id, dhash, phash):
+    with _tree_lock:
+        for kind, value in (("dhash", dhash), ("phash", phash)):
+            tree = _trees.get(kind)
+            if tree is not None:
+                tree.add(value, file_id)
+
+
+def hash_pending(roots, batch_size=100):
+    """为索引中尚无哈希的图片计算 dHash/pHash；roots 为 {root: base_dir}"""
+    index = get_media_index()
+    for root, base_dir in roots.items():
+        # 后台同步目录 (受 RESYNC_INTERVAL 限制)，input/ 等未被输出事件覆盖的目录也会进入索引；
+        # 本轮只处理已在索引中的文件，新文件在下一次请求时补上
+        schedule_sync(root, base_dir)
+        while True:
+            rows = index.files_missing_hashes(root, batch_size)
+            if not rows:
+                break
+            for file_id, rel_path in rows:
+                try:
+                    dhash, phash = compute_hashes(os.path.join(base_dir, rel_path))
+                except Exception as e:
+                    logger.debug(f"Hash error ({rel_path}): {e}")
+                    index.set_hashes(file_id, None, None, commit=False)
+                    with _hash_lock:
+                        _hash_state["failed"] += 1
+                    continue
+                index.set_hashes(file_id, dhash, phash, commit=False)
+                _add_to_trees(file_id, dhash, phash)
+                with _hash_lock:
+                    _hash_state["hashed"] += 1
+            index.commit()
+
+
+def schedule_hashing(roots):
+    with _hash_lock:
+        if _hash_state["running"]:
+            return False
+        _hash_state["running"] = True
+
+    def worker():
+        try:
+            hash_pending(roots)
+        except Exception as e:
+            logger.error(f"PM perceptual hash error: {e}")
+        finally:
+            with _hash_lock:
+                _hash_state["running"] = False
+
+    threading.Thread(target=worker, name="pm-image-hash", daemon=True).start()
+    return True
+
+
+def ensure_hashes(root, base_dir, rel_path):
+    """查询的图片尚未计算哈希时立即计算"""
+    if not rel_path.lower().endswith(IMAGE_EXTENSIONS):
+        return None
+    index = get_media_index()
+    hashes = index.get_hashes(root, rel_path)
+    if hashes is not None:
+        return hashes
+    file_id = index_file(index, root, base_dir, rel_path)
+    if file_id is None:
+        return None
+    try:
+        dhash, phash = compute_hashes(os.path.join(base_dir, rel_path))
+    except Exception as e:
+        logger.debug(f"Hash error ({rel_path}): {e}")
+        return None
+    index.set_hashes(file_id, dhash, phash)
+    _add_to_trees(file_id, dhash, phash)
+    return {"id": file_id, "dhash": dhash, "phash": phash}
+
+
+# ============ Queries ============
+
+
+def get_tree(kind):
+    with _tree_lock:
+        tree = _trees.get(kind)
+        if tree is None:
+            tree = BKTree()
+            for file_id, value in get_media_index().iter_hashes(kind):
+                tree.add(value, file_id)
+            _trees[kind] = tree
+        return tree
+
+
+def _query(tree, value, max_distance):
+    with _tree_lock:
+        return tree.query(value, max_distance)
+
+
+def _mark_stale(kind, count):
+    """记录失效节点数，过多时丢弃该树，下次 get_tree 从数据库重建"""
+    if not count:
+        return
+    with _tree_lock:
+        tree = _trees.get(kind)
+        if tree is None:
+            return
+        _stale[kind] = _stale.get(kind, 0) + count
+        if _stale[kind] > tree.size * STALE_REBUILD_RATIO:
+            _trees.pop(kind, None)
+            _stale.pop(kind, None)
+
+
+def _verified(matches, value, current):
+    """
+    只保留与数据库当前哈希一致的命中：current 为 {file_id: 当前哈希}。
+    节点距离与按当前哈希算出的距离不同说明该节点已失效；同一文件只保留一次。
+    返回 (有效命中, 失效节点数)
+    """
+    results = []
+    seen = set()
+    stale = 0
+    for distance, file_id in matches:
+        current_value = current.get(file_id)
+        if current_value is None or hamming(value, current_value) != distance:
+            stale += 1
+            continue
+        if file_id in seen:
+            continue
+        seen.add(file_id)
+        results.append((distance, file_id))
+    return results, stale
+
+
+def find_similar(root, base_dir, path, max_distance=8, kind="phash", roots=None, limit=100):
+    """返回与指定图片相似的文件 (不含自身)；已删除的条目会被过滤掉"""
+    index = get_media_index()
+    hashes = ensure_hashes(root, base_dir, path)
+    if hashes is None:
+        return None
+
+    value = hashes[kind]
+    matches = _query(get_tree(kind), value, max_distance)
+    current = index.get_hash_values({file_id for _, file_id in matches}, kind)
+    matches, stale = _verified(matches, value, current)
+    _mark_stale(kind, stale)
+    matches = [(d, file_id) for d, file_id in matches if file_id != hashes["id"]]
+    described = index.describe_files(file_id for _, file_id in matches[: limit * 2])
+
+    results = []
+    for distance, file_id in matches:
+        info = described.get(file_id)
+        if info is None or (roots and info["root"] not in roots):
+            continue
+        results.append({**info, "distance": distance})
+        if len(results) >= limit:
+            break
+    return results
+
+
+def duplicate_groups(max_distance=4, kind="phash", roots=None, limit=100):
+    """
+    近似重复报告：用 BK 树为每张图找半径内的邻居，再用并查集合并成组
+    每组保留星标或最新的文件，其余计入可回收空间
+    """
+    index = get_media_index()
+    tree = get_tree(kind)
+    values = list(index.iter_hashes(kind))
+    current = dict(values)
+
+    parent = {}
+
+    def find(x):
+        while parent.get(x, x) != x:
+            parent[x] = parent.get(parent[x], parent[x])
+            x = parent[x]
+        return x
+
+    stale = 0
+    for file_id, value in values:
+        matches, dropped = _verified(_query(tree, value, max_distance), value, current)
+        stale = max(stale, dropped)
+        for _, other in matches:
+            if other != file_id:
+                a, b = find(file_id), find(other)
+                if a != b:
+                    parent[max(a, b)] = min(a, b)
+
+    # 每个失效节点会在多次查询中重复出现，取单次查询的最大值作为估计
+    _mark_stale(kind, stale)
+
+    clusters = {}
+    for file_id in parent:
+        clusters.setdefault(find(file_id), set()).add(file_id)
+    for root_id in list(clusters):
+        clusters[root_id].add(root_id)
+
+    groups = []
+    for members in clusters.values():
+        described = index.describe_files(members)
+        files = [
+            {**info, "id": file_id}
+            for file_id, info in described.items()
+            if not roots or info["root"] in roots
+        ]
+        if len(files) < 2:
+            continue
+        files.sort(key=lambda f: (not f["starred"], -f["mtime"]))
+        keep = files[0]
+        for f in files:
+            f["keep"] = f is keep or f["starred"]
+            del f["id"]
+        groups.append(
+            {
+                "files": files,
+                "reclaimable_bytes": sum(f["size_bytes"] for f in files if not f["keep"]),
+            }
+        )
+
+    groups.sort(key=lambda g: g["reclaimable_bytes"], reverse=True)
+    return {
+        "groups": groups[:limit],
+        "group_count": len(groups),
+        "reclaimable_bytes": sum(g["reclaimable_bytes"] for g in groups),
+    }
@@ -0,0 +1,55 @@
+import logging
+import threading
+
+from .disk_cache import DiskCache, file_identity
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = 320
+THUMBNAIL_CACHE_BYTES = 2 * 2**30
+THUMBNAIL_IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".gif", ".bmp", ".tiff", ".tif")
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_thumbnail_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DiskCache("thumbnails", THUMBNAIL_CACHE_BYTES)
+        return _cache
+
+
+def thumbnail_name(full_path, size=THUMBNAIL_SIZE):
+    return f"{file_identity(full_path, size)}.webp"
+
+
+def get_cached_thumbnail(full_path, size=THUMBNAIL_SIZE):
+    return get_thumbnail_cache().get(thumbnail_name(full_path, size))
+
+
+def make_thumbnail(full_path, size=THUMBNAIL_SIZE):
+    """生成 (或读取缓存的) WebP 缩略图，返回缓存文件路径；不支持的格式返回 None"""
+    if not full_path.lower().endswith(THUMBNAIL_IMAGE_EXTENSIONS):
+        return None
+
+    cache = get_thumbnail_cache()
+    name = thumbnail_name(full_path, size)
+    cached = cache.get(name)
+    if cached is not None:
+        return cached
+
+    from PIL import Image, ImageOps
+
+    with Image.open(full_path) as img:
+        # JPEG 可以在解码时直接按 1/2^n 缩小
+        img.draft("RGB", (size, size))
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+        img.thumbnail((size, size), Image.Resampling.BILINEAR)
+
+        temp_path = cache.temp_path(name)
+        img.save(temp_path, "WEBP", quality=80, method=4)
+    return cache.put(name, temp_path)
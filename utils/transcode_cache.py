@@ -0,0 +1,45 @@
+import json
+import threading
+
+from .disk_cache import DiskCache, file_identity
+
+# /pm/viewvideo 预览转码结果缓存：键为源文件标识 + 规范化后的转码参数，
+# 相同参数再次预览时直接作为静态文件返回 (支持 Range 请求)。
+
+TRANSCODE_CACHE_BYTES = 4 * 2**30
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_transcode_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DiskCache("transcodes", TRANSCODE_CACHE_BYTES)
+        return _cache
+
+
+def _number(query, key, default, cast):
+    try:
+        return cast(float(query.get(key, default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def normalize_transcode_params(query):
+    """只保留影响输出的参数 (忽略前端附加的时间戳等)，并统一数值格式"""
+    params = {
+        "force_rate": _number(query, "force_rate", 0, float),
+        "force_size": str(query.get("force_size", "Disabled")),
+        "frame_load_cap": max(0, _number(query, "frame_load_cap", 0, int)),
+        "skip_first_frames": max(0, _number(query, "skip_first_frames", 0, int)),
+        "select_every_nth": max(1, _number(query, "select_every_nth", 1, int)),
+    }
+    if "start_time" in query:
+        params["start_time"] = _number(query, "start_time", 0, float)
+    return params
+
+
+def transcode_name(full_path, params, extension="webm"):
+    return f"{file_identity(full_path, json.dumps(params, sort_keys=True))}.{extension}"
@@ -0,0 +1,112 @@
+import os
+import time
+import asyncio
+import logging
+import contextlib
+
+logger = logging.getLogger(__name__)
+
+# 预览转码的准入控制：全局并发上限，排队请求按后进先出唤醒 (最近打开的预览优先)，
+# 排队期间客户端断开则直接放弃，不再启动 ffmpeg。
+
+TRANSCODE_CONCURRENCY = max(1, min(4, (os.cpu_count() or 4) // 4))
+DISCONNECT_POLL_SECONDS = 0.5
+
+
+class ClientGone(Exception):
+    pass
+
+
+def client_gone(request):
+    """后台任务 (request 为 None) 视为始终在线"""
+    if request is None:
+        return False
+    transport = request.transport
+    return transport is None or transport.is_closing()
+
+
+class TranscodeScheduler:
+    def __init__(self, limit=TRANSCODE_CONCURRENCY):
+        self.limit = limit
+        self.active = 0
+        self._waiters = []
+        self.metrics = {
+            "started": 0,
+            "completed": 0,
+            "abandoned_in_queue": 0,
+            "killed_on_disconnect": 0,
+            "total_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+        }
+
+    async def acquire(self, request):
+        queued_at = time.monotonic()
+        if self.active >= self.limit or self._waiters:
+            future = asyncio.get_running_loop().create_future()
+            self._waiters.append(future)
+            try:
+                while True:
+                    try:
+                        await asyncio.wait_for(asyncio.shield(future), DISCONNECT_POLL_SECONDS)
+                        break
+                    except asyncio.TimeoutError:
+                        if client_gone(request):
+                            self.metrics["abandoned_in_queue"] += 1
+                            raise ClientGone()
+            except BaseException:
+                if future.done() and not future.cancelled():
+                    # 已分配到名额但不再使用，交给下一个请求
+                    self.release(completed=False)
+                else:
+                    future.cancel()
+                    if future in self._waiters:
+                        self._waiters.remove(future)
+                raise
+        else:
+            self.active += 1
+
+        waited = time.monotonic() - queued_at
+        self.metrics["started"] += 1
+        self.metrics["total_wait_seconds"] += waited
+        self.metrics["max_wait_seconds"] = max(self.metrics["max_wait_seconds"], waited)
+
+    def release(self, completed=True):
+        if completed:
+            self.metrics["completed"] += 1
+        self.active -= 1
+        while self._waiters and self.active < self.limit:
+            future = self._waiters.pop()
+            if not future.done():
+                self.active += 1
+                future.set_result(None)
+
+    def has_capacity(self):
+        return self.active < self.limit and not any(not w.done() for w in self._waiters)
+
+    @contextlib.asynccontextmanager
+    async def slot(self, request):
+        await self.acquire(request)
+        try:
+            yield self
+        finally:
+            self.release()
+
+    def stats(self):
+        started = self.metrics["started"]
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queued": sum(1 for waiter in self._waiters if not waiter.done()),
+            **self.metrics,
+            "avg_wait_seconds": self.metrics["total_wait_seconds"] / started if started else 0.0,
+        }
+
+
+_scheduler = None
+
+
+def get_transcode_scheduler():
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = TranscodeScheduler()
+    return _scheduler
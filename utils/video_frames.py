@@ -0,0 +1,75 @@
+import logging
+
+from .disk_cache import file_identity
+from .thumbnails import get_thumbnail_cache
+
+logger = logging.getLogger(__name__)
+
+# 单帧提取：seek 到目标时间之前最近的关键帧，再向前解码到精确时间，
+# 不需要把整段视频经由 /pm/viewvideo 转码传输。结果按 (文件标识, 时间, 尺寸, 格式) 缓存。
+
+FRAME_FORMATS = {"jpeg": ("JPEG", "jpg"), "webp": ("WEBP", "webp")}
+
+
+def frame_name(full_path, t, size, fmt):
+    return f"{file_identity(full_path, 'frame', f'{t:.3f}', size)}.{FRAME_FORMATS[fmt][1]}"
+
+
+def decode_frame_at(full_path, t):
+    """返回时间 t (秒) 处的帧 (PIL Image)；超出时长时返回最后一帧"""
+    import av
+
+    with av.open(full_path) as container:
+        stream = container.streams.video[0]
+        if stream.codec_context.name == "vp9":
+            # libvpx 解码器保留透明通道
+            decoder = av.Codec("libvpx-vp9", "r").create()
+        else:
+            decoder = None
+        offset = stream.start_time or 0
+        target = int(t / stream.time_base) + offset
+        container.seek(target, stream=stream, backward=True, any_frame=False)
+
+        def frames():
+            for packet in container.demux(stream):
+                if decoder is None:
+                    yield from packet.decode()
+                else:
+                    yield from decoder.decode(packet)
+
+        last = None
+        for frame in frames():
+            if frame.pts is not None and frame.pts > target and last is not None:
+                # 已越过目标时间：上一帧覆盖 t
+                break
+            last = frame
+            if frame.pts is not None and frame.pts == target:
+                break
+        if last is None:
+            raise ValueError("No frame decoded")
+        if last.format.name.startswith(("yuva", "rgba", "bgra", "argb", "abgr", "gbrap")):
+            from PIL import Image
+
+            return Image.fromarray(last.to_ndarray(format="rgba"), "RGBA")
+        return last.to_image()
+
+
+def extract_frame(full_path, t, size=0, fmt="jpeg"):
+    """返回缓存中的帧图片路径；size 为最长边上限 (0 = 原尺寸)"""
+    t = max(0.0, round(float(t), 3))
+    cache = get_thumbnail_cache()
+    name = frame_name(full_path, t, size, fmt)
+    cached = cache.get(name)
+    if cached is not None:
+        return cached
+
+    image = decode_frame_at(full_path, t)
+    if size:
+        image.thumbnail((size, size))
+    pil_format = FRAME_FORMATS[fmt][0]
+    if pil_format == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGB")
+
+    temp_path = cache.temp_path(name)
+    image.save(temp_path, pil_format, quality=90)
+    return cache.put(name, temp_path)
@@ -0,0 +1,210 @@
+import os
+import json
+import queue
+import logging
+import threading
+import subprocess
+import time
+
+from .ffmpeg import ffmpeg_path
+from .probe_worker import probe_av
+from .thumbnails import THUMBNAIL_SIZE, get_thumbnail_cache
+from .disk_cache import file_identity
+
+logger = logging.getLogger(__name__)
+
+# 视频封面帧和悬停预览雪碧图：一次 ffmpeg 调用，N 个按时间点 -ss 的输入各取一帧，
+# 拼成 N 列的横向雪碧图，同时输出第一帧作为封面。结果 (连同雪碧图布局) 存入缩略图缓存，
+# 命中时不再打开视频。文件本身无法解码的失败也记入缓存 (按文件标识，文件修改或超过
+# FAILURE_RETRY_SECONDS 后重试)，列表不会反复排队；超时、磁盘错误等临时失败不记录，下次列出时重试。
+
+SPRITE_TILES = 10
+SPRITE_TILE_WIDTH = 160
+PREVIEW_TIMEOUT = 120
+# 记录的失败在这之后过期 (ffmpeg / PyAV 升级后可能已能解码)
+FAILURE_RETRY_SECONDS = 7 * 24 * 3600
+
+_queue = queue.Queue()
+_pending = set()
+_pending_lock = threading.Lock()
+_worker = None
+
+
+def poster_name(full_path):
+    return f"{file_identity(full_path, 'poster', THUMBNAIL_SIZE)}.jpg"
+
+
+def sprite_name(full_path, tiles=SPRITE_TILES):
+    return f"{file_identity(full_path, 'sprite', tiles, SPRITE_TILE_WIDTH)}.jpg"
+
+
+def layout_name(full_path, tiles=SPRITE_TILES):
+    return f"{file_identity(full_path, 'sprite_layout', tiles, SPRITE_TILE_WIDTH)}.json"
+
+
+def failure_name(full_path):
+    return f"{file_identity(full_path, 'preview_failed')}.json"
+
+
+def _read_json(cache, name):
+    path = cache.get(name)
+    if path is None:
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        cache.discard(name)
+        return None
+
+
+def get_cached_previews(full_path, tiles=SPRITE_TILES):
+    """返回 (poster_path, sprite_path)，未生成的为 None"""
+    cache = get_thumbnail_cache()
+    try:
+        return cache.get(poster_name(full_path)), cache.get(sprite_name(full_path, tiles))
+    except OSError:
+        return None, None
+
+
+def _is_deterministic(error):
+    """
+    由文件内容决定、重试也不会成功的错误：PyAV 无法解析 (InvalidDataError 是 ValueError)、
+    缺少尺寸或时长、ffmpeg 报错退出。超时、被信号终止 (如 OOM)、OSError 等视为临时失败
+    """
+    if isinstance(error, subprocess.CalledProcessError):
+        return error.returncode > 0
+    return isinstance(error, ValueError)
+
+
+def _read_failure(cache, failure_key):
+    """返回未过期的失败记录，过期的删除"""
+    failure = _read_json(cache, failure_key)
+    if failure is None:
+        return None
+    if time.time() - failure.get("time", 0) > FAILURE_RETRY_SECONDS:
+        cache.discard(failure_key)
+        return None
+    return failure
+
+
+def preview_failed(full_path):
+    """该文件 (当前版本) 之前生成失败过，且记录未过期"""
+    try:
+        return _read_failure(get_thumbnail_cache(), failure_name(full_path)) is not None
+    except OSError:
+        return False
+
+
+def make_video_previews(full_path, tiles=SPRITE_TILES):
+    """生成 (或读取缓存的) 封面和雪碧图，返回 (poster_path, sprite_path, layout)"""
+    cache = get_thumbnail_cache()
+    poster_key = poster_name(full_path)
+    sprite_key = sprite_name(full_path, tiles)
+    layout_key = layout_name(full_path, tiles)
+    poster_path, sprite_path = cache.get(poster_key), cache.get(sprite_key)
+    layout = _read_json(cache, layout_key)
+    if poster_path is not None and sprite_path is not None and layout is not None:
+        return poster_path, sprite_path, layout
+
+    failure_key = failure_name(full_path)
+    failure = _read_failure(cache, failure_key)
+    if failure is not None:
+        raise ValueError(failure.get("error") or "Video preview failed")
+    if ffmpeg_path is None:
+        raise RuntimeError("ffmpeg not available")
+    try:
+        return _generate_previews(full_path, tiles, cache, poster_key, sprite_key, layout_key)
+    except Exception as e:
+        if _is_deterministic(e):
+            cache.put_bytes(failure_key, json.dumps({"error": str(e), "time": time.time()}).encode("utf-8"))
+        raise
+
+
+def _generate_previews(full_path, tiles, cache, poster_key, sprite_key, layout_key):
+    """探测尺寸和时长后一次 ffmpeg 调用生成封面和雪碧图，布局一并写入缓存"""
+    probe = probe_av(full_path, "video")
+    width, height = probe.get("width"), probe.get("height")
+    duration = probe.get("duration")
+    if not width or not height or not duration:
+        raise ValueError("Missing video dimensions or duration")
+
+    tile_height = max(2, round(SPRITE_TILE_WIDTH * height / width / 2) * 2)
+    layout = {
+        "tiles": tiles,
+        "tile_width": SPRITE_TILE_WIDTH,
+        "tile_height": tile_height,
+        "times": [duration * (i + 0.5) / tiles for i in range(tiles)],
+    }
+
+    args = [ffmpeg_path, "-v", "error"]
+    for t in layout["times"]:
+        # 输入端 seek：跳到之前的关键帧再解码到目标时间，每个输入只解一帧
+        args += ["-ss", f"{t:.3f}", "-i", full_path]
+
+    filters = ["[0:v]trim=end_frame=1,setpts=PTS-STARTPTS,split[poster_src][t0]"]
+    filters.append(
+        f"[poster_src]scale='min({THUMBNAIL_SIZE},iw)':-2,format=yuvj420p[poster]"
+    )
+    for i in range(1, tiles):
+        filters.append(f"[{i}:v]trim=end_frame=1,setpts=PTS-STARTPTS[t{i}]")
+    for i in range(tiles):
+        filters.append(f"[t{i}]scale={SPRITE_TILE_WIDTH}:{tile_height},setsar=1[s{i}]")
+    filters.append(
+        "".join(f"[s{i}]" for i in range(tiles))
+        + f"concat=n={tiles}:v=1:a=0,tile={tiles}x1,format=yuvj420p[sprite]"
+    )
+
+    poster_temp = cache.temp_path(poster_key)
+    sprite_temp = cache.temp_path(sprite_key)
+    args += [
+        "-filter_complex", ";".join(filters),
+        "-map", "[poster]", "-frames:v", "1", "-q:v", "4", "-f", "mjpeg", poster_temp,
+        "-map", "[sprite]", "-frames:v", "1", "-q:v", "5", "-f", "mjpeg", sprite_temp,
+    ]
+    try:
+        subprocess.run(args, capture_output=True, check=True, timeout=PREVIEW_TIMEOUT,
+                       stdin=subprocess.DEVNULL)
+        poster_path = cache.put(poster_key, poster_temp)
+        sprite_path = cache.put(sprite_key, sprite_temp)
+        cache.put_bytes(layout_key, json.dumps(layout).encode("utf-8"))
+    finally:
+        for temp_path in (poster_temp, sprite_temp):
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    return poster_path, sprite_path, layout
+
+
+# ============ Background Job ============
+
+
+def _worker_loop():
+    while True:
+        full_path = _queue.get()
+        try:
+            make_video_previews(full_path)
+        except Exception as e:
+            logger.debug(f"Video preview error ({full_path}): {e}")
+        finally:
+            with _pending_lock:
+                _pending.discard(full_path)
+            _queue.task_done()
+
+
+def enqueue_video_previews(full_paths):
+    """后台单线程依次生成，已缓存、已失败或已在队列中的文件跳过"""
+    global _worker
+    if ffmpeg_path is None:
+        return
+    with _pending_lock:
+        if _worker is None:
+            _worker = threading.Thread(target=_worker_loop, name="pm-video-previews", daemon=True)
+            _worker.start()
+        for full_path in full_paths:
+            if full_path in _pending:
+                continue
+            poster, sprite = get_cached_previews(full_path)
+            if (poster is not None and sprite is not None) or preview_failed(full_path):
+                continue
+            _pending.add(full_path)
+            _queue.put(full_path)
@@ -0,0 +1,219 @@
+// PM Segmented Preview Player
+// 分段预览：先取 /pm/viewvideo/playlist，再用 MediaSource 按播放位置按需拉取 /pm/viewvideo/segment，
+// 不必等整段转码完成就能播放和拖动。浏览器不支持或服务端不可分段时返回 null，由调用方使用完整预览 (/pm/viewvideo)
+
+import { api } from "/scripts/api.js";
+
+// 播放头之后预先拉取的分段数 (服务端另外会在空闲时预取)
+const LOOKAHEAD_SEGMENTS = 1;
+// 播放头之前保留的分段数，更早的从缓冲区移除
+const KEEP_BEHIND_SEGMENTS = 2;
+// 同一分段连续失败这么多次后放弃分段播放
+const MAX_SEGMENT_FAILURES = 3;
+
+class SegmentPlayer {
+    constructor(element, playlist, type) {
+        this.element = element;
+        this.playlist = playlist;
+        this.type = type;
+        this.mediaSource = new MediaSource();
+        this.sourceBuffer = null;
+        this.appended = new Set();
+        this.loading = new Set();
+        this.failures = new Map();
+        this.operations = [];
+        this.controller = new AbortController();
+        this.destroyed = false;
+        // 分段播放失败时调用 (由调用方切换到完整预览)
+        this.onfail = null;
+
+        this.onSeek = () => this.update();
+        this.onSourceOpen = () => this.open();
+        this.url = null;
+    }
+
+    // 开始播放：把 MediaSource 设为 video 的数据源
+    attach() {
+        this.mediaSource.addEventListener('sourceopen', this.onSourceOpen);
+        this.url = URL.createObjectURL(this.mediaSource);
+        this.element.src = this.url;
+    }
+
+    open() {
+        if (this.destroyed || this.sourceBuffer) {
+            return;
+        }
+        try {
+            this.mediaSource.duration = this.playlist.duration;
+            this.sourceBuffer = this.mediaSource.addSourceBuffer(this.type);
+        } catch (e) {
+            this.fail();
+            return;
+        }
+        // 每个分段从 0 开始计时，按 playlist 中的 start 放到时间轴上
+        this.sourceBuffer.mode = 'segments';
+        this.sourceBuffer.addEventListener('updateend', () => this.next());
+        this.sourceBuffer.addEventListener('error', () => this.fail());
+        this.element.addEventListener('timeupdate', this.onSeek);
+        this.element.addEventListener('seeking', this.onSeek);
+        this.update();
+    }
+
+    indexAt(time) {
+        const segments = this.playlist.segments;
+        for (let i = segments.length - 1; i >= 0; i--) {
+            if (time >= segments[i].start) {
+                return i;
+            }
+        }
+        return 0;
+    }
+
+    update() {
+        if (this.destroyed || !this.sourceBuffer) {
+            return;
+        }
+        const current = this.indexAt(this.element.currentTime);
+        const last = Math.min(this.playlist.segments.length - 1, current + LOOKAHEAD_SEGMENTS);
+        for (const index of this.appended) {
+            if (index < current - KEEP_BEHIND_SEGMENTS || index > last + KEEP_BEHIND_SEGMENTS) {
+                this.evict(index);
+            }
+        }
+        for (let index = current; index <= last; index++) {
+            this.load(index);
+        }
+    }
+
+    async load(index) {
+        if (this.appended.has(index) || this.loading.has(index)) {
+            return;
+        }
+        this.loading.add(index);
+        try {
+            const response = await fetch(api.apiURL(this.playlist.segments[index].url),
+                                         { signal: this.controller.signal });
+            if (!response.ok) {
+                throw new Error(`segment ${index}: ${response.status}`);
+            }
+            const data = await response.arrayBuffer();
+            this.enqueue({ type: 'append', index, data });
+        } catch (e) {
+            if (this.destroyed) {
+                return;
+            }
+            this.loading.delete(index);
+            const failures = (this.failures.get(index) || 0) + 1;
+            this.failures.set(index, failures);
+            if (failures >= MAX_SEGMENT_FAILURES) {
+                this.fail();
+            }
+        }
+    }
+
+    evict(index) {
+        this.appended.delete(index);
+        this.enqueue({ type: 'remove', index });
+    }
+
+    enqueue(operation) {
+        this.operations.push(operation);
+        this.next();
+    }
+
+    // SourceBuffer 一次只能进行一个 append/remove，操作排队依次执行
+    next() {
+        if (this.destroyed || !this.sourceBuffer || this.sourceBuffer.updating) {
+            return;
+        }
+        const operation = this.operations.shift();
+        if (!operation) {
+            this.finishIfComplete();
+            return;
+        }
+        const segment = this.playlist.segments[operation.index];
+        try {
+            if (operation.type === 'append') {
+                this.loading.delete(operation.index);
+                this.appended.add(operation.index);
+                this.sourceBuffer.timestampOffset = segment.start;
+                this.sourceBuffer.appendBuffer(operation.data);
+            } else {
+                this.sourceBuffer.remove(segment.start, segment.start + segment.duration);
+            }
+        } catch (e) {
+            if (e.name === 'QuotaExceededError' && operation.type === 'append') {
+                // 缓冲区已满：先移除一个远离播放头的分段，再重试这次 append
+                this.appended.delete(operation.index);
+                const current = this.indexAt(this.element.currentTime);
+                const victim = [...this.appended].find(
+                    (index) => Math.abs(index - current) > LOOKAHEAD_SEGMENTS);
+                if (victim !== undefined) {
+                    this.appended.delete(victim);
+                    this.operations.unshift({ type: 'remove', index: victim }, operation);
+                    this.next();
+                    return;
+                }
+            }
+            this.fail();
+        }
+    }
+
+    finishIfComplete() {
+        const count = this.playlist.segments.length;
+        if (this.appended.has(count - 1) && this.mediaSource.readyState === 'open') {
+            try {
+                this.mediaSource.endOfStream();
+            } catch (e) {
+                // 仍有操作进行中，下次 updateend 再试
+            }
+        }
+    }
+
+    fail() {
+        if (this.destroyed) {
+            return;
+        }
+        const onfail = this.onfail;
+        this.destroy();
+        if (onfail) {
+            onfail();
+        }
+    }
+
+    destroy() {
+        if (this.destroyed) {
+            return;
+        }
+        this.destroyed = true;
+        this.controller.abort();
+        this.mediaSource.removeEventListener('sourceopen', this.onSourceOpen);
+        this.element.removeEventListener('timeupdate', this.onSeek);
+        this.element.removeEventListener('seeking', this.onSeek);
+        if (this.url) {
+            URL.revokeObjectURL(this.url);
+        }
+    }
+}
+
+// query 与 /pm/viewvideo 的参数相同；返回尚未 attach 的 SegmentPlayer，不能分段播放时返回 null
+export async function playSegmented(element, query) {
+    if (!window.MediaSource) {
+        return null;
+    }
+    let playlist;
+    try {
+        const response = await fetch(api.apiURL('/pm/viewvideo/playlist?' + new URLSearchParams(query)));
+        if (!response.ok) {
+            return null;
+        }
+        playlist = await response.json();
+    } catch (e) {
+        return null;
+    }
+    const type = `${playlist.mime}; codecs="${playlist.codecs}"`;
+    if (!playlist.segments?.length || !MediaSource.isTypeSupported(type)) {
+        return null;
+    }
+    return new SegmentPlayer(element, playlist, type);
+}
@@ -0,0 +1,59 @@
+// PM Video Scrub Helper
+// 视频卡片：显示后台生成的封面，鼠标悬停时按横向位置切换雪碧图中的对应帧 (/pm/videopreview)
+
+// type 为 output / input，path 为相对该目录的路径
+export function videoPreviewUrl(type, path, kind) {
+    const parts = path.split(/[/\\]/);
+    const filename = parts.pop();
+    const params = new URLSearchParams({ filename, type, subfolder: parts.join('/'), kind });
+    return `/pm/videopreview?${params.toString()}`;
+}
+
+// 封面 + 悬停雪碧图的卡片内容，配合 setupVideoScrub 使用
+export function videoScrubHtml(type, item) {
+    return `<div class="w-full h-full relative pm-video-scrub" data-type="${type}" data-path="${item.path}">
+        <img src="${videoPreviewUrl(type, item.path, 'poster')}" alt="${item.name}" class="w-full h-full object-cover" loading="lazy">
+        <div class="pm-video-scrub-sprite absolute inset-0 hidden" style="background-repeat: no-repeat;"></div>
+    </div>`;
+}
+
+export function setupVideoScrub(el) {
+    const type = el.dataset.type;
+    const path = el.dataset.path;
+    const sprite = el.querySelector('.pm-video-scrub-sprite');
+    let layout = null;
+    let loading = null;
+
+    // 首次悬停时才请求布局和雪碧图
+    const load = () => {
+        if (!loading) {
+            loading = fetch(videoPreviewUrl(type, path, 'info'))
+                .then((response) => (response.ok ? response.json() : null))
+                .then((info) => {
+                    if (info && info.tiles > 0) {
+                        layout = info;
+                        sprite.style.backgroundImage = `url("${videoPreviewUrl(type, path, 'sprite')}")`;
+                        sprite.style.backgroundSize = `${info.tiles * 100}% 100%`;
+                    }
+                })
+                .catch(() => {});
+        }
+        return loading;
+    };
+
+    el.addEventListener('mouseenter', load);
+    el.addEventListener('mousemove', (e) => {
+        if (!layout) {
+            return;
+        }
+        const rect = el.getBoundingClientRect();
+        const ratio = Math.min(Math.max((e.clientX - rect.left) / rect.width, 0), 0.9999);
+        const tile = Math.floor(ratio * layout.tiles);
+        const position = layout.tiles > 1 ? (tile / (layout.tiles - 1)) * 100 : 0;
+        sprite.style.backgroundPosition = `${position}% 0`;
+        sprite.classList.remove('hidden');
+    });
+    el.addEventListener('mouseleave', () => {
+        sprite.classList.add('hidden');
+    });
+}
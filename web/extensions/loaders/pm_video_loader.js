@@ -1,6 +1,7 @@
 import { app } from "/scripts/app.js";
 import { api } from "/scripts/api.js";
 import { t, initPromise, onLocaleChange, getNodeTranslation } from "../common/i18n.js";
+import { playSegmented } from "../common/segment_player.js";
 
 let pmInputManagerCache = null;
 
@@ -670,6 +671,11 @@ app.registerExtension({
         });
         
         element.addEventListener("error", () => {
+          // 分段播放出错时改用完整预览，完整预览也失败才隐藏
+          if (previewWidget.segmentPlayer) {
+            previewWidget.segmentPlayer.fail();
+            return;
+          }
           container.hidden = true;
         });
         
@@ -701,15 +707,34 @@ app.registerExtension({
             force_size = "?x"+heightWidget.value;
           }
           
-          // 使用绝对路径访问 /pm/viewvideo 端点
-          const params = new URLSearchParams({
+          // 优先分段预览 (按播放位置按需转码)，不支持时使用完整预览 /pm/viewvideo
+          const query = {
             path: this.value.path,
             force_size: force_size,
-            timestamp: Date.now()
+          };
+          const playFull = () => {
+            previewWidget.segmentPlayer = null;
+            const params = new URLSearchParams({ ...query, timestamp: Date.now() });
+            element.src = api.apiURL('/pm/viewvideo?' + params.toString());
+          };
+          previewWidget.segmentPlayer?.destroy();
+          previewWidget.segmentPlayer = null;
+          const sourceVersion = previewWidget.sourceVersion = (previewWidget.sourceVersion || 0) + 1;
+          playSegmented(element, query).then((player) => {
+            if (sourceVersion !== previewWidget.sourceVersion) {
+              // 期间已切换到其他视频
+              player?.destroy();
+              return;
+            }
+            if (!player) {
+              playFull();
+              return;
+            }
+            player.onfail = playFull;
+            previewWidget.segmentPlayer = player;
+            player.attach();
           });
           
-          element.src = api.apiURL('/pm/viewvideo?' + params.toString());
-          
           delete node.video_query;
           const doQuery = async () => {
             if (!previewWidget?.value?.path) {
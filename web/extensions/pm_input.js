@@ -1,5 +1,6 @@
 import { app } from "/scripts/app.js";
 import { t, onLocaleChange } from "./common/i18n.js";
+import { videoScrubHtml, setupVideoScrub } from "./common/video_scrub.js";
 
 function getComfyUserHeader() {
     try {
@@ -341,11 +342,12 @@ class PMInputDialog {
                     const previewName = '.' + filename + '.png';
                     pathParts.push(previewName);
                     const dotPngPath = pathParts.join('/');
-                    previewUrl = `${this.getUrlPrefix()}/preview/${encodeURIComponent(dotPngPath)}?t=${Date.now()}`;
+                    previewUrl = `${this.getUrlPrefix()}/preview/${encodeURIComponent(dotPngPath)}?v=${item.preview_mtime}`;
                 } else if (item.type === 'image') {
-                    previewUrl = `${this.getUrlPrefix()}/preview/${encodeURIComponent(item.path)}?t=${Date.now()}`;
+                    // 网格里用缓存的 WebP 缩略图，不支持的格式由后端回退为原图
+                    previewUrl = `${this.getUrlPrefix()}/thumbnail/${encodeURIComponent(item.path)}?v=${item.mtime}`;
                 } else if (item.type === 'video') {
-                    previewUrl = `${this.getUrlPrefix()}/preview/${encodeURIComponent(item.path)}?t=${Date.now()}`;
+                    previewUrl = `${this.getUrlPrefix()}/preview/${encodeURIComponent(item.path)}?v=${item.mtime}`;
                 }
                 
                 if (isFolder) {
@@ -421,7 +423,9 @@ class PMInputDialog {
                                                 </div>
                                             </div>`
                                             : item.type === 'video'
-                                                ? `<video class="w-full h-full object-cover pm-video-preview" src="${previewUrl}" muted loop playsinline autoplay></video>`
+                                                ? (item.has_poster
+                                                    ? videoScrubHtml(this.directoryType, item)
+                                                    : `<video class="w-full h-full object-cover pm-video-preview" src="${previewUrl}" muted loop playsinline autoplay></video>`)
                                                 : `<div class="w-full h-full bg-[var(--comfy-input-bg)] flex items-center justify-center">
                                                     <svg class="w-16 h-16 ${iconColor}" fill="none" stroke="currentColor" viewBox="0 0 24 24">
                                                         ${iconSvg}
@@ -503,6 +507,11 @@ class PMInputDialog {
             if (audioPlayer) {
                 this.setupAudioPlayer(audioPlayer, item.path);
             }
+
+            const videoScrub = card.querySelector('.pm-video-scrub');
+            if (videoScrub) {
+                setupVideoScrub(videoScrub);
+            }
         });
         
         listEl.addEventListener('contextmenu', (e) => {
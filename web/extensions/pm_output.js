@@ -1,5 +1,7 @@
 import { app } from "/scripts/app.js";
+import { api } from "/scripts/api.js";
 import { t, onLocaleChange } from "./common/i18n.js";
+import { videoScrubHtml, setupVideoScrub } from "./common/video_scrub.js";
 
 function getComfyUserHeader() {
     try {
@@ -54,6 +56,45 @@ class PMOutputDialog {
 
     init() {
         this.createContextMenu();
+
+        // 新生成的输出由后端直接写入索引，当前目录打开时直接插入列表，无需重新扫描目录
+        api.addEventListener("pm_output.added", (event) => {
+            if (!this.dialog || this.dialog.style.display === 'none') {
+                return;
+            }
+            const current = this.currentPath.replace(/\\/g, '/');
+            const sep = this.currentPath.includes('\\') ? '\\' : '/';
+            let changed = false;
+            for (const item of event.detail?.items || []) {
+                if (item.folder !== current) {
+                    continue;
+                }
+                const existing = this.items.find((i) => i.name === item.name && i.type !== 'folder');
+                if (existing) {
+                    // 同名文件被覆盖：更新版本号，缩略图 URL 随之变化
+                    if (existing.mtime !== item.mtime) {
+                        existing.mtime = item.mtime;
+                        existing.has_thumbnail = item.has_thumbnail;
+                        changed = true;
+                    }
+                    continue;
+                }
+                this.items.push({
+                    type: item.type,
+                    name: item.name,
+                    path: this.currentPath ? this.currentPath + sep + item.name : item.name,
+                    has_preview: item.type === 'image',
+                    has_thumbnail: item.has_thumbnail,
+                    mtime: item.mtime,
+                    absolute_path: item.absolute_path,
+                });
+                changed = true;
+            }
+            if (changed) {
+                this.items.sort((a, b) => ((a.type === 'folder' ? 0 : 1) - (b.type === 'folder' ? 0 : 1)) || (a.name < b.name ? -1 : a.name > b.name ? 1 : 0));
+                this.renderItems();
+            }
+        });
         
         this.dialog = document.createElement('div');
         this.dialog.id = 'pm-output-dialog';
@@ -282,11 +323,13 @@ class PMOutputDialog {
                     const previewName = '.' + filename + '.png';
                     pathParts.push(previewName);
                     const dotPngPath = pathParts.join('/');
-                    previewUrl = `/pm_output/preview/${encodeURIComponent(dotPngPath)}?t=${Date.now()}`;
+                    previewUrl = `/pm_output/preview/${encodeURIComponent(dotPngPath)}?v=${item.preview_mtime}`;
                 } else if (item.type === 'image') {
-                    previewUrl = `/pm_output/preview/${encodeURIComponent(item.path)}?t=${Date.now()}`;
+                    // 网格里用缓存的 WebP 缩略图；生成失败的条目 (has_thumbnail === false) 直接取原图
+                    const endpoint = item.has_thumbnail === false ? 'preview' : 'thumbnail';
+                    previewUrl = `/pm_output/${endpoint}/${encodeURIComponent(item.path)}?v=${item.mtime}`;
                 } else if (item.type === 'video') {
-                    previewUrl = `/pm_output/preview/${encodeURIComponent(item.path)}?t=${Date.now()}`;
+                    previewUrl = `/pm_output/preview/${encodeURIComponent(item.path)}?v=${item.mtime}`;
                 }
                 
                 if (isFolder) {
@@ -362,7 +405,9 @@ class PMOutputDialog {
                                                 </div>
                                             </div>`
                                             : item.type === 'video'
-                                                ? `<video class="w-full h-full object-cover pm-video-preview" src="${previewUrl}" muted loop playsinline autoplay></video>`
+                                                ? (item.has_poster
+                                                    ? videoScrubHtml('output', item)
+                                                    : `<video class="w-full h-full object-cover pm-video-preview" src="${previewUrl}" muted loop playsinline autoplay></video>`)
                                                 : `<div class="w-full h-full bg-[var(--comfy-input-bg)] flex items-center justify-center">
                                                     <svg class="w-16 h-16 ${iconColor}" fill="none" stroke="currentColor" viewBox="0 0 24 24">
                                                         ${iconSvg}
@@ -437,6 +482,11 @@ class PMOutputDialog {
             if (audioPlayer) {
                 this.setupAudioPlayer(audioPlayer, item.path);
             }
+
+            const videoScrub = card.querySelector('.pm-video-scrub');
+            if (videoScrub) {
+                setupVideoScrub(videoScrub);
+            }
         });
 
         listEl.addEventListener('contextmenu', (e) => {